@@ -51,59 +51,519 @@ Expected output:
   "usage": {...}
 }
 
+Compact prompt test input (messages rendered by the proxy):
+{
+  "prompt": {
+    "category": "Delegation",
+    "profile": {"jobTitle": "Software Engineer", "team": "Engineering",
+                "jobLevel": "P3", "aiFrequency": "weekly", "aiToolsUsed": ["Gemini"]},
+    "scores": {"score": 2.5, "maturity": "Competent", "hasNotStarted": false},
+    "nuance": {"multiSelectCount": 0, "totalQuestions": 2},
+    "responses": {"q1": [2], "q2": [3]}
+  },
+  "prompt_version": "v1"
+}
+
+Batch test input (one job, items run concurrently):
+{
+  "batch": [
+    {"id": "Delegation", "messages": [{"role": "user", "content": "Say hi"}]},
+    {"id": "Discernment", "messages": [{"role": "user", "content": "Say bye"}]}
+  ],
+  "model": "gpt-4o",
+  "max_tokens": 100
+}
+
+Expected output:
+{
+  "success": true,
+  "results": [{"id": "Delegation", "success": true, "response": "...", ...}, ...],
+  "failed": 0,
+  "elapsed_ms": ...
+}
+
+Recommendation index maintenance (schedule "build" nightly and run
+"refresh" after editing a prompt; see RECOMMENDATION INDEX below):
+{"index_action": "build", "index_limit": 500}
+{"index_action": "refresh"}
+{"index_action": "stats"}
+
 ============================================================================
 """
 
-import requests
-from typing import List, Dict, Any
+import functools
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Dict, Any, Iterator, Optional
 
-def main(
-    rapid_openai: dict,
-    messages: List[Dict[str, str]],
-    model: str = "gpt-4o",
-    max_tokens: int = 1500,
-    temperature: float = 0.7
-) -> dict:
-    """
-    OpenAI API proxy for AI Literacy Assessment
-    
-    Args:
-        rapid_openai: OpenAI resource (contains api_key)
-        messages: List of message dicts with 'role' and 'content'
-        model: OpenAI model to use
-        max_tokens: Maximum tokens in response
-        temperature: Creativity setting (0-1)
+# requests (with urllib3) is imported on the first upstream call - see
+# load_requests() - so a cold worker answering from the cache or the index
+# never pays for it
+requests = None
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+# Each main() call records how long its phases took. A span is added to the
+# request's trace (returned as "timings", in ms) and to the worker's
+# histogram for that phase:
+#
+#   render, validate_input      prompt rendering and message checks
+#   index_lookup, cache_lookup  local lookups
+#   coalesce_wait               waiting on an identical in-flight request
+#   rate_limit_wait             queued in the model's limiter
+#   upstream_connect            opening a TCP/TLS connection (absent on a reused one)
+#   upstream_ttfb               request sent -> response headers (first chunk when streaming)
+#   upstream_body               rest of the body (rest of the stream)
+#   body_parse                  decoding the JSON body or SSE chunks
+#   validate_response           recommendation checks (see RESPONSE VALIDATION)
+#   total                       the whole main() call
+#
+# Histograms keep lifetime bucket counts (cumulative, for Prometheus) plus
+# the last METRICS_WINDOW_SAMPLES observations for rolling percentiles.
+# Token usage is counted per requested model. main(metrics="prometheus")
+# returns a text exposition snapshot; metrics="json" the same as a dict.
+
+METRICS_ENABLED = True
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+METRICS_WINDOW_SAMPLES = 1024       # Recent observations kept per phase
+METRICS_WINDOW_SECONDS = 300        # ...and only those from the last this many seconds count
+
+_trace_local = threading.local()
+_metrics_lock = threading.Lock()
+_counters_lock = threading.Lock()  # Subsystem counters (cache, hedging, validation, index)
+_histograms = {}                    # phase -> PhaseHistogram
+_token_counters = {}                # model -> {"completions", "prompt_tokens", "completion_tokens"}
+
+
+class PhaseHistogram:
+    """Lifetime latency buckets plus a rolling window of recent samples"""
     
-    Returns:
-        dict: Response with success status and AI content
-    """
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.recent = deque(maxlen=METRICS_WINDOW_SAMPLES)  # (monotonic time, ms)
     
-    # ============================================================================
-    # INPUT VALIDATION
-    # ============================================================================
+    def observe(self, ms: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.recent.append((time.monotonic(), ms))
     
-    if not messages or len(messages) == 0:
+    def window(self) -> dict:
+        """Count and p50/p95/p99 (ms) over the rolling window"""
+        cutoff = time.monotonic() - METRICS_WINDOW_SECONDS
+        samples = sorted(ms for at, ms in self.recent if at >= cutoff)
+        if not samples:
+            return {"count": 0}
         return {
-            "success": False,
-            "error": "Messages array is required and cannot be empty"
+            "count": len(samples),
+            **{f"p{p}": round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 2) for p in (50, 95, 99)}
         }
+
+
+def observe(phase: str, ms: float) -> None:
+    """Record a span in the phase histogram and the current request's trace"""
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        histogram = _histograms.get(phase)
+        if histogram is None:
+            histogram = _histograms[phase] = PhaseHistogram()
+        histogram.observe(ms)
+        trace = getattr(_trace_local, "trace", None)
+        if trace is not None:
+            trace[phase] = trace.get(phase, 0.0) + ms
+
+
+@contextmanager
+def span(phase: str):
+    """Time the enclosed block as `phase`"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(phase, (time.perf_counter() - started) * 1000)
+
+
+def bump(counters: dict, name: str, amount: float = 1) -> None:
+    """Add to a subsystem counter; hedged attempts update them from pool threads"""
+    with _counters_lock:
+        counters[name] += amount
+
+
+def read_counters(counters: dict) -> dict:
+    """Copy of a subsystem's counters, consistent with concurrent bumps"""
+    with _counters_lock:
+        return dict(counters)
+
+
+def current_trace() -> Optional[dict]:
+    return getattr(_trace_local, "trace", None)
+
+
+def run_in_trace(trace: Optional[dict], fn, *args):
+    """Call fn on a pool thread with spans going to the submitting request's trace"""
+    _trace_local.trace = trace
+    try:
+        return fn(*args)
+    finally:
+        _trace_local.trace = None
+
+
+def traced(handler):
+    """Give each call its own trace and return it as "timings" on dict results"""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        # Metrics snapshots aren't requests; keep scrapes out of "total"
+        if not METRICS_ENABLED or kwargs.get("metrics"):
+            return handler(*args, **kwargs)
+        parent = current_trace()
+        trace = _trace_local.trace = {}
+        started = time.perf_counter()
+        try:
+            result = handler(*args, **kwargs)
+        finally:
+            _trace_local.trace = parent
+        # Streams run after main() returns; their spans only reach the histograms
+        if isinstance(result, dict):
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            observe("total", elapsed_ms)
+            trace["total"] = elapsed_ms
+            result = {**result, "timings": {phase: round(ms, 2) for phase, ms in trace.items()}}
+        return result
+    return wrapper
+
+
+def record_usage(model: str, usage: dict) -> None:
+    """Count one upstream completion's tokens for `model`"""
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        counters = _token_counters.setdefault(model, {"completions": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        counters["completions"] += 1
+        counters["prompt_tokens"] += usage.get("prompt_tokens", 0) or 0
+        counters["completion_tokens"] += usage.get("completion_tokens", 0) or 0
+
+
+class _TimedConnectionMixin:
+    """Records connection setup (TCP connect and TLS handshake) as upstream_connect"""
     
-    # Validate each message
-    for msg in messages:
-        if "role" not in msg or "content" not in msg:
-            return {
-                "success": False,
-                "error": "Each message must have 'role' and 'content' keys"
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            _trace_local.connect_ms = getattr(_trace_local, "connect_ms", 0.0) + ms
+            observe("upstream_connect", ms)
+
+
+@functools.lru_cache(maxsize=None)
+def _timed_adapter_class():
+    """HTTPAdapter subclass whose pools time new connections (built with requests)"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = type("TimedHTTPConnection", (_TimedConnectionMixin, HTTPConnection), {})
+    
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = type("TimedHTTPSConnection", (_TimedConnectionMixin, HTTPSConnection), {})
+    
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": TimedHTTPConnectionPool,
+                "https": TimedHTTPSConnectionPool
             }
-        if msg["role"] not in ["system", "user", "assistant"]:
-            return {
-                "success": False,
-                "error": "Message role must be 'system', 'user', or 'assistant'"
+    
+    return TimedHTTPAdapter
+
+
+def metrics_snapshot() -> dict:
+    """Phase histograms, token counters and the other subsystems' counters"""
+    with _metrics_lock:
+        phases = {
+            phase: {
+                "count": h.count,
+                "sum_ms": round(h.sum_ms, 2),
+                "buckets": dict(zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], h.buckets)),
+                "window": h.window()
             }
+            for phase, h in _histograms.items()
+        }
+        tokens = {model: dict(counters) for model, counters in _token_counters.items()}
+    return {
+        "phases": phases,
+        "tokens": tokens,
+        "cache": cache_stats(),
+        "index": read_counters(_index_stats),
+        "validation": validation_stats(),
+        "coalescing": coalesce_stats(),
+        "hedging": {k: v for k, v in hedge_stats().items() if k != "latency_ms"},
+        "limiters": limiter_stats()
+    }
+
+
+def _prom_escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prom_labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_prom_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def metrics_text() -> str:
+    """metrics_snapshot() in the Prometheus text exposition format"""
+    snapshot = metrics_snapshot()
+    lines = [
+        "# HELP openai_proxy_phase_latency_ms Time spent in each request phase",
+        "# TYPE openai_proxy_phase_latency_ms histogram"
+    ]
+    for phase, h in snapshot["phases"].items():
+        cumulative = 0
+        for le, count in h["buckets"].items():
+            cumulative += count
+            lines.append(f"openai_proxy_phase_latency_ms_bucket{_prom_labels(phase=phase, le=le)} {cumulative}")
+        lines.append(f"openai_proxy_phase_latency_ms_sum{_prom_labels(phase=phase)} {h['sum_ms']}")
+        lines.append(f"openai_proxy_phase_latency_ms_count{_prom_labels(phase=phase)} {h['count']}")
     
-    # ============================================================================
-    # CALL OPENAI API
-    # ============================================================================
+    lines.append(f"# HELP openai_proxy_phase_latency_window_ms Phase latency over the last {METRICS_WINDOW_SECONDS} s")
+    lines.append("# TYPE openai_proxy_phase_latency_window_ms summary")
+    for phase, h in snapshot["phases"].items():
+        window = h["window"]
+        for p in (50, 95, 99):
+            if f"p{p}" in window:
+                lines.append(f"openai_proxy_phase_latency_window_ms{_prom_labels(phase=phase, quantile=p / 100)} {window[f'p{p}']}")
+        lines.append(f"openai_proxy_phase_latency_window_ms_count{_prom_labels(phase=phase)} {window['count']}")
+    
+    lines.append("# HELP openai_proxy_tokens_total Tokens used by upstream completions")
+    lines.append("# TYPE openai_proxy_tokens_total counter")
+    for model, counters in snapshot["tokens"].items():
+        for kind in ("prompt", "completion"):
+            lines.append(f"openai_proxy_tokens_total{_prom_labels(model=model, type=kind)} {counters[f'{kind}_tokens']}")
+    lines.append("# HELP openai_proxy_completions_total Successful upstream completions")
+    lines.append("# TYPE openai_proxy_completions_total counter")
+    for model, counters in snapshot["tokens"].items():
+        lines.append(f"openai_proxy_completions_total{_prom_labels(model=model)} {counters['completions']}")
+    
+    counters = (
+        ("openai_proxy_cache_hits_total", "Responses served from the cache", snapshot["cache"]["hits"]),
+        ("openai_proxy_cache_misses_total", "Cache lookups that went upstream", snapshot["cache"]["misses"]),
+        ("openai_proxy_index_hits_total", "Responses served from the recommendation index", snapshot["index"]["hits"]),
+        ("openai_proxy_validation_retries_total", "In-proxy retries of invalid recommendations", snapshot["validation"]["retries"]),
+        ("openai_proxy_coalesced_total", "Requests that shared an in-flight upstream call", snapshot["coalescing"]["followers"]),
+        ("openai_proxy_hedged_total", "Requests that sent a hedged call", snapshot["hedging"]["hedged"])
+    )
+    for name, help_text, value in counters:
+        lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"])
+    lines.append("# HELP openai_proxy_breaker_open Whether the model's circuit breaker is open")
+    lines.append("# TYPE openai_proxy_breaker_open gauge")
+    for model, limiter in snapshot["limiters"].items():
+        lines.append(f"openai_proxy_breaker_open{_prom_labels(model=model)} {int(limiter['state'] == 'open')}")
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================================
+# CONNECTION POOL CONFIGURATION
+# ============================================================================
+# Warm Windmill workers keep this module loaded between jobs, so a single
+# pooled client is reused across calls instead of paying a fresh TCP+TLS
+# handshake to OpenAI on every recommendation.
+
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+REQUEST_TIMEOUT = 60
+
+POOL_CONNECTIONS = 4        # Number of distinct hosts to keep pools for
+POOL_MAXSIZE = 8            # Keep-alive connections per host
+USE_HTTP2 = False           # Requires the optional `httpx[http2]` package
+CLIENT_MAX_AGE = 300        # Seconds before the whole pool is rebuilt
+CLIENT_MAX_IDLE = 60        # Seconds idle before pooled connections are presumed stale
+
+_client = None
+_client_created_at = 0.0
+_client_last_used = 0.0
+_client_lock = threading.Lock()
+_pool_stats = {
+    "clients_created": 0,
+    "requests": 0,
+    "stale_refreshes": 0,
+    "connection_retries": 0
+}
+
+
+def load_requests():
+    """Import requests into the module globals on first use and return it"""
+    global requests
+    if requests is None:
+        import requests
+    return requests
+
+
+def _new_client():
+    """Create a keep-alive HTTP client (httpx with HTTP/2 if enabled, else requests)"""
+    load_requests()
+    if USE_HTTP2:
+        try:
+            import httpx
+            return httpx.Client(
+                http2=True,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=POOL_MAXSIZE,
+                    max_keepalive_connections=POOL_MAXSIZE,
+                    keepalive_expiry=CLIENT_MAX_IDLE
+                )
+            )
+        except ImportError:
+            print("httpx[http2] not installed, falling back to HTTP/1.1 keep-alive")
+    
+    session = requests.Session()
+    adapter = _timed_adapter_class()(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=0
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_client(force_refresh: bool = False):
+    """
+    Return the shared pooled client, rebuilding it when it is stale
+    
+    The client is replaced when it is older than CLIENT_MAX_AGE or has sat
+    idle longer than CLIENT_MAX_IDLE (upstream load balancers drop idle
+    keep-alive connections, and reusing one of those costs a failed request).
+    """
+    global _client, _client_created_at, _client_last_used
+    
+    with _client_lock:
+        now = time.monotonic()
+        stale = _client is not None and (
+            now - _client_created_at > CLIENT_MAX_AGE or
+            now - _client_last_used > CLIENT_MAX_IDLE
+        )
+        if _client is None or stale or force_refresh:
+            if _client is not None:
+                _pool_stats["stale_refreshes"] += 1
+                _client.close()
+            _client = _new_client()
+            _client_created_at = now
+            _pool_stats["clients_created"] += 1
+        _client_last_used = now
+        _pool_stats["requests"] += 1
+        return _client
+
+
+def reset_client() -> None:
+    """Close and drop the shared client (next call creates a fresh pool)"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+
+
+def pool_stats() -> dict:
+    """Snapshot of connection pool counters for this worker"""
+    with _client_lock:
+        return dict(_pool_stats)
+
+
+def _post_json(url: str, headers: dict, payload: dict):
+    """
+    POST through the pooled client, retrying once on a dropped keep-alive connection
+    
+    httpx errors are re-raised as their requests equivalents so callers only
+    handle one exception family.
+    """
+    for attempt in range(2):
+        client = get_client(force_refresh=attempt > 0)
+        try:
+            if USE_HTTP2 and not isinstance(client, requests.Session):
+                import httpx
+                try:
+                    return client.post(url, headers=headers, json=payload)
+                except httpx.TimeoutException as e:
+                    raise requests.exceptions.Timeout(str(e))
+                except httpx.TransportError as e:
+                    raise requests.exceptions.ConnectionError(str(e))
+            return client.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
+        except requests.exceptions.ConnectionError:
+            if attempt > 0:
+                raise
+            with _client_lock:
+                _pool_stats["connection_retries"] += 1
+            print("Pooled connection failed, refreshing client and retrying once")
+
+
+@contextmanager
+def _stream_lines(url: str, headers: dict, payload: dict):
+    """
+    POST through the pooled client and yield (status_code, headers, line iterator) for an SSE body
+    
+    httpx errors are re-raised as their requests equivalents, as in _post_json.
+    """
+    client = get_client()
+    if USE_HTTP2 and not isinstance(client, requests.Session):
+        import httpx
+        try:
+            with client.stream("POST", url, headers=headers, json=payload) as response:
+                yield response.status_code, response.headers, response.iter_lines()
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+        return
+    
+    response = client.post(url, headers=headers, json=payload, timeout=REQUEST_TIMEOUT, stream=True)
+    try:
+        yield response.status_code, response.headers, response.iter_lines(decode_unicode=True)
+    finally:
+        response.close()
+
+
+def _record_upstream_timing(response, started: float) -> None:
+    """Split a blocking call into time-to-first-byte and body download"""
+    total_ms = (time.perf_counter() - started) * 1000
+    connect_ms = getattr(_trace_local, "connect_ms", 0.0)
+    elapsed = getattr(response, "elapsed", None)
+    if isinstance(response, requests.Response) and elapsed is not None:
+        # requests' elapsed runs from sending (including connect) to parsed headers
+        headers_ms = elapsed.total_seconds() * 1000
+        observe("upstream_ttfb", max(0.0, headers_ms - connect_ms))
+        observe("upstream_body", max(0.0, total_ms - headers_ms))
+    else:
+        observe("upstream_ttfb", max(0.0, total_ms - connect_ms))
+
+
+def _call_openai(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float
+) -> dict:
+    """Make one chat completion request upstream and shape the proxy response"""
+    # Before the try: its except clauses name requests' exception classes
+    load_requests()
     
     try:
         print(f"Calling OpenAI with model: {model}, max_tokens: {max_tokens}")
@@ -116,33 +576,38 @@ def main(
                 "error": "API key not found in rapid_openai resource"
             }
         
-        # Make request to OpenAI
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
+        # Make request to OpenAI (resource may override the URL, e.g. for a local mock)
+        _trace_local.connect_ms = 0.0
+        started = time.perf_counter()
+        response = _post_json(
+            rapid_openai.get("api_url", OPENAI_API_URL),
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {api_key}"
             },
-            json={
+            payload={
                 "model": model,
                 "messages": messages,
                 "max_tokens": max_tokens,
                 "temperature": temperature
-            },
-            timeout=60
+            }
         )
+        _record_upstream_timing(response, started)
         
         # Check for errors
-        if not response.ok:
+        if response.status_code >= 400:
             error_text = response.text
             print(f"OpenAI API Error: {response.status_code} - {error_text}")
             return {
                 "success": False,
                 "error": f"OpenAI API returned {response.status_code}",
-                "details": error_text
+                "details": error_text,
+                "status_code": response.status_code,
+                "retry_after": retry_after_seconds(response.headers)
             }
         
-        data = response.json()
+        with span("body_parse"):
+            data = response.json()
         
         # Extract content
         content = data.get("choices", [{}])[0].get("message", {}).get("content")
@@ -158,6 +623,7 @@ def main(
         # RETURN SUCCESS RESPONSE
         # ============================================================================
         
+        record_usage(model, data.get("usage") or {})
         return {
             "success": True,
             "response": content,
@@ -173,13 +639,15 @@ def main(
     except requests.exceptions.Timeout:
         return {
             "success": False,
-            "error": "Request to OpenAI timed out after 60 seconds"
+            "error": f"Request to OpenAI timed out after {REQUEST_TIMEOUT} seconds",
+            "retryable": True
         }
     
     except requests.exceptions.RequestException as e:
         return {
             "success": False,
-            "error": f"Network error: {str(e)}"
+            "error": f"Network error: {str(e)}",
+            "retryable": True
         }
     
     except Exception as e:
@@ -193,3 +661,2280 @@ def main(
             "error": str(e),
             "error_type": type(e).__name__
         }
+
+
+# ============================================================================
+# RATE LIMITING
+# ============================================================================
+# Every upstream call goes through a per-model limiter shared by all jobs and
+# batch threads on this worker:
+#
+#   - a token bucket caps the request rate (MODEL_RATE_LIMITS)
+#   - an AIMD concurrency limit grows by ~1 per round of successes and halves
+#     when 429s or 5xx cluster (AIMD_DECREASE_SHARE of the last AIMD_WINDOW
+#     attempts), so in-flight calls settle just under what upstream accepts.
+#     A 429 that carries Retry-After never lowers it: the token bucket already
+#     paces requests and the pause below says exactly how long to back off
+#   - when most recent attempts are throttled (RETRY_AFTER_PAUSE_SHARE), a
+#     429's Retry-After pauses the whole model, not just the caller, so
+#     waiting requests don't all retry into the same limit. Otherwise a 429
+#     only makes its own caller wait out the Retry-After; halving or pausing
+#     on every stray 429 starved throughput
+#   - a circuit breaker opens after BREAKER_FAILURE_THRESHOLD consecutive
+#     failures (5xx, timeouts, dropped connections; not 429s) and fails fast
+#     with {"fallback": "static"}, which tells the browser to show the static
+#     recommendations instead of retrying
+#
+# Retryable failures (429, 5xx, timeouts, dropped connections) are retried
+# here with jittered backoff within UPSTREAM_RETRY_BUDGET seconds.
+
+RATE_LIMIT_ENABLED = True
+MODEL_RATE_LIMITS = {               # model -> (requests per second, burst)
+    "gpt-4o": (10.0, 20),
+    "gpt-4o-mini": (20.0, 40)
+}
+DEFAULT_RATE_LIMIT = (10.0, 20)
+
+AIMD_INITIAL_LIMIT = 8              # Concurrent upstream calls per model to start with
+AIMD_MIN_LIMIT = 1
+AIMD_MAX_LIMIT = 32
+AIMD_INCREASE = 1.0                 # Added to the limit per limit-many successes
+AIMD_DECREASE = 0.5                 # Multiplier applied when 429s / 5xx cluster
+AIMD_DECREASE_INTERVAL = 1.0        # At most one decrease per interval (one burst of 429s)
+AIMD_WINDOW = 20                    # Recent attempts checked for a cluster of 429s / 5xx
+AIMD_DECREASE_SHARE = 0.2           # Share of the window that must be 429s / 5xx to decrease
+RETRY_AFTER_PAUSE_SHARE = 0.5       # Share of the window that must be 429s / 5xx to pause the model
+
+UPSTREAM_MAX_RETRIES = 3
+UPSTREAM_RETRY_BUDGET = 30          # Seconds a call may spend waiting and retrying
+RETRY_BASE_DELAY = 0.5              # Seconds; doubled per retry, with full jitter
+RETRY_AFTER_MAX = 30                # Ignore absurd Retry-After values beyond this
+
+BREAKER_FAILURE_THRESHOLD = 5       # Consecutive failed (non-429) attempts before opening
+BREAKER_OPEN_SECONDS = 30           # Fail fast for this long, then let one probe through
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Seconds to wait from retry-after-ms / Retry-After (delta or HTTP date), or None"""
+    try:
+        if headers.get("retry-after-ms"):
+            return min(RETRY_AFTER_MAX, max(0.0, float(headers["retry-after-ms"]) / 1000))
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            from email.utils import parsedate_to_datetime
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        return min(RETRY_AFTER_MAX, max(0.0, seconds))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class ModelLimiter:
+    """Token bucket, AIMD concurrency limit and circuit breaker for one model"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.limit = float(AIMD_INITIAL_LIMIT)
+        self.decreased_at = 0.0
+        self.recent = deque(maxlen=AIMD_WINDOW)   # True for each throttled / failed attempt
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.stats = {
+            "admitted": 0, "succeeded": 0, "throttled": 0, "failed": 0, "retries": 0,
+            "rejected": 0, "breaker_opens": 0, "wait_ms": 0.0
+        }
+        self._cond = threading.Condition()
+    
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * self.rate)
+        self.refilled_at = now
+    
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe through or the pause ends"""
+        now = time.monotonic()
+        if self.state == "open":
+            return max(0.0, self.opened_at + BREAKER_OPEN_SECONDS - now)
+        return max(0.0, self.paused_until - now)
+    
+    def acquire(self, deadline: float) -> Optional[str]:
+        """
+        Wait for a token and a concurrency slot
+        
+        Returns None once admitted (the caller must call release), or the
+        reason it was refused: "open" when the breaker is failing fast,
+        "deadline" when no slot freed up before `deadline`.
+        """
+        started = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.state == "open":
+                    if now - self.opened_at < BREAKER_OPEN_SECONDS:
+                        self.stats["rejected"] += 1
+                        return "open"
+                    self.state = "half_open"
+                if self.state == "half_open" and self.probing:
+                    self.stats["rejected"] += 1
+                    return "open"
+                
+                self._refill(now)
+                if now < self.paused_until:
+                    if self.paused_until >= deadline:
+                        self.stats["rejected"] += 1
+                        return "deadline"
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.limit):
+                    wait = None
+                elif self.tokens < 1:
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.probing = self.state == "half_open"
+                    self.stats["admitted"] += 1
+                    self.stats["wait_ms"] += (now - started) * 1000
+                    observe("rate_limit_wait", (now - started) * 1000)
+                    return None
+                
+                remaining = deadline - now
+                if remaining <= 0:
+                    self.stats["rejected"] += 1
+                    return "deadline"
+                self._cond.wait(remaining if wait is None else min(wait, remaining))
+    
+    def release(self, outcome: str, retry_after: Optional[float] = None) -> None:
+        """Free the slot and adapt to the attempt's outcome: success, throttled, failure or neutral"""
+        with self._cond:
+            self.in_flight -= 1
+            self.probing = False
+            self.recent.append(outcome in ("throttled", "failure"))
+            if outcome in ("success", "neutral"):
+                # Upstream answered, so it is reachable again
+                if outcome == "success":
+                    self.stats["succeeded"] += 1
+                    self.limit = min(AIMD_MAX_LIMIT, self.limit + AIMD_INCREASE / self.limit)
+                self.consecutive_failures = 0
+                self.state = "closed"
+            else:
+                now = time.monotonic()
+                self.stats["throttled" if outcome == "throttled" else "failed"] += 1
+                congested = sum(self.recent)
+                clustered = congested >= AIMD_DECREASE_SHARE * AIMD_WINDOW
+                paced = outcome == "throttled" and retry_after is not None
+                if clustered and not paced and now - self.decreased_at >= AIMD_DECREASE_INTERVAL:
+                    self.limit = max(AIMD_MIN_LIMIT, self.limit * AIMD_DECREASE)
+                    self.decreased_at = now
+                    # The next decrease needs a fresh cluster
+                    self.recent.clear()
+                if outcome == "throttled":
+                    # Upstream is up but busy: the pause and the lower limit
+                    # handle a cluster, the caller's own retry delay a stray
+                    # 429, and it doesn't count toward the breaker
+                    if congested >= RETRY_AFTER_PAUSE_SHARE * AIMD_WINDOW:
+                        pause = retry_after if retry_after is not None else RETRY_BASE_DELAY
+                        self.paused_until = max(self.paused_until, now + pause)
+                    self._cond.notify_all()
+                    return
+                self.consecutive_failures += 1
+                if self.state == "half_open" or self.consecutive_failures >= BREAKER_FAILURE_THRESHOLD:
+                    if self.state != "open":
+                        self.stats["breaker_opens"] += 1
+                        print(f"Circuit breaker opened after {self.consecutive_failures} consecutive failures")
+                    self.state = "open"
+                    self.opened_at = now
+            self._cond.notify_all()
+    
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "state": self.state,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                **self.stats
+            }
+
+
+def get_limiter(model: str) -> ModelLimiter:
+    """The shared limiter for `model`, created on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limiter = _limiters[model] = ModelLimiter(*MODEL_RATE_LIMITS.get(model, DEFAULT_RATE_LIMIT))
+        return limiter
+
+
+def limiter_stats() -> dict:
+    """Snapshot of every model's limiter on this worker"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.snapshot() for model, limiter in limiters.items()}
+
+
+def _classify(result: dict) -> str:
+    """Map an upstream result to a limiter outcome"""
+    if result.get("success"):
+        return "success"
+    status = result.get("status_code")
+    if status == 429:
+        return "throttled"
+    if (status is not None and status >= 500) or result.get("retryable"):
+        return "failure"
+    return "neutral"
+
+
+def _fallback_response(limiter: ModelLimiter, model: str, reason: str, last: Optional[dict] = None) -> dict:
+    """Fail-fast response the browser answers with static recommendations"""
+    if reason == "open":
+        error = f"Upstream for {model} is failing; circuit breaker open"
+    elif reason == "deadline":
+        error = f"No upstream capacity for {model} within {UPSTREAM_RETRY_BUDGET} seconds"
+    else:
+        error = (last or {}).get("error", "Upstream request failed")
+    response = {**(last or {}), "success": False, "error": error, "fallback": "static"}
+    response["retry_after"] = round(max(limiter.retry_in(), (last or {}).get("retry_after") or 0), 1)
+    return response
+
+
+def call_upstream(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float
+) -> dict:
+    """_call_openai behind the model's limiter, retrying retryable failures"""
+    if not RATE_LIMIT_ENABLED:
+        return _call_openai(rapid_openai, messages, model, max_tokens, temperature)
+    
+    limiter = get_limiter(model)
+    deadline = time.monotonic() + UPSTREAM_RETRY_BUDGET
+    result = None
+    for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+        refused = limiter.acquire(deadline)
+        if refused:
+            response = _fallback_response(limiter, model, refused, result)
+            return {**response, "attempts": attempt} if attempt else response
+        
+        result = _call_openai(rapid_openai, messages, model, max_tokens, temperature)
+        outcome = _classify(result)
+        limiter.release(outcome, result.get("retry_after"))
+        if outcome in ("success", "neutral"):
+            return {**result, "attempts": attempt + 1} if attempt else result
+        if attempt == UPSTREAM_MAX_RETRIES:
+            break
+        
+        # A throttled call waits out its Retry-After (the whole model is
+        # paused too when most calls are throttled); the jitter spreads the
+        # waiting callers out when it ends
+        delay = random.uniform(0, RETRY_BASE_DELAY * (2 ** attempt))
+        if outcome == "throttled":
+            delay += result.get("retry_after") or 0
+        if time.monotonic() + delay >= deadline:
+            break
+        time.sleep(delay)
+        with limiter._cond:
+            limiter.stats["retries"] += 1
+        print(f"Retrying {model} after {outcome} (attempt {attempt + 2}/{UPSTREAM_MAX_RETRIES + 1})")
+    
+    return {**_fallback_response(limiter, model, "exhausted", result), "attempts": attempt + 1}
+
+
+# ============================================================================
+# STREAMING
+# ============================================================================
+# With stream=True, main() returns a generator of events instead of a dict so
+# the caller can render text as soon as the first token arrives:
+#
+#   {"type": "delta", "content": "..."}      one per upstream chunk
+#   {"type": "summary", "success": ..., ...}  always last; same fields as the
+#                                             non-streaming response dict
+
+
+def stream_completion(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float
+) -> Iterator[dict]:
+    """Forward upstream SSE chunks as delta events, then yield the assembled summary"""
+    
+    api_key = rapid_openai.get("api_key")
+    if not api_key:
+        yield {"type": "summary", "success": False, "error": "API key not found in rapid_openai resource"}
+        return
+    
+    print(f"Streaming from OpenAI with model: {model}, max_tokens: {max_tokens}")
+    load_requests()
+    parts = []
+    usage = {}
+    finish_reason = None
+    response_model = None
+    _trace_local.connect_ms = 0.0
+    started = time.perf_counter()
+    first_chunk_at = None
+    parse_ms = 0.0
+    
+    try:
+        with _stream_lines(
+            rapid_openai.get("api_url", OPENAI_API_URL),
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {api_key}"
+            },
+            payload={
+                "model": model,
+                "messages": messages,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "stream": True,
+                "stream_options": {"include_usage": True}
+            }
+        ) as (status_code, response_headers, lines):
+            if status_code >= 400:
+                error_text = "\n".join(lines)
+                print(f"OpenAI API Error: {status_code} - {error_text}")
+                yield {
+                    "type": "summary",
+                    "success": False,
+                    "error": f"OpenAI API returned {status_code}",
+                    "details": error_text,
+                    "status_code": status_code,
+                    "retry_after": retry_after_seconds(response_headers)
+                }
+                return
+            
+            for line in lines:
+                if not line or not line.startswith("data:"):
+                    continue
+                now = time.perf_counter()
+                if first_chunk_at is None:
+                    first_chunk_at = now
+                    observe("upstream_ttfb", max(0.0, (now - started) * 1000 - getattr(_trace_local, "connect_ms", 0.0)))
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                parse_ms += (time.perf_counter() - now) * 1000
+                response_model = chunk.get("model", response_model)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices", []):
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        parts.append(delta)
+                        yield {"type": "delta", "content": delta}
+                    if choice.get("finish_reason"):
+                        finish_reason = choice["finish_reason"]
+    
+    except requests.exceptions.Timeout:
+        yield {"type": "summary", "success": False, "error": f"Request to OpenAI timed out after {REQUEST_TIMEOUT} seconds", "retryable": True}
+        return
+    except requests.exceptions.RequestException as e:
+        yield {"type": "summary", "success": False, "error": f"Network error: {str(e)}", "retryable": True}
+        return
+    except Exception as e:
+        print(f"Error in Windmill script: {str(e)}")
+        yield {"type": "summary", "success": False, "error": str(e), "error_type": type(e).__name__}
+        return
+    
+    if first_chunk_at is not None:
+        observe("upstream_body", (time.perf_counter() - first_chunk_at) * 1000)
+        observe("body_parse", parse_ms)
+    
+    content = "".join(parts)
+    if not content:
+        yield {"type": "summary", "success": False, "error": "No content in OpenAI response"}
+        return
+    
+    record_usage(model, usage)
+    yield {
+        "type": "summary",
+        "success": True,
+        "response": content,
+        "usage": {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0)
+        },
+        "model": response_model,
+        "finish_reason": finish_reason
+    }
+
+
+def _replay_stream(result: dict) -> Iterator[dict]:
+    """Present an already-complete response (cache hit or error) as a stream"""
+    if result.get("success"):
+        yield {"type": "delta", "content": result["response"]}
+    yield {"type": "summary", **result}
+
+
+# ============================================================================
+# HEDGED REQUESTS
+# ============================================================================
+# A caller that passes deadline_ms gets a latency budget instead of waiting
+# out REQUEST_TIMEOUT on one slow upstream call. If the first call hasn't
+# answered by the HEDGE_PERCENTILE of recently observed latency for its
+# model (or fails), a second call is sent, to the faster model in
+# HEDGE_MODELS when there is one. The first success wins and the other call
+# is cancelled: both are read as streams, so the loser's connection is
+# closed at its next chunk and upstream stops generating. If nothing
+# succeeds within the budget the response carries {"fallback": "static"}.
+
+HEDGE_MODELS = {                    # model -> model used for the hedged call
+    "gpt-4o": "gpt-4o-mini"
+}
+HEDGE_PERCENTILE = 0.9              # Hedge once the first call is slower than this share of calls
+HEDGE_MIN_SAMPLES = 20              # Below this, hedge after HEDGE_DEFAULT_DELAY
+HEDGE_DEFAULT_DELAY = 8.0           # Seconds
+HEDGE_MAX_BUDGET_SHARE = 0.5        # Always hedge by this share of the budget, leaving the hedge time to finish
+LATENCY_WINDOW = 200                # Recent successful calls kept per model
+HEDGE_MAX_WORKERS = 32
+
+_latencies = {}                     # model -> deque of recent successful call seconds
+_latencies_lock = threading.Lock()
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+_hedge_stats = {"requests": 0, "hedged": 0, "primary_wins": 0, "hedge_wins": 0, "cancelled": 0, "deadline_misses": 0}
+
+
+def record_latency(model: str, seconds: float) -> None:
+    with _latencies_lock:
+        window = _latencies.get(model)
+        if window is None:
+            window = _latencies[model] = deque(maxlen=LATENCY_WINDOW)
+        window.append(seconds)
+
+
+def latency_percentile(model: str, percentile: float) -> Optional[float]:
+    """Observed latency at `percentile` (0-1) for model, or None without enough samples"""
+    with _latencies_lock:
+        samples = sorted(_latencies.get(model, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+
+def _get_hedge_pool() -> ThreadPoolExecutor:
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+        return _hedge_pool
+
+
+def _cancellable_attempt(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    budget_end: float,
+    cancelled: threading.Event
+) -> dict:
+    """One upstream call under the model's limiter, abandoned once `cancelled` is set"""
+    limiter = get_limiter(model) if RATE_LIMIT_ENABLED else None
+    if limiter is not None:
+        refused = limiter.acquire(budget_end)
+        if refused:
+            return _fallback_response(limiter, model, refused)
+    
+    started = time.monotonic()
+    result = {"success": False, "error": "Cancelled after another call won", "cancelled": True}
+    events = stream_completion(rapid_openai, messages, model, max_tokens, temperature)
+    try:
+        for event in events:
+            if cancelled.is_set():
+                bump(_hedge_stats, "cancelled")
+                break
+            if event["type"] == "summary":
+                result = {k: v for k, v in event.items() if k != "type"}
+    finally:
+        # Closing the generator closes the upstream connection
+        events.close()
+        if limiter is not None:
+            limiter.release("neutral" if result.get("cancelled") else _classify(result), result.get("retry_after"))
+    
+    if result.get("success"):
+        record_latency(model, time.monotonic() - started)
+    return result
+
+
+def call_hedged(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    deadline_ms: float
+) -> dict:
+    """call_upstream with a latency budget: hedge slow or failed calls, first success wins"""
+    started = time.monotonic()
+    budget = deadline_ms / 1000
+    budget_end = started + budget
+    hedge_model = HEDGE_MODELS.get(model, model)
+    observed = latency_percentile(model, HEDGE_PERCENTILE)
+    hedge_after = min(HEDGE_DEFAULT_DELAY if observed is None else observed, budget * HEDGE_MAX_BUDGET_SHARE)
+    bump(_hedge_stats, "requests")
+    
+    cancelled = threading.Event()
+    pool = _get_hedge_pool()
+    attempt = (current_trace(), _cancellable_attempt, rapid_openai, messages)
+    paths = {pool.submit(run_in_trace, *attempt, model, max_tokens, temperature, budget_end, cancelled): ("primary", model)}
+    pending = set(paths)
+    winner = None
+    last = None
+    hedged = False
+    
+    while pending and winner is None:
+        now = time.monotonic()
+        # Until the hedge is sent, wake up at the hedge point as well
+        wake = budget_end if hedged else min(budget_end, started + hedge_after)
+        done, pending = wait(pending, timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            if result.get("success"):
+                winner = future
+                break
+            last = result
+        if winner is None and not hedged and time.monotonic() < budget_end and (
+            time.monotonic() >= started + hedge_after or not pending
+        ):
+            hedged = True
+            bump(_hedge_stats, "hedged")
+            print(f"Hedging {model} with {hedge_model} after {(time.monotonic() - started) * 1000:.0f} ms")
+            future = pool.submit(run_in_trace, *attempt, hedge_model, max_tokens, temperature, budget_end, cancelled)
+            paths[future] = ("hedge", hedge_model)
+            pending.add(future)
+        elif time.monotonic() >= budget_end:
+            break
+    
+    # Cancel whatever is still running; it finishes in the background
+    cancelled.set()
+    elapsed_ms = round((time.monotonic() - started) * 1000, 1)
+    
+    if winner is None:
+        bump(_hedge_stats, "deadline_misses")
+        response = {
+            **(last or {}),
+            "success": False,
+            "error": (last or {}).get("error") if not pending else f"No response within the {deadline_ms:g} ms budget",
+            "fallback": "static"
+        }
+        response["hedge"] = {"path": None, "model": None, "hedged": hedged, "elapsed_ms": elapsed_ms}
+        return response
+    
+    path, winning_model = paths[winner]
+    bump(_hedge_stats, f"{path}_wins")
+    return {
+        **winner.result(),
+        "hedge": {"path": path, "model": winning_model, "hedged": hedged, "elapsed_ms": elapsed_ms}
+    }
+
+
+def hedge_stats() -> dict:
+    """Hedging counters and observed latency percentiles for this worker"""
+    with _latencies_lock:
+        models = list(_latencies)
+    latency_ms = {}
+    for model in models:
+        points = {f"p{round(p * 100)}": latency_percentile(model, p) for p in (0.5, HEDGE_PERCENTILE, 0.99)}
+        latency_ms[model] = {name: round(value * 1000, 1) for name, value in points.items() if value is not None}
+    return {**read_counters(_hedge_stats), "latency_ms": latency_ms}
+
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+# Respondents with the same profile send byte-identical prompts, so completed
+# responses are cached by a canonical hash of the request. Tier 1 is an
+# in-process LRU (warm workers only); tier 2 is a SQLite file on the worker's
+# disk that survives process restarts.
+
+CACHE_ENABLED = True
+CACHE_TTL = 7 * 24 * 3600           # Seconds a cached response stays valid
+CACHE_MAX_ENTRIES = 256             # In-memory LRU size
+CACHE_DB_PATH = "/tmp/openai_proxy_cache.sqlite"
+CACHE_DB_MAX_ENTRIES = 5000         # Oldest rows are evicted beyond this
+
+_memory_cache = OrderedDict()       # key -> (stored_at, upstream_seconds, response)
+_cache_lock = threading.Lock()
+_cache_db = None
+_cache_stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0, "latency_saved_ms": 0.0}
+
+
+def cache_key(
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    validated: bool = False
+) -> str:
+    """Canonical SHA-256 of everything that determines the completion"""
+    fields = {
+        "model": model,
+        "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+        "temperature": float(temperature),
+        "max_tokens": int(max_tokens)
+    }
+    if validated:
+        # Kept apart from unchecked responses to the same messages
+        fields["validated"] = True
+    canonical = json.dumps(
+        fields,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _get_cache_db():
+    """Open (once per worker) the SQLite tier, or None if the disk is unavailable"""
+    global _cache_db
+    if _cache_db is None:
+        try:
+            _cache_db = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False, isolation_level=None)
+            _cache_db.execute("PRAGMA journal_mode=WAL")
+            _cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, "
+                "upstream_seconds REAL NOT NULL, response TEXT NOT NULL)"
+            )
+            _cache_db.execute("CREATE INDEX IF NOT EXISTS idx_stored_at ON responses(stored_at)")
+        except sqlite3.Error as e:
+            print(f"Disk cache unavailable, using memory tier only: {str(e)}")
+            _cache_db = False
+    return _cache_db or None
+
+
+def cache_get(key: str) -> Optional[tuple]:
+    """Look a key up in memory, then on disk. Returns (tier, upstream_seconds, response) or None"""
+    now = time.time()
+    with _cache_lock:
+        entry = _memory_cache.get(key)
+        if entry is not None:
+            stored_at, upstream_seconds, response = entry
+            if now - stored_at <= CACHE_TTL:
+                _memory_cache.move_to_end(key)
+                return "memory", upstream_seconds, response
+            del _memory_cache[key]
+        
+        db = _get_cache_db()
+        if db is None:
+            return None
+        try:
+            row = db.execute(
+                "SELECT stored_at, upstream_seconds, response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Disk cache read failed: {str(e)}")
+            return None
+        if row is None or now - row[0] > CACHE_TTL:
+            return None
+        response = json.loads(row[2])
+        _memory_put(key, (row[0], row[1], response))
+        return "disk", row[1], response
+
+
+def _memory_put(key: str, entry: tuple) -> None:
+    _memory_cache[key] = entry
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > CACHE_MAX_ENTRIES:
+        _memory_cache.popitem(last=False)
+
+
+def cache_put(key: str, upstream_seconds: float, response: dict) -> None:
+    """Store a successful response in both tiers"""
+    now = time.time()
+    with _cache_lock:
+        _memory_put(key, (now, upstream_seconds, response))
+        db = _get_cache_db()
+        if db is None:
+            return
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, stored_at, upstream_seconds, response) VALUES (?, ?, ?, ?)",
+                (key, now, upstream_seconds, json.dumps(response))
+            )
+            db.execute(
+                "DELETE FROM responses WHERE stored_at < ? OR key IN ("
+                "SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (now - CACHE_TTL, CACHE_DB_MAX_ENTRIES)
+            )
+        except sqlite3.Error as e:
+            print(f"Disk cache write failed: {str(e)}")
+
+
+def cache_stats() -> dict:
+    """Snapshot of cache counters for this worker"""
+    return read_counters(_cache_stats)
+
+
+def _validate_messages(messages: List[Dict[str, str]]) -> Optional[dict]:
+    """Return an error response if the messages array is malformed, else None"""
+    if not messages or len(messages) == 0:
+        return {
+            "success": False,
+            "error": "Messages array is required and cannot be empty"
+        }
+    
+    # Validate each message
+    for msg in messages:
+        if "role" not in msg or "content" not in msg:
+            return {
+                "success": False,
+                "error": "Each message must have 'role' and 'content' keys"
+            }
+        if msg["role"] not in ["system", "user", "assistant"]:
+            return {
+                "success": False,
+                "error": "Message role must be 'system', 'user', or 'assistant'"
+            }
+    return None
+
+
+def _stream_and_cache(
+    rapid_openai: dict,
+    messages: List[Dict[str, str]],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    key: Optional[str]
+) -> Iterator[dict]:
+    """
+    Stream upstream events, caching the assembled response once it completes
+    
+    The stream holds a limiter slot like call_upstream, but is not retried:
+    deltas may already have reached the caller when a failure shows up.
+    """
+    limiter = get_limiter(model) if RATE_LIMIT_ENABLED else None
+    if limiter is not None:
+        refused = limiter.acquire(time.monotonic() + UPSTREAM_RETRY_BUDGET)
+        if refused:
+            yield {"type": "summary", **_fallback_response(limiter, model, refused)}
+            return
+    
+    started = time.monotonic()
+    try:
+        for event in stream_completion(rapid_openai, messages, model, max_tokens, temperature):
+            if event["type"] == "summary":
+                result = {k: v for k, v in event.items() if k != "type"}
+                outcome = _classify(result)
+                if limiter is not None:
+                    limiter.release(outcome, result.get("retry_after"))
+                    limiter = None
+                    if outcome in ("throttled", "failure"):
+                        event = {**event, "fallback": "static"}
+                if key is not None:
+                    bump(_cache_stats, "misses")
+                    if result.get("success"):
+                        cache_put(key, time.monotonic() - started, result)
+                    event = {**event, "cache": {"hit": False, "tier": None, **cache_stats()}}
+            yield event
+    finally:
+        # The consumer stopped reading before the summary
+        if limiter is not None:
+            limiter.release("neutral")
+
+
+# ============================================================================
+# REQUEST COALESCING
+# ============================================================================
+# When a shared link goes round a team, respondents with the same profile
+# send byte-identical requests within seconds of each other, before the
+# first response can reach the cache. Concurrent calls with the same key
+# wait on a single upstream call (the "leader") and all get its result,
+# errors included. Streaming calls are not coalesced. A call with
+# deadline_ms only joins leaders with the same budget (it is part of the
+# flight key) and never waits longer than that budget.
+
+COALESCE_ENABLED = True
+COALESCE_WAIT_TIMEOUT = 90          # Seconds a follower waits on the leader's call
+
+_flights = {}                       # key -> _Flight for calls currently upstream
+_flights_lock = threading.Lock()
+_coalesce_stats = {"leaders": 0, "followers": 0, "timeouts": 0}
+
+
+class _Flight:
+    """One in-flight upstream call that identical requests can wait on"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+def coalesce(key: str, fetch, wait_timeout: Optional[float] = None) -> tuple:
+    """
+    Run fetch() once per key across concurrent callers
+    
+    Returns (result, shared) where shared is True for callers that waited on
+    another caller's fetch. A follower that waits longer than
+    COALESCE_WAIT_TIMEOUT (or its own wait_timeout, if shorter) gets an
+    error instead of blocking indefinitely; past its own wait_timeout that
+    error carries {"fallback": "static"}, like a missed deadline.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+            _coalesce_stats["leaders"] += 1
+        else:
+            _coalesce_stats["followers"] += 1
+    
+    if leader:
+        try:
+            flight.result = fetch()
+        except Exception as e:
+            print(f"Coalesced request failed: {str(e)}")
+            flight.result = {"success": False, "error": str(e), "error_type": type(e).__name__}
+        finally:
+            with _flights_lock:
+                del _flights[key]
+            flight.done.set()
+        return flight.result, False
+    
+    budgeted = wait_timeout is not None and wait_timeout < COALESCE_WAIT_TIMEOUT
+    with span("coalesce_wait"):
+        finished = flight.done.wait(wait_timeout if budgeted else COALESCE_WAIT_TIMEOUT)
+    if not finished:
+        with _flights_lock:
+            _coalesce_stats["timeouts"] += 1
+        if budgeted:
+            return {
+                "success": False,
+                "error": f"No response within the {wait_timeout * 1000:g} ms budget "
+                         "waiting for an identical in-flight request",
+                "fallback": "static"
+            }, True
+        return {
+            "success": False,
+            "error": f"Timed out after {COALESCE_WAIT_TIMEOUT} seconds waiting for an identical in-flight request"
+        }, True
+    return flight.result, True
+
+
+def coalesce_stats() -> dict:
+    """Coalescing counters for this worker; ratio is the share of calls that didn't go upstream"""
+    with _flights_lock:
+        stats = dict(_coalesce_stats)
+    total = stats["leaders"] + stats["followers"]
+    stats["ratio"] = round(stats["followers"] / total, 4) if total else 0.0
+    return stats
+
+
+# ============================================================================
+# PROMPT TEMPLATES
+# ============================================================================
+# The browser can send a compact payload (category, scores, nuance, profile
+# and the selected option values) instead of fully built messages, and the
+# prompt is rendered here. The system prompt is a module constant, so every
+# call starts with the same byte-identical prefix and upstream prompt caching
+# applies to it. Templates are versioned: a change to the wording adds a new
+# version instead of editing one that deployed clients may still request.
+#
+# Rendering must stay byte-identical to buildSingleRecommendationMessages in
+# app.js (checked by bench/prompt_templates.py), which remains the fallback
+# when the client sends full messages.
+
+PROMPT_TEMPLATE_VERSION = "v1"
+
+TRACK_NAMES = {
+    "S": "Specialist (Individual Contributor)",
+    "P": "Professional (Individual Contributor)",
+    "M": "Management",
+    "E": "Executive"
+}
+
+AI_FREQUENCY_DESCRIPTIONS = {
+    "never": "Has never used AI tools — complete beginner. Recommendations should start from absolute zero with no assumed knowledge.",
+    "rarely": "Has tried AI tools a few times but no regular habit. Knows the basics but needs guidance building consistency.",
+    "monthly": "Uses AI tools a few times a month — familiar but not fluent. Ready for deeper techniques and workflow integration.",
+    "weekly": "Regular AI user (weekly). Has working knowledge — push toward advanced techniques, efficiency gains, and repeatable workflows.",
+    "daily": "Daily AI user — AI is already part of their workflow. Do NOT teach basics. Focus on optimization, scaling practices, and pushing boundaries."
+}
+
+KNOWN_PLATFORM_TOOLS = ["Gemini", "NotebookLM", "ChatGPT", "GitHub Copilot", "Claude Code", "ZoomAI", "LoomAI"]
+
+# (question id, category, subcategory, {option value: (label, description)}),
+# mirroring dummyQuestions in app.js
+RECOMMENDATION_QUESTIONS = [
+    ("q1", "Delegation", "Platform Awareness", {
+        1: ("Not Started", "I use the most convenient tool available to me at that moment."),
+        2: ("Compliant", "I only use AI tools approved by my organization at work, and whatever I want at home"),
+        3: ("Competent", "I change the model in the Gemini WebApp (ie. Fast, Thinking, Pro) based on the complexity of the task I'm working on."),
+        4: ("Creative", "I use different AI models and services (ie. Gemini, Claude, ChatGPT) based on their individual strengths and weaknesses")
+    }),
+    ("q2", "Delegation", "Task decomposition", {
+        1: ("Not Started", "I ask the AI to handle the entire project or large, complex task in a single prompt"),
+        2: ("Compliant", "I break the project down into smaller, logical steps before I start prompting"),
+        3: ("Competent", "I collaborate with AI to outline the necessary steps for a project before asking it to execute on any of them"),
+        4: ("Creative", "I use a chain-of-thought approach, where I have the AI solve one piece of the puzzle and then revise and use that to inform the next output and prompt")
+    }),
+    ("q4", "Communication", "Steering AI systems", {
+        1: ("Not Started", "I focus on getting a quick draft that I can manually edit, fix or finish"),
+        2: ("Compliant", "I specify the exact format, length, or tone I expect the final result to have"),
+        3: ("Competent", "I provide one or more examples of what good looks like (ie. one/few-shot prompting)"),
+        4: ("Creative", "I steer the model's behavior and output with both positive and negative examples of the desired output")
+    }),
+    ("q5", "Communication", "Process Clarity", {
+        1: ("Not Started", "I treat the AI as a \"black box,\" focusing only on the final answer"),
+        2: ("Compliant", "I ask the AI to explain its logic to ensure I can audit its reasoning after the fact."),
+        3: ("Competent", "I instruct the AI to pause and ask me clarifying questions before it starts generating a long response."),
+        4: ("Creative", "I ask the AI to provide multiple different versions or drafts so I can evaluate which process or path is most effective.")
+    }),
+    ("q6", "Communication", "Performance Expectations", {
+        1: ("Not Started", "I assume the AI will get the answer right on the first try"),
+        2: ("Compliant", "I budget time for a manual human review to catch hallucinations or formatting errors."),
+        3: ("Competent", "I set \"success criteria\" for the AI, asking it to verify its own work against my specific requirements before finishing."),
+        4: ("Creative", "I anticipate where the AI might struggle (e.g., complex math or niche data) and proactively consider how I might mitigate those risks.")
+    }),
+    ("q7", "Communication", "Context Aggregation", {
+        1: ("Not Started", "I copy and paste small snippets of information as I think of them."),
+        2: ("Compliant", "I upload or paste relevant documents, spreadsheets, images or PDFs with a prompt when helpful."),
+        3: ("Competent", "I curate and distill the information first, removing \"noise\" so the AI focuses only on the most high-value data points."),
+        4: ("Creative", "I create knowledge libraries that connect the AI to multiple vetted data sources for a more holistic view.")
+    }),
+    ("q8", "Discernment", "Domain/Craft Expertise", {
+        1: ("Not Started", "I accept the output as a finished product if it sounds professional and grammatically correct."),
+        2: ("Compliant", "I check the output against my initial prompt to ensure all my specific requirements were met."),
+        3: ("Competent", "I manually edit AI outputs using my domain expertise — checking for accuracy, fixing nuances the AI missed, and making sure it meets industry or brand standards."),
+        4: ("Creative", "I run AI outputs through multiple rounds of refinement — feeding it back into AI with targeted follow-up prompts to stress-test, challenge assumptions, and push quality beyond what either of us would produce alone.")
+    }),
+    ("q9", "Discernment", "Coaching for Improvement", {
+        1: ("Not Started", "I usually give up or start a new chat if the first response isn't what I wanted."),
+        2: ("Compliant", "I tell the AI what I didn't like (e.g., \"This is too long\") and ask it to try again."),
+        3: ("Competent", "I provide \"constructive criticism\" by explaining exactly what was wrong and how to fix it (e.g., \"The tone is too formal; make it more conversational\")."),
+        4: ("Creative", "I treat the interaction as a coaching session, explaining the underlying principles of the task so the AI adapts to handle similar tasks better for the rest of the conversation (note: Gemini conversation history is kept for 60 days, then deleted).")
+    }),
+    ("q10", "Keeping It Twilio", "Data Stewardship", {
+        1: ("Not Started", "I use free or freemium AI tools (like the free version of ChatGPT) with any data I have on hand to get the job done quickly."),
+        2: ("Compliant", "I only use Non-Approved (free) AI tools with Public Data (e.g., published blogs, press releases, or SEC filings) and ensure all other work stays within Twilio-Approved platforms via Okta SSO."),
+        3: ("Competent", "I distinguish between Confidential and Restricted data, ensuring that I only input sensitive information (like customer content, PII, or internal roadmaps) into Approved GenAI products after verifying the required Privacy Impact Assessments are complete."),
+        4: ("Creative", "I proactively protect Twilio's IP by ensuring Input Data is not used for training third-party models, and I help my team navigate the ServiceNow approval process for complex new use cases involving sensitive or \"Restricted\" data.")
+    }),
+    ("q11", "Keeping It Twilio", "Bias & Fairness Awareness", {
+        1: ("Not Started", "I assume the AI is a neutral tool and that its outputs are naturally objective."),
+        2: ("Compliant", "I scan outputs for obvious stereotypes or exclusionary language before using the content."),
+        3: ("Competent", "I proactively ask the AI to consider multiple perspectives or check for bias during the prompting process."),
+        4: ("Creative", "I bring a level of awareness of bias that is inherent to AI and use direct, specific prompts to introduce diversity and inclusion where needed and necessary")
+    }),
+    ("q12", "Keeping It Twilio", "AI Literacy", {
+        1: ("Not Started", "I treat the AI as a search engine or a database that knows more than I do and retrieves them."),
+        2: ("Compliant", "I understand that AI uses inference to predict the next likely word"),
+        3: ("Competent", "I am aware of the specific training data cutoff dates and the technical architecture (e.g., context window limits) of the models I use."),
+        4: ("Creative", "I stay up to date with the underlying mechanics of new model releases to strategically choose the right engine for the right job")
+    })
+]
+
+JOB_LEVEL_EXPECTATIONS = {
+    "S1": "Learns job skills, follows instructions closely, works on simple tasks",
+    "S2": "Uses learned job skills, begins learning complex skills, works on routine tasks",
+    "S3": "Works independently with competence, handles moderately difficult tasks requiring judgment",
+    "S4": "Skilled specialist who works independently and assists others, good judgment and innovation",
+    "S5": "Highly skilled specialist who improves processes, advises others, works on interdisciplinary projects",
+    "P1": "Learning basic job skills as part of a team, completing discrete tasks",
+    "P2": "Has basic knowledge and growing skills, addresses moderately challenging but routine problems",
+    "P3": "Has solid, fully developed skills, uses evaluation and analysis to solve problems and improve processes",
+    "P4": "Advanced skill proficiency with deep subject matter expertise, solves complex problems, often mentors others",
+    "P5": "Recognized expert with deep specialization, solves unique or ambiguous challenges, acts as internal consultant",
+    "P6": "Visionary technical leader whose expertise drives significant advancements, influences programs and organizational direction",
+    "P7": "Applies deep technical expertise in current and emerging technologies, oversees engineering research and advanced projects",
+    "M2": "Leads with clear objectives, solves routine problems, supervises skilled individual contributors or teams",
+    "M3": "Makes decisions about resources and goals, solves wide range of problems, manages multiple teams",
+    "M4": "Sets goals for larger areas, handles difficult and ambiguous problems, oversees multiple disciplines or departments",
+    "M5": "Collaborates with senior leaders to define strategy, navigates undefined problems, influences long-term results",
+    "M6": "Creates vision and strategy affecting significant portion of company, influences board-level decisions",
+    "E7": "Expert in business area and industry, leads complex cross-functional efforts, translates strategy into 2-5 year plans",
+    "E8": "Demonstrates expert knowledge, influences industry trends, drives innovation, leads area/sub-function or business line"
+}
+
+
+class PromptTemplateError(ValueError):
+    """The compact prompt payload cannot be rendered"""
+
+
+def _js_str(value: Any) -> str:
+    """Format a value the way a JS template literal would"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _to_fixed(value: float, digits: int = 2) -> str:
+    """Number.prototype.toFixed: round the exact binary value, ties away from zero"""
+    exact = Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+    return f"{exact:.{digits}f}"
+
+
+def _loose_equal(a: Any, b: Any) -> bool:
+    """The `==` used to match answer values to options (1 == "1")"""
+    try:
+        return float(a) == float(b)
+    except (TypeError, ValueError):
+        return a == b
+
+
+def _level_number(job_level: str) -> float:
+    """parseInt(jobLevel.substring(1)), NaN when there is no number"""
+    match = re.match(r"\s*([+-]?\d+)", job_level[1:])
+    return float(match.group(1)) if match else float("nan")
+
+
+def _render_profile(profile: dict) -> str:
+    job_title = profile.get("jobTitle", "")
+    team = profile.get("team", "")
+    job_level = profile.get("jobLevel", "")
+    sub_department = profile.get("subDepartment", "")
+    ai_frequency = profile.get("aiFrequency", "")
+    ai_tools_used = profile.get("aiToolsUsed") or []
+    work_focus = profile.get("workFocus", "")
+    
+    # Seniority tier and career track
+    level_prefix = job_level[:1]
+    level_num = _level_number(job_level)
+    track_name = TRACK_NAMES.get(level_prefix, "Unknown")
+    if level_prefix == "E" or (level_prefix == "M" and level_num >= 5):
+        seniority_tier = "Senior Leadership"
+    elif level_prefix == "M" or level_num >= 4:
+        seniority_tier = "Senior / Leadership"
+    elif level_num >= 3:
+        seniority_tier = "Mid-Level"
+    else:
+        seniority_tier = "Early Career"
+    can_procure = level_prefix in ("M", "E") or level_num >= 4
+    manages_others = level_prefix in ("M", "E")
+    
+    ai_experience = AI_FREQUENCY_DESCRIPTIONS.get(ai_frequency, "Unknown AI experience level")
+    
+    if "None" in ai_tools_used or len(ai_tools_used) == 0:
+        tools_context = "Has not used any AI tools yet. Introduce tools gently — recommend starting with ONE tool (Gemini) rather than overwhelming with multiple."
+    else:
+        platform_tools = [t for t in ai_tools_used if t in KNOWN_PLATFORM_TOOLS]
+        custom_tools = [t for t in ai_tools_used if t not in KNOWN_PLATFORM_TOOLS and t != "None"]
+        tools_list = ", ".join(platform_tools)
+        if custom_tools:
+            tools_list += (", " if tools_list else "") + ", ".join(custom_tools) + " (user-specified tools — provide tips for these if you can identify what they are)"
+        tools_context = f"Already uses: {tools_list}. For tools they already know, suggest ADVANCED features or new use patterns. For tools they HAVEN'T tried, introduce them. For any user-specified tools you recognize, provide a relevant tip."
+    
+    team_arrow = f"{team} → {sub_department}" if sub_department else team
+    team_paren = f"{team} ({sub_department})" if sub_department else team
+    team_quoted = f'"{team}" ({sub_department})' if sub_department else f'"{team}"'
+    
+    if ai_frequency in ("never", "rarely"):
+        experience_calibration = "they are NEW to AI — be concrete and encouraging, assume nothing"
+    elif ai_frequency == "daily":
+        experience_calibration = "they are a POWER USER — skip basics entirely, push for advanced techniques and systematization"
+    else:
+        experience_calibration = "they have moderate AI experience — balance practical tips with deeper techniques"
+    
+    if seniority_tier == "Early Career":
+        ambition = "focus on building foundational habits and learning from examples"
+    elif seniority_tier == "Mid-Level":
+        ambition = "focus on deepening skills, building repeatable workflows, and sharing knowledge with peers"
+    else:
+        ambition = "focus on strategic leverage, scaling AI practices across teams, and setting standards for others"
+    
+    if level_prefix == "E" or (level_prefix == "M" and level_num >= 5):
+        language = "strategic, outcome-oriented, focused on organizational impact"
+    elif level_prefix == "M":
+        language = "team-oriented, focused on enabling others and improving team workflows"
+    else:
+        language = "hands-on, practical, focused on personal craft and immediate productivity gains"
+    
+    if work_focus:
+        focus_guidance = f'Their PRIMARY work is: "{work_focus}" — make this the backbone of every example and Quick Win'
+    else:
+        focus_guidance = "No specific work focus provided — use their job title and department to infer realistic deliverables"
+    
+    prompt = "Generate ONE detailed, deeply personalized recommendation for this specific Twilio employee.\n\n"
+    prompt += "**EMPLOYEE PROFILE — USE THIS TO PERSONALIZE EVERY ASPECT OF YOUR RESPONSE:**\n"
+    prompt += f"- Job Title: {job_title}\n"
+    prompt += f"- Team / Department: {team_arrow}\n"
+    prompt += f"- Job Level: {job_level} ({track_name} track)\n"
+    prompt += f"- Seniority: {seniority_tier}\n"
+    prompt += f"- Level Expectations: {JOB_LEVEL_EXPECTATIONS.get(job_level, 'Role expectations vary')}\n"
+    prompt += f"- Can procure tools: {'Yes' if can_procure else 'No — direct to Switchboard for approved tools'}\n"
+    prompt += f"- Manages others: {'Yes — consider how they can model AI use and enable their teams' if manages_others else 'No — focus on personal productivity and craft excellence'}\n"
+    prompt += f"- AI Experience: {ai_experience}\n"
+    prompt += f"- AI Tools Already Used: {tools_context}\n"
+    if work_focus:
+        prompt += f'- Primary Work Focus: "{work_focus}" — THIS IS THE MOST IMPORTANT PERSONALIZATION SIGNAL. Ground ALL examples and deliverables in this specific work, not generic department tasks.\n'
+    prompt += "\n"
+    prompt += "**HOW TO USE THIS PROFILE:**\n"
+    prompt += f"- Frame ALL examples around what a {job_title} in {team_paren} would actually work on day-to-day\n"
+    prompt += f"- {focus_guidance}\n"
+    prompt += f"- Calibrate to their AI experience level: {experience_calibration}\n"
+    prompt += f"- Calibrate ambition to their seniority: {ambition}\n"
+    prompt += f"- Use language appropriate to their level: {language}\n"
+    prompt += f"- In Tips for Using AI Tools: Follow the TOOL SELECTION DECISION TREE in your system prompt. The employee's team is {team_quoted} — only recommend role-specific tools if their team qualifies.\n"
+    prompt += "- If they already use certain tools (see above), suggest advanced features of those tools, not basic introductions.\n"
+    prompt += f"- Quick Wins should be things a {job_title} would realistically do THIS WEEK in their actual work\n\n"
+    return prompt
+
+
+def render_recommendation_v1(payload: dict) -> List[Dict[str, str]]:
+    """
+    Render one category's recommendation messages from a compact payload
+    
+    Payload shape (as sent by buildRecommendationPayload in app.js):
+        category: Category name
+        profile: jobTitle, team, subDepartment, jobLevel, aiFrequency,
+            aiToolsUsed, workFocus
+        scores: score, maturity, hasNotStarted, categoryMaturities
+        nuance: multiSelectCount, totalQuestions
+        responses: {question id: [selected values]} for this category
+    
+    Raises PromptTemplateError when the payload is malformed or none of the
+    responses match an option (the client then uses its static fallback).
+    """
+    try:
+        category = payload["category"]
+        profile = payload["profile"]
+        scores = payload["scores"]
+        nuance = payload.get("nuance") or {}
+        responses = payload.get("responses") or {}
+        
+        prompt = _render_profile(profile)
+        
+        if scores.get("hasNotStarted"):
+            not_started = [c for c, m in (scores.get("categoryMaturities") or {}).items() if m == "Not Started"]
+            prompt += "**IMPORTANT CONTEXT:**\n"
+            prompt += f"This user has \"Not Started\" in {'multiple categories' if len(not_started) > 1 else 'at least one category'} ({', '.join(not_started)}), which means their overall score is capped at \"Not Started\" regardless of their other scores. "
+            prompt += "This is because all four dimensions are essential - excelling in some areas doesn't compensate for not having started in others.\n\n"
+            prompt += "**YOUR TONE:**\n"
+            prompt += "- Be encouraging and constructive, not alarming or judgmental\n"
+            prompt += "- Frame this as a learning opportunity and a clear starting point\n"
+            prompt += "- Acknowledge that everyone starts somewhere, and \"Not Started\" simply means there's room to grow\n"
+            prompt += "- Briefly mention that getting started in ALL dimensions is important for AI readiness\n"
+            prompt += "- Focus on actionable first steps rather than dwelling on the gap\n\n"
+        
+        prompt += f"**Category to focus on: {category}**\n\n"
+        prompt += "**Their Overall Score:**\n"
+        prompt += f"- {category}: {scores['maturity']} ({_to_fixed(float(scores['score']))}/4.00)\n\n"
+        
+        if nuance.get("multiSelectCount", 0) > 0:
+            prompt += "**CONTEXTUAL AWARENESS:**\n"
+            prompt += f"This user selected multiple options on {_js_str(nuance['multiSelectCount'])} out of {_js_str(nuance.get('totalQuestions'))} questions in {category}. "
+            prompt += "This indicates they vary their approach based on context - a sign of sophisticated judgment. "
+            prompt += "DO NOT push them toward \"always use the most advanced approach.\" Instead, help them expand their toolkit while honoring that different situations call for different levels of AI use.\n\n"
+        
+        prompt += f"**THEIR ACTUAL RESPONSES in {category} - USE THESE TO GROUND YOUR FEEDBACK:**\n"
+        has_responses = False
+        for question_id, question_category, subcategory, options in RECOMMENDATION_QUESTIONS:
+            if question_category != category:
+                continue
+            answers = responses.get(question_id) or []
+            if len(answers) == 0:
+                continue
+            prompt += f"\n**{subcategory}:**\n"
+            selected = []
+            for value in answers:
+                option = next((o for v, o in options.items() if _loose_equal(v, value)), None)
+                if option is not None:
+                    selected.append((value, option))
+            if not selected:
+                continue
+            has_responses = True
+            if len(answers) > 1:
+                prompt += f"Selected ({len(selected)}) - CONTEXTUAL: they vary their approach:\n"
+            else:
+                prompt += f"Selected ({len(selected)}):\n"
+            for value, (label, description) in selected:
+                prompt += f"- {label} ({_js_str(value)}/4): \"{description}\"\n"
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise PromptTemplateError(f"Malformed prompt payload: {type(e).__name__}: {str(e)}")
+    
+    if not has_responses:
+        raise PromptTemplateError(f"No responses in the prompt payload match a question option for {category}")
+    
+    prompt += "\n\n**CRITICAL INSTRUCTIONS:**\n"
+    prompt += "1. DIRECTLY REFERENCE their actual selected behaviors above - don't be generic\n"
+    prompt += "2. If they scored 1-2 on something, call out THAT SPECIFIC behavior they described and how to improve it\n"
+    prompt += "3. If they scored 3-4 on something, weave acknowledgment INTO your advice — never as a standalone warm-up paragraph. Maximum ONE sentence.\n"
+    prompt += "4. Make it feel like you read their actual responses, not a template\n"
+    prompt += "5. Be specific about which behaviors to START, STOP, or CONTINUE based on what they selected\n"
+    prompt += "6. **RIGHT-SIZED AI USE**: If they showed contextual judgment (multiple selections), recognize this as sophisticated. Frame recommendations as \"expand your toolkit\" not \"always do X.\" Emphasize matching AI intensity to task complexity.\n"
+    prompt += "7. **AVOID ONE-SIZE-FITS-ALL**: Don't imply they should always use the most advanced approach. Help them recognize when to use different levels of AI engagement.\n"
+    prompt += "8. **NAME SPECIFIC DELIVERABLES**: Reference actual artifacts for their role — say \"competitive battle card\" not \"marketing content\", say \"incident postmortem\" not \"documentation\", say \"QBR deck\" not \"customer presentation\". Ground every example in what they literally produce.\n"
+    prompt += "9. **LEAD WITH INSIGHT, NOT VALIDATION**: Open every section with the actionable growth point. Do NOT open with \"You're already doing great\" or \"It's clear that you...\". Start with what to DO differently. Weave any strength acknowledgment into the advice itself.\n"
+    prompt += "10. **DENSITY OVER WARMTH**: Every sentence must either (a) identify a specific gap, (b) provide a concrete action, or (c) connect to a measurable outcome. Cut filler phrases. Be direct and useful.\n\n"
+    prompt += "Use markdown formatting with the structure from your system prompt."
+    
+    return [
+        {"role": "system", "content": RECOMMENDATION_SYSTEM_PROMPT_V1},
+        {"role": "user", "content": prompt}
+    ]
+
+
+PROMPT_TEMPLATES = {
+    "v1": render_recommendation_v1
+}
+
+
+def render_prompt(payload: dict, version: str = PROMPT_TEMPLATE_VERSION) -> List[Dict[str, str]]:
+    """Render messages from a compact payload with the requested template version"""
+    renderer = PROMPT_TEMPLATES.get(version)
+    if renderer is None:
+        raise PromptTemplateError(
+            f"Unknown prompt template version '{version}' (available: {', '.join(PROMPT_TEMPLATES)})"
+        )
+    if not isinstance(payload, dict):
+        raise PromptTemplateError("Prompt payload must be an object")
+    return renderer(payload)
+
+
+# Static prefix shared by every recommendation call (mirrors systemMessage in app.js)
+RECOMMENDATION_SYSTEM_PROMPT_V1 = """You are an experienced AI literacy coach at Twilio helping employees improve their AI collaboration skills.
+
+VOICE AND TONE — THIS IS CRITICAL:
+You're writing for adult learners at a tech company. The moment your writing feels corporate, formal, or like a training manual, they disengage. Write like a smart, helpful colleague — not like a consultant or HR document.
+
+**THE GOLDEN RULE**: If you wouldn't say it out loud to a coworker, don't write it.
+
+**BANNED JARGON — never use these phrases:**
+- "task decomposition" → say "breaking work into smaller pieces"
+- "modular delegation technique" → say "splitting things up"
+- "micro-components" → say "smaller parts" or "chunks"
+- "comprehensive context" → say "enough background" or "the full picture"
+- "rigorous review process" → say "careful review" or "double-checking"
+- "implement" → say "try," "use," "start," or "do"
+- "utilize" → say "use" (THIS ONE IS CRITICAL — never write "utilize")
+- "leverage" → say "use" or just describe the action
+- "establish" → say "create," "set up," or "start"
+- "enhance" / "enhancing" → say "improve" or be specific about what gets better
+- "optimize" → say "improve" or be specific
+- "streamline" → say "simplify" or "speed up"
+- "facilitate" → just say what happens
+- "articulate" → say "explain" or "describe"
+- "comprehensive" → say "complete" or "full" (never "comprehensive")
+- "systematic" / "systematically" → say "consistent" or describe the actual system
+- "methodology" → say "approach" or "method"
+- "strategically" → usually delete this word entirely
+- "proactively" → usually delete this word entirely
+- "robust" → be specific about what makes it strong
+- "framework" → say "approach," "system," or describe what it actually is
+- "audit" (as a verb for reviewing) → say "review" or "check"
+- "ensure" / "ensuring" → say "make sure" or just remove it
+- "elevate" → say "improve" or just describe the outcome
+- "holistic" → say "full" or "complete" or just describe what it covers
+- "refined" / "refine" → say "improved" or "sharpen" or "tighten up"
+- "significantly" → delete this word — it adds nothing
+- "integrate" / "integrating" → say "combine" or "bring together" or "use alongside"
+- "align" / "aligning" → say "match" or "fit" or describe what matches what
+
+**HARD RULE — SELF-CHECK**: Before returning your response, scan it for EVERY word on this banned list. If ANY banned word appears, replace it. No exceptions. The user's audience will mentally check out the moment they see corporate language.
+
+**INSTEAD OF FORMAL, WRITE CONVERSATIONAL:**
+❌ "Your current approach to task decomposition shows a sophisticated understanding of varying AI engagement levels."
+✅ "You're already good at breaking work into pieces for AI — now let's make that even more effective."
+
+❌ "Implement a rigorous review process by establishing a checklist for evaluating each piece against your campaign's strategic goals."
+✅ "Create a quick checklist to review AI outputs before you use them — does it match your campaign goals? Does it sound like Twilio?"
+
+❌ "Enhance this by consistently framing your AI prompts with detailed background information."
+✅ "Give AI more context upfront — who's the audience? What's the goal? The more it knows, the better it writes."
+
+❌ "This will ensure consistent compliance across your GTM campaigns."
+✅ "This keeps your campaigns on track and avoids surprises."
+
+**TONE GUIDELINES:**
+- Write in second person ("you") — this is advice for THEM
+- Use contractions ("you're," "don't," "it's") — they sound human
+- Keep sentences short. Mix in some fragments. Like this.
+- Be direct without being cold. Helpful without being sycophantic.
+- It's okay to be a little casual, but stay professional. No slang, no emojis.
+- Imagine you're giving advice to a smart colleague over coffee, not presenting at a corporate training.
+
+**READ YOUR OUTPUT ALOUD**: If it sounds like a business document, rewrite it until it sounds like a person talking.
+
+TWILIO CONTEXT - Available AI Tools:
+- Google Gemini: Primary conversational AI tool. Features include multimodal input (text, images, PDFs), conversation history (kept for 60 days then deleted — save anything you want to keep), Gems (custom AI assistants you can create and share)
+- NotebookLM: AI research assistant that grounds responses in uploaded documents. Great for analyzing multiple sources and creating study guides
+- ZoomAI: Meeting assistant integrated into Zoom. Captures meeting summaries, action items, and key highlights. Only mention when relevant to meetings/collaboration
+- LoomAI: Video message assistant. Auto-generates titles, chapters, summaries, and tasks from Loom videos. Only mention when relevant to async video communication
+- OpenAI API: Available for developers (not the webapp) to build custom solutions
+- Switchboard: Twilio's internal intranet - THE go-to resource for AI policies, privacy guidelines, approved tools, and best practices
+
+LLM REALITIES — WEAVE THESE IN WHEN RELEVANT (not on every recommendation — only when your advice touches a risk area):
+These are practical heads-ups, not scary disclaimers. Drop them in naturally like a colleague would.
+
+**Hallucination risk** — When your advice involves using AI for fact-heavy, data-dependent, or research tasks:
+- Work in a phrase like: "Double-check any numbers, dates, or citations AI gives you — it can sound confident and still be completely wrong."
+- Especially flag this for: financial data, customer-facing content, legal/compliance, technical specs, competitive intel
+- Tone: matter-of-fact, not alarming. It's just how LLMs work.
+
+**Context window degradation** — When your advice involves long conversations, large documents, or multi-step workflows:
+- Work in something like: "If your conversation gets really long, AI starts losing track of what you said earlier. Start a fresh chat when you switch topics, and re-paste the key context."
+- Also relevant when recommending conversation history: "Gemini keeps your conversations for 60 days — after that they're gone. Save anything you want to keep."
+
+**Lost-in-the-middle problem** — When your advice involves pasting large reference material, long briefs, or multi-source analysis:
+- Work in something like: "Put the most important info at the top and bottom of your prompt — AI pays less attention to stuff buried in the middle of long inputs."
+- Especially relevant for: document analysis, long prompts with multiple requirements, multi-source research
+
+**IMPORTANT**: Don't add ALL of these to every recommendation. Only include the one(s) that genuinely apply to the specific advice you're giving. If none apply, skip this entirely. These should feel like natural tips woven into your advice, NOT a separate "warnings" section.
+
+CRITICAL - Accuracy Requirements:
+- ONLY recommend features that actually exist in these tools - do NOT invent capabilities
+- If you're uncertain whether a feature exists, use general guidance instead of specific feature names
+- Only mention ZoomAI/LoomAI when authentically relevant to the user's role (e.g., lots of meetings, video creation)
+- If the employee CANNOT procure tools, direct them to Switchboard rather than suggesting new tools
+- If the employee CAN procure tools, suggest evaluation criteria but avoid recommending specific external platforms
+
+SWITCHBOARD REFERENCES:
+- When discussing AI usage policies → "Check Switchboard for Twilio's AI usage guidelines"
+- When discussing data privacy/security → "Visit Switchboard for data privacy and security policies"
+- When discussing approved tools → "Explore Switchboard's AI Hub to discover approved tools"
+- When discussing best practices → "Find best practices and templates on Switchboard"
+- ALWAYS mention Switchboard when users need official policies, guidelines, or approved resources
+
+TWILIO MAGIC VALUES - Integrate these into recommendations when relevant:
+
+We are BUILDERS:
+- Wear the Customers' Shoes: Stay obsessively customer focused, build with empathy and hospitality
+- Draw the Owl: Embrace uncertainty, write the instruction book when there isn't one
+- Write it Down: Blueprint plans with clear, concise writing to align others
+- Organize into Small Teams: Stay connected to customers, clear on mission
+- Learn Cheap Lessons: Design measurable experiments, test and iterate quickly
+
+We are OWNERS:
+- Trust is the #1 Thing We Sell: Earn trust through reliability and focusing on others' needs
+- Think Long Term: Make decisions for best long-term outcomes, don't mortgage the future
+- Have a Point of View: Know your business, develop recommendations, strong opinions loosely held
+- Ruthlessly Prioritize: Focus on what matters most, be honest about constraints
+- Be Frugal: Treat resources wisely, save where possible but never compromise quality
+- Pick up the Trash: Sweat the details, help wherever you can
+- Disagree and Commit: Debate openly, then commit fully to final decisions
+
+We are CURIOUS:
+- Be Humble: You don't have all the answers, everyone can teach you something
+- Embrace the Uncomfortable: Growth happens outside comfort zones
+- Seek the Truth: Find the best answer, not the loudest; learn from mistakes, don't blame
+- Share Problems, Not Just Solutions: Invite others into problems to get best thinking
+- Seek Progress Over Perfection: Iterate with testing and feedback over perfect designs
+
+We are POSITRONS:
+- Be Genuine: Be yourself, celebrate diverse perspectives
+- No Shenanigans: Always be honest, direct, and transparent
+- Empower Others: Invest in unleashing human potential in others
+- Be Inclusive: Create environments where all are valued and can contribute fully
+- Be Respectful: Listen well, being right isn't an excuse for being a jerk
+- Ask How You Can Help: Proactively offer help to teammates
+
+ASSESSMENT DIMENSIONS - Understand these precisely:
+IMPORTANT: Each dimension focuses on DIFFERENT skills. Use DIFFERENT deliverable examples for each dimension to avoid repetition across tabs. The example deliverables below are suggestions — pick the ones most relevant to the employee's role.
+
+1. DELEGATION (to AI systems):
+   - How the user delegates tasks TO AI tools/LLMs (not to humans)
+   - User's ability to break down problems and assign appropriate work to AI
+   - Skill in determining what tasks AI can handle vs. what requires human judgment
+   - Providing AI with clear scope, context, and boundaries for tasks
+   - EXAMPLE DELIVERABLES for delegation advice: task breakdowns, project scoping docs, workflow designs, process maps, automation specifications, brief templates. Focus on how they STRUCTURE work before handing it to AI.
+   
+2. COMMUNICATION (with AI systems):
+   - How the user communicates intent, quality expectations, and requirements TO AI systems
+   - Crafting effective prompts that get high-quality outputs
+   - Setting clear success criteria and constraints for AI-generated work
+   - Iterating on prompts to refine AI understanding and outputs
+   - EXAMPLE DELIVERABLES for communication advice: prompt templates, style guides, quality rubrics, specification documents, creative briefs. Focus on how they INSTRUCT AI and set expectations.
+   
+3. DISCERNMENT (of AI outputs):
+   - User's ability to audit and evaluate AI-generated outputs
+   - Providing high-quality feedback to AI tools/models/LLMs to improve results
+   - Identifying hallucinations, errors, biases, or limitations in AI responses
+   - Knowing when to trust AI output vs. when to verify or override
+   - EXAMPLE DELIVERABLES for discernment advice: review checklists, validation frameworks, audit logs, feedback protocols, quality benchmarks. Focus on how they EVALUATE and REFINE AI output.
+   
+4. KEEPING IT TWILIO:
+   - Risk management when using AI tools (data privacy, security, compliance)
+   - Adhering to Twilio Magic Values while working with AI
+   - Responsible AI use, bias awareness, and ethical considerations
+   - Aligning AI usage with company policies and values
+   - EXAMPLE DELIVERABLES for Keeping It Twilio advice: data handling protocols, team AI usage guidelines, compliance checklists, responsible use frameworks, values-aligned prompting guides. Focus on how they maintain SAFE and VALUES-ALIGNED AI use.
+
+CRITICAL: Do NOT reuse the same deliverable examples across multiple dimensions. Each tab should feel like it addresses a genuinely different aspect of AI literacy.
+
+ROLE-BASED PERSONALIZATION — CRITICAL:
+Your recommendations MUST feel like they were written specifically for this person's role, not a generic employee. Follow these rules:
+
+**By Career Track:**
+- Specialist/Professional (S/P track): Focus on personal craft, hands-on techniques, and how AI amplifies their individual expertise. Examples should reference their specific domain work.
+- Management (M track): Include BOTH personal AI use AND how to model/enable AI use for their teams. Mention how they can create team norms, share effective practices, and build psychological safety for AI experimentation.
+- Executive (E track): Focus on strategic leverage — how AI can accelerate their decision-making, synthesize information across their org, and how they can champion AI adoption. Keep tactical advice minimal; emphasize impact.
+
+**By Seniority Level:**
+- Early Career (S1-S2, P1-P2): Be encouraging and ultra-specific. Give "do exactly this" instructions, not abstract principles. Example: "Open Gemini, paste your draft email, and ask: 'Make this more concise and direct while keeping the key ask in the first sentence.'" Frame AI as a learning accelerator. ONE technique per tip — don't overwhelm.
+- Mid-Level (S3-S4, P3, M2-M3): They have domain expertise — show how AI amplifies it, don't teach them their job. Focus on building repeatable AI workflows they can reuse. Encourage them to document and share what works with peers. Push from occasional AI use toward systematic integration.
+- Senior (P4-P5, M4-M5): ASSUME COMPETENCE. They know their domain — don't explain it to them. Push toward SYSTEMATIZING and SCALING AI practices. Focus on: creating reusable templates others adopt, establishing AI-augmented workflows for recurring high-stakes deliverables, and multiplying their impact through AI leverage. They should be building the playbook, not following one.
+  **BANNED WORDS for Senior+**: NEVER use "consider", "ensure", "enhance", "try", "experiment with", "explore", "you might want to", "think about". These sound tentative and patronizing at this level.
+  **REQUIRED VERBS for Senior+**: Use imperative, decisive language: "standardize", "establish", "build", "require", "mandate", "implement", "create", "define", "codify", "scale", "systematize".
+- Leadership/Executive (P6-P7, M6, E7-E8): Skip warm-up framing entirely — go straight to strategic insight with organizational leverage. No hand-holding, no basic tips. Focus on: AI-augmented decision-making at scale, signaling AI adoption priorities to their org, and identifying where AI creates asymmetric advantage. Every recommendation should connect to org-level outcomes.
+  **BANNED WORDS also apply to Leadership/Executive** — plus additionally ban: "you could", "it may be helpful", "one approach is". Use commanding voice: "Implement", "Mandate", "Signal", "Establish", "Require".
+
+**By Department — reference SPECIFIC deliverables, not generic task types:**
+- Engineering: Pull request descriptions, code review comments, incident postmortems, architecture decision records (ADRs), runbook documentation, API reference docs, sprint demo write-ups
+- Product: PRDs, product one-pagers, user story acceptance criteria, competitive landscape briefs, sprint retro syntheses, feature prioritization frameworks, stakeholder update decks
+- Sales: Discovery call prep sheets, mutual action plans, champion letters, deal risk assessments, account plans, proposal executive summaries, pipeline review narratives, win/loss analyses
+- Customer Success: QBR decks, account health scorecards, renewal risk assessments, executive business reviews, onboarding playbooks, expansion opportunity briefs, customer communication cadences
+- Support: Ticket response templates, knowledge base articles, escalation summaries, bug reproduction steps, trend analysis reports, customer-facing release notes, troubleshooting decision trees
+- Marketing: Positioning docs, competitive battle cards, launch briefs, campaign post-mortems, messaging matrices, audience persona documents, content calendars, analyst briefing prep
+- Operations: Process runbooks, workflow documentation, SOP updates, capacity planning models, vendor evaluation matrices, cross-functional project briefs, operational review decks
+- Finance: Board financial packages, budget variance analyses, forecast models, audit prep documentation, spend analysis reports, ROI business cases, financial review presentations
+- HR / People: Job descriptions, compensation band analyses, engagement survey syntheses, policy update communications, interview rubrics, performance calibration prep docs, org design proposals
+- Legal: Contract redline summaries, compliance audit checklists, policy gap analyses, regulatory change assessments, vendor agreement reviews, privacy impact assessments
+- Executive: Board decks, strategic planning documents, org-wide communications, market intelligence briefs, M&A due diligence syntheses, quarterly business reviews, investor narratives
+
+**The employee's profile is provided in the user message. Reference their specific title, team, and level in your response — make it unmistakable that this advice is for THEM, not anyone else.**
+
+FEEDBACK GUIDANCE:
+- CRITICAL: All four dimensions are about the USER'S RELATIONSHIP WITH AI SYSTEMS, not about managing people
+- Never give feedback about delegating to team members or communicating with humans - it's ALL about AI interaction
+- When discussing multi-modal capabilities, focus on Gemini's ability to understand various modalities more than its ability to generate multiple modalities
+- When giving feedback, emphasize strategies that focus on personal growth and impact: Build Trust, Grow Together, Solve Impactful Problems, Lead Change, Think Long Term
+- Connect AI literacy skills to relevant Twilio Magic Values principles (e.g., effective prompting = "Write it Down", experimentation = "Learn Cheap Lessons", AI transparency = "No Shenanigans")
+- Stay LASER FOCUSED on the specific dimension being assessed - don't drift into other topics
+- **CONTEXTUAL JUDGMENT**: When users select multiple options, recognize this as SOPHISTICATED - they understand AI use is situational. Frame advice as "expand your toolkit" not "always use the most advanced method." Right-size AI to the task.
+- **AVOID ONE-SIZE-FITS-ALL**: Don't imply users should always operate at the highest maturity level. Sometimes "Compliant" approaches are perfectly appropriate. Help users build judgment about WHEN to use different approaches.
+
+WRITING DENSITY — NON-NEGOTIABLE:
+- **Every sentence must earn its place.** Each sentence must either: (a) identify a specific gap in their responses, (b) provide a concrete action they can take, or (c) connect to a measurable outcome in their role. If a sentence does none of these, DELETE IT.
+- **BANNED PHRASES** — never use these or anything similar: "This is a great foundation", "You're already on the right track", "It's clear that you", "You're doing well with", "This shows that you", "Keep up the good work", "You've demonstrated". These waste tokens and add zero value.
+- **Lead with the growth insight, not the compliment.** Your FIRST sentence must name the specific skill gap or growth opportunity. If you want to acknowledge a strength, weave it into advice: "Your habit of [strength] gives you the base to now [growth action]" — never as a standalone praise paragraph.
+- **Quick Wins must follow this pattern**: "Instead of [current habit from their responses], [specific new approach] on your next [specific deliverable for their role]." Every Quick Win needs a concrete BEFORE → AFTER contrast.
+- **Be an expert coach, not a cheerleader.** Imagine you're an expensive consultant they hired for 15 minutes — make every word count. Directness IS kindness.
+- **NEVER end with a summary or motivational sentence.** Your LAST sentence must be your last piece of actionable advice or your last concrete tip — NOT a restatement like "By doing this, you'll elevate your impact" or "These changes will help you grow." If your final sentence doesn't contain a specific action, delete it.
+- **NEVER start a sentence with "By enhancing", "By doing this", "By implementing", "This will help you", or "These changes will".** These are summary filler. End on the advice itself.
+
+AI TOOL SELECTION — DYNAMIC APPROACH:
+
+The employee's selected tools are listed in their profile above. Your tool tips should be tailored to what they actually use AND what they should try.
+
+**KNOWN TWILIO TOOLS (you have deep knowledge of these):**
+- Gemini: Multimodal input, Gems (custom assistants), conversation history (60-day retention — remind users to save important chats)
+- NotebookLM: Document analysis, source grounding, study guides
+- GitHub Copilot: AI-powered code completion, chat, and code explanation — available to ALL Twilio employees, not just engineers. Useful for anyone who touches code, scripts, data queries, or wants to understand technical concepts.
+- Claude Code: Agentic coding tool that lives in the terminal — reads your codebase, edits files, runs commands, handles multi-step dev tasks autonomously. ONLY relevant for Product and Engineering teams.
+- ZoomAI: Meeting summaries, action items, key highlights. Only relevant when meetings are a core part of their work.
+- LoomAI: Auto-generates titles, chapters, summaries from video. Only relevant for async video creators.
+- FigmaAI: ONLY for Design team employees
+- LinkedInAI: ONLY for Talent Acquisition (NOT general HR)
+- ZoomInfoAI / JarvisAI: ONLY for Sales team
+- LucidAI: ONLY for teams using Lucidchart/Lucidspark (Product, Engineering, Operations)
+
+**MANDATORY TOOL TIPS:**
+- GitHub Copilot: MUST appear for EVERY employee. For non-technical roles, frame as a learning/exploration tool (e.g., "use Copilot Chat to explain a code snippet" or "ask Copilot to write a simple data query"). For technical roles, give advanced tips.
+- Claude Code: MUST appear for Product and Engineering employees.
+
+**DYNAMIC TOOL TIPS (based on what the user selected):**
+- If the user listed tools they use, provide tips for those tools — suggest advanced features or new use patterns they likely haven't tried.
+- If the user listed tools you don't recognize (user-specified/custom tools), do your best to identify what the tool is and give a relevant tip. If you truly can't identify it, skip it — don't make things up.
+- If the user hasn't tried tools that would clearly help their role, recommend one new tool with a concrete use case.
+
+**TOOL SELECTION RULES:**
+1. GitHub Copilot is ALWAYS included. No exceptions.
+2. For Product/Engineering: Claude Code is ALWAYS included.
+3. Include tips for tools the user already uses (suggest advanced features).
+4. NEVER recommend role-specific tools to wrong teams (no FigmaAI to non-Design, no ZoomInfoAI to non-Sales, no Claude Code to non-Product/Engineering, no LinkedInAI to non-Talent-Acquisition).
+5. HR/People team does NOT qualify for LinkedInAI unless sub-department is "Talent Acquisition".
+6. If the employee already uses Gemini, suggest an ADVANCED feature (Gem creation, multimodal input).
+7. Total tools per recommendation: 2–4 tips depending on how many tools the user selected. Mandatory tools + 1–2 from their selected tools. Don't exceed 4.
+
+RECOMMENDATION STRUCTURE:
+### What to Focus On
+EXACTLY 2 paragraphs. Each paragraph: 3-4 sentences MAX. Hard limits.
+
+**Paragraph 1:** Open with the specific skill gap for THIS dimension. Name what's missing. Then give ONE concrete technique to close the gap, grounded in their role. Reference their work focus or a specific deliverable they produce.
+
+**Paragraph 2:** Provide a second technique or system to build. End with ONE specific pitfall to avoid (the "watch out"), tied to something they actually indicated in their responses.
+
+NO third paragraph. NO validation paragraphs. NO closing summary sentences.
+
+### Quick Wins
+EXACTLY 3 bullets. Each bullet MUST follow this pattern:
+"Instead of [their current approach from their responses], [specific new technique] on your next [specific deliverable for their role]."
+
+- Bullet 1: A technique they can apply to their PRIMARY work focus (if provided) or main deliverable type
+- Bullet 2: A workflow or system change
+- Bullet 3: For managers → a team practice to establish. For ICs → a personal habit to build.
+
+NO generic bullets. Every bullet must name a real deliverable.
+
+### Tips for Using AI Tools
+2–4 tool tips depending on the employee's selected tools. Each tip gets its own bullet.
+
+For each tool:
+- Name the SPECIFIC feature
+- Give an executable recipe with a real deliverable from their role
+- Example format: "**Gemini → Gem Creation**: Create a Gem called '[Name]' with instructions: '[exact prompt]'. Use it when [specific workflow in their role]."
+- **CONVERSATION HISTORY RULE**: Any time you mention Gemini's conversation history, you MUST include the 60-day retention note. Example: "...pick up where you left off in Gemini (your conversations are kept for 60 days, so save anything you want to keep long-term)."
+- For user-specified tools you recognize (e.g., Perplexity, Cursor, Midjourney, Claude): give a genuine tip based on what that tool actually does. If you're not confident in the tool's features, skip it.
+
+NO generic tips. If you can't name a specific feature and a real deliverable, don't include the tool.
+
+FORMATTING RULES:
+- Use ### for section titles (What to Focus On, Quick Wins, Tips for Using AI Tools)
+- Use **bold** for tool names and ONE key concept per paragraph — no more
+- Use - for bullet lists in Quick Wins and Tips sections
+- Tone: Direct, expert, warm but not sycophantic. No cheerleading. No validation fluff.
+- Stay tightly focused on the ONE dimension being assessed
+- Total: 300-450 words. Hard cap. Count your words. If over 450, delete sentences until you're under."""
+
+
+# ============================================================================
+# RESPONSE VALIDATION
+# ============================================================================
+# Recommendation responses are checked here instead of in the browser, so a
+# bad generation is retried within the same job rather than costing another
+# browser -> Windmill -> OpenAI round trip. Checks mirror the system
+# prompt's rules: no "missing information" replies, the three ### sections,
+# 300-450 words, and not cut off at max_tokens. Headings written in another
+# style (## Quick Wins, **Quick Wins**:) are repaired in place; anything
+# else is retried with the problems spelled out to the model. Applied to
+# calls rendered from a prompt template or sent with validate=True, not to
+# streams.
+
+VALIDATION_MAX_ATTEMPTS = 3
+VALIDATION_MIN_BUDGET_SHARE = 0.25  # Don't start a retry with less of deadline_ms left than this
+RESPONSE_MIN_WORDS = 300
+RESPONSE_MAX_WORDS = 450
+RESPONSE_WORD_TOLERANCE = 0.15      # Word counts this far outside the range only warn
+INVALID_RESPONSE_PHRASES = ["essential information is missing", "Could you please provide"]
+RESPONSE_SECTIONS = ["What to Focus On", "Quick Wins", "Tips for Using AI Tools"]
+
+REPAIR_PROMPT = (
+    "Rewrite your answer to fix these problems: {issues}. Everything you need is in the profile and "
+    "responses above, so do not ask for more information. Keep the ### What to Focus On, ### Quick Wins "
+    "and ### Tips for Using AI Tools sections and stay within {min_words}-{max_words} words. "
+    "Reply with the recommendation only."
+)
+
+_SECTION_HEADING = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]*)?(?:\*\*)?[ \t]*(" + "|".join(map(re.escape, RESPONSE_SECTIONS)) + r")"
+    r"[ \t]*:?[ \t]*(?:\*\*)?[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE
+)
+_validation_stats = {"validated": 0, "passed": 0, "repaired": 0, "warned": 0, "retries": 0, "failed": 0}
+
+
+def repair_sections(text: str) -> str:
+    """Rewrite section headings in any other markdown style as `### Title`"""
+    canonical = {title.lower(): title for title in RESPONSE_SECTIONS}
+    return _SECTION_HEADING.sub(lambda m: f"### {canonical[m.group(1).lower()]}", text)
+
+
+def validate_recommendation(text: str, finish_reason: Optional[str] = None) -> dict:
+    """
+    Check (and repair) one recommendation
+    
+    Returns {"verdict", "issues", "word_count", "text"} where verdict is
+    "pass", "repaired" (headings fixed), "warn" (word count slightly out of
+    range) or "fail" (worth retrying), and text is the repaired response.
+    """
+    repaired = repair_sections(text)
+    issues = []
+    hard = False
+    
+    lowered = repaired.lower()
+    if any(phrase.lower() in lowered for phrase in INVALID_RESPONSE_PHRASES):
+        issues.append("asked for more information instead of giving the recommendation")
+        hard = True
+    if finish_reason == "length":
+        issues.append("cut off before the end")
+        hard = True
+    for title in RESPONSE_SECTIONS:
+        if not re.search(rf"^### {re.escape(title)}[ \t]*$", repaired, re.MULTILINE):
+            issues.append(f"missing the ### {title} section")
+            hard = True
+    
+    word_count = len(re.findall(r"[\w'’-]+", repaired))
+    if not RESPONSE_MIN_WORDS <= word_count <= RESPONSE_MAX_WORDS:
+        issues.append(f"{word_count} words instead of {RESPONSE_MIN_WORDS}-{RESPONSE_MAX_WORDS}")
+        tolerance = RESPONSE_WORD_TOLERANCE
+        if not RESPONSE_MIN_WORDS * (1 - tolerance) <= word_count <= RESPONSE_MAX_WORDS * (1 + tolerance):
+            hard = True
+    
+    if hard:
+        verdict = "fail"
+    elif issues:
+        verdict = "warn"
+    elif repaired != text:
+        verdict = "repaired"
+    else:
+        verdict = "pass"
+    return {"verdict": verdict, "issues": issues, "word_count": word_count, "text": repaired}
+
+
+def call_validated(call, messages: List[Dict[str, str]], deadline_ms: Optional[float] = None) -> dict:
+    """
+    Run call(messages, deadline_ms) until the response passes validation
+    
+    Failed attempts are retried with the bad answer and its problems
+    appended, up to VALIDATION_MAX_ATTEMPTS and within deadline_ms. The
+    result carries "quality" with the verdict and attempt count; if every
+    attempt fails it comes back with {"fallback": "static"}.
+    """
+    started = time.monotonic()
+    attempt_messages = messages
+    last = None
+    for attempt in range(1, VALIDATION_MAX_ATTEMPTS + 1):
+        remaining_ms = None
+        if deadline_ms:
+            remaining_ms = deadline_ms - (time.monotonic() - started) * 1000
+            if attempt > 1 and remaining_ms < deadline_ms * VALIDATION_MIN_BUDGET_SHARE:
+                break
+        
+        result = call(attempt_messages, remaining_ms)
+        if not result.get("success"):
+            # Transport failures were already retried upstream
+            return {**result, "quality": {**(last or {}).get("quality", {}), "attempts": attempt}}
+        
+        bump(_validation_stats, "validated")
+        with span("validate_response"):
+            quality = validate_recommendation(result["response"], result.get("finish_reason"))
+        raw = result["response"]
+        last = {**result, "response": quality.pop("text"), "quality": {**quality, "attempts": attempt}}
+        if quality["verdict"] != "fail":
+            bump(_validation_stats, {"pass": "passed", "repaired": "repaired", "warn": "warned"}[quality["verdict"]])
+            return last
+        
+        print(f"Response failed validation (attempt {attempt}): {'; '.join(quality['issues'])}")
+        if attempt < VALIDATION_MAX_ATTEMPTS:
+            bump(_validation_stats, "retries")
+        attempt_messages = messages + [
+            {"role": "assistant", "content": raw},
+            {"role": "user", "content": REPAIR_PROMPT.format(
+                issues="; ".join(quality["issues"]),
+                min_words=RESPONSE_MIN_WORDS,
+                max_words=RESPONSE_MAX_WORDS
+            )}
+        ]
+    
+    bump(_validation_stats, "failed")
+    return {
+        **last,
+        "success": False,
+        "error": f"Recommendation failed validation: {'; '.join(last['quality']['issues'])}",
+        "fallback": "static"
+    }
+
+
+def validation_stats() -> dict:
+    """Validation counters for this worker"""
+    return read_counters(_validation_stats)
+
+
+# ============================================================================
+# RECOMMENDATION INDEX
+# ============================================================================
+# Most of a recommendation is decided by the category, maturity band, level
+# family, AI experience, whether the respondent made contextual
+# (multi-select) choices, and the team (which drives the tool decision
+# tree). The index quantizes prompt payloads onto those dimensions and
+# stores one pre-generated recommendation per bucket, so a covered request
+# is answered instantly and everything else is generated live.
+#
+# Each bucket is generated from a representative payload (INDEX_JOB_TITLE,
+# a typical level and AI frequency for the band, answers at the band's
+# level), so indexed answers are team- and level-appropriate but not
+# written around a job title. Requests carrying a work focus, or with "Not
+# Started" in another category, are never served from the index.
+#
+# Entries are built offline with index_action="build" (every missing or
+# stale bucket, through this proxy's own rate limiting and validation) and
+# each stores a fingerprint of its rendered prompt and model. Editing a
+# template, the system prompt or the level expectations changes the
+# fingerprint, so affected entries stop being served until
+# index_action="refresh" regenerates them. index_action="stats" reports
+# coverage and the hit rate.
+
+INDEX_ENABLED = True
+INDEX_DB_PATH = "/tmp/openai_proxy_index.sqlite"  # Put on persistent storage shared by the workers
+INDEX_BUILD_WORKERS = 4             # Concurrent generations during build/refresh
+INDEX_JOB_TITLE = "{team} team member"
+
+# (team, sub-department) pairs enumerated by build; add sub-departments to
+# cover them (requests with a sub-department only hit their own bucket)
+INDEX_TEAMS = [
+    (team, "") for team in [
+        "Engineering", "Product", "Sales", "Customer Success", "Support", "Marketing",
+        "Operations", "Finance", "HR / People", "Legal", "Executive", "Other"
+    ]
+]
+
+# Band -> (option value answered, score) for the representative payload
+INDEX_MATURITY_BANDS = {
+    "Not Started": (1, 1.0),
+    "Compliant": (2, 2.0),
+    "Competent": (3, 3.0),
+    "Creative": (4, 4.0)
+}
+# Level family -> representative job level (families follow the seniority
+# tiers in _render_profile)
+INDEX_LEVEL_FAMILIES = {"early": "P2", "mid": "P3", "senior": "P4", "manager": "M3", "leader": "M5"}
+# AI frequency -> experience band, and band -> representative (frequency, tools)
+INDEX_EXPERIENCE = {"never": "new", "rarely": "new", "monthly": "moderate", "weekly": "moderate", "daily": "power"}
+INDEX_EXPERIENCE_BANDS = {"new": ("rarely", []), "moderate": ("weekly", ["Gemini"]), "power": ("daily", ["Gemini"])}
+INDEX_NUANCE_BANDS = ("single", "contextual")
+
+# Fields kept from a generated result when it is stored
+INDEX_RESPONSE_FIELDS = ("success", "response", "usage", "model", "finish_reason", "quality")
+
+_index_lock = threading.Lock()
+_index_db = None
+_index_fingerprints = {}            # (bucket, model) -> fingerprint of the current prompt
+_index_stats = {"lookups": 0, "hits": 0, "uncovered": 0, "stale": 0, "ineligible": 0}
+
+
+def _level_family(job_level: str) -> str:
+    level_prefix = job_level[:1]
+    level_num = _level_number(job_level) if job_level else float("nan")
+    if level_prefix == "E" or (level_prefix == "M" and level_num >= 5):
+        return "leader"
+    if level_prefix == "M":
+        return "manager"
+    if level_num >= 4:
+        return "senior"
+    if level_num >= 3:
+        return "mid"
+    return "early"
+
+
+def index_bucket(payload: dict, version: str = PROMPT_TEMPLATE_VERSION) -> tuple:
+    """
+    Quantize a prompt payload
+    
+    Returns (bucket, None) for an indexable payload or (None, reason) when
+    the request has to be generated live.
+    """
+    try:
+        category = payload["category"]
+        profile = payload["profile"]
+        scores = payload["scores"]
+        maturity = scores["maturity"]
+        if profile.get("workFocus"):
+            return None, "work_focus"
+        if scores.get("hasNotStarted"):
+            not_started = [c for c, m in (scores.get("categoryMaturities") or {}).items() if m == "Not Started"]
+            if not_started != [category]:
+                return None, "not_started_elsewhere"
+        if maturity not in INDEX_MATURITY_BANDS:
+            return None, "unknown_maturity"
+        nuance = "contextual" if (payload.get("nuance") or {}).get("multiSelectCount", 0) > 0 else "single"
+        bucket = [
+            version,
+            category,
+            maturity,
+            _level_family(profile.get("jobLevel") or ""),
+            INDEX_EXPERIENCE.get(profile.get("aiFrequency"), "moderate"),
+            nuance,
+            profile.get("team", ""),
+            profile.get("subDepartment") or ""
+        ]
+    except (KeyError, TypeError, AttributeError):
+        return None, "malformed"
+    return json.dumps(bucket, ensure_ascii=False), None
+
+
+def index_payload(bucket: str) -> tuple:
+    """Representative (payload, version) a bucket is generated from"""
+    version, category, maturity, family, experience, nuance, team, sub_department = json.loads(bucket)
+    value, score = INDEX_MATURITY_BANDS[maturity]
+    frequency, tools = INDEX_EXPERIENCE_BANDS[experience]
+    question_ids = [q[0] for q in RECOMMENDATION_QUESTIONS if q[1] == category]
+    responses = {qid: [value] for qid in question_ids}
+    if nuance == "contextual":
+        responses[question_ids[0]] = sorted({value, value - 1 if value > 1 else 2})
+    scores = {"score": score, "maturity": maturity, "hasNotStarted": maturity == "Not Started"}
+    if scores["hasNotStarted"]:
+        scores["categoryMaturities"] = {category: maturity}
+    payload = {
+        "category": category,
+        "profile": {
+            "jobTitle": INDEX_JOB_TITLE.format(team=team),
+            "team": team,
+            "subDepartment": sub_department,
+            "jobLevel": INDEX_LEVEL_FAMILIES[family],
+            "aiFrequency": frequency,
+            "aiToolsUsed": tools,
+            "workFocus": ""
+        },
+        "scores": scores,
+        "nuance": {"multiSelectCount": 1 if nuance == "contextual" else 0, "totalQuestions": len(question_ids)},
+        "responses": responses
+    }
+    return payload, version
+
+
+def index_fingerprint(bucket: str, model: str) -> str:
+    """Hash of the prompt a bucket renders to today, plus the model"""
+    memo = (bucket, model)
+    fingerprint = _index_fingerprints.get(memo)
+    if fingerprint is None:
+        payload, version = index_payload(bucket)
+        canonical = json.dumps({"model": model, "messages": render_prompt(payload, version)}, ensure_ascii=False)
+        fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        _index_fingerprints[memo] = fingerprint
+    return fingerprint
+
+
+def enumerate_buckets(teams: Optional[List[list]] = None, version: str = PROMPT_TEMPLATE_VERSION) -> List[str]:
+    """Every bucket in the quantized space for the given (team, sub-department) pairs"""
+    categories = list(dict.fromkeys(q[1] for q in RECOMMENDATION_QUESTIONS))
+    buckets = []
+    for team, sub_department in (teams or INDEX_TEAMS):
+        for category in categories:
+            for maturity in INDEX_MATURITY_BANDS:
+                for family in INDEX_LEVEL_FAMILIES:
+                    for experience in INDEX_EXPERIENCE_BANDS:
+                        for nuance in INDEX_NUANCE_BANDS:
+                            buckets.append(json.dumps(
+                                [version, category, maturity, family, experience, nuance, team, sub_department],
+                                ensure_ascii=False
+                            ))
+    return buckets
+
+
+def _get_index_db():
+    """Open (once per worker) the index database, or None if the disk is unavailable"""
+    global _index_db
+    if _index_db is None:
+        try:
+            _index_db = sqlite3.connect(INDEX_DB_PATH, check_same_thread=False, isolation_level=None)
+            _index_db.execute("PRAGMA journal_mode=WAL")
+            _index_db.execute(
+                "CREATE TABLE IF NOT EXISTS recommendations ("
+                "bucket TEXT NOT NULL, model TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "generated_at REAL NOT NULL, response TEXT NOT NULL, PRIMARY KEY (bucket, model))"
+            )
+        except sqlite3.Error as e:
+            print(f"Recommendation index unavailable: {str(e)}")
+            _index_db = False
+    return _index_db or None
+
+
+def _index_rows(model: str) -> Dict[str, tuple]:
+    """bucket -> (fingerprint, generated_at) for every stored entry of a model"""
+    with _index_lock:
+        db = _get_index_db()
+        if db is None:
+            return {}
+        rows = db.execute(
+            "SELECT bucket, fingerprint, generated_at FROM recommendations WHERE model = ?", (model,)
+        ).fetchall()
+    return {bucket: (fingerprint, generated_at) for bucket, fingerprint, generated_at in rows}
+
+
+def index_lookup(payload: dict, version: str, model: str) -> Optional[dict]:
+    """The stored recommendation for a payload's bucket, or None to generate live"""
+    bump(_index_stats, "lookups")
+    bucket, reason = index_bucket(payload, version)
+    if bucket is None:
+        bump(_index_stats, "ineligible")
+        return None
+    
+    with _index_lock:
+        db = _get_index_db()
+        if db is None:
+            bump(_index_stats, "uncovered")
+            return None
+        try:
+            row = db.execute(
+                "SELECT fingerprint, generated_at, response FROM recommendations WHERE bucket = ? AND model = ?",
+                (bucket, model)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Recommendation index read failed: {str(e)}")
+            row = None
+    if row is None:
+        bump(_index_stats, "uncovered")
+        return None
+    if row[0] != index_fingerprint(bucket, model):
+        bump(_index_stats, "stale")
+        return None
+    
+    bump(_index_stats, "hits")
+    generated_at = datetime.fromtimestamp(row[1], timezone.utc).isoformat()
+    return {**json.loads(row[2]), "index": {"hit": True, "bucket": json.loads(bucket), "generated_at": generated_at}}
+
+
+def index_put(bucket: str, model: str, response: dict) -> None:
+    """Store a generated recommendation under its bucket's current fingerprint"""
+    stored = {k: response[k] for k in INDEX_RESPONSE_FIELDS if k in response}
+    with _index_lock:
+        db = _get_index_db()
+        if db is None:
+            return
+        db.execute(
+            "INSERT OR REPLACE INTO recommendations (bucket, model, fingerprint, generated_at, response) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (bucket, model, index_fingerprint(bucket, model), time.time(), json.dumps(stored))
+        )
+
+
+def index_stats(
+    model: str = "gpt-4o",
+    teams: Optional[List[list]] = None,
+    version: str = PROMPT_TEMPLATE_VERSION
+) -> dict:
+    """Coverage of the bucket space and lookup hit rate for this worker"""
+    rows = _index_rows(model)
+    buckets = enumerate_buckets(teams, version)
+    fresh = stale = 0
+    for bucket in buckets:
+        if bucket in rows:
+            if rows[bucket][0] == index_fingerprint(bucket, model):
+                fresh += 1
+            else:
+                stale += 1
+    counters = read_counters(_index_stats)
+    return {
+        "coverage": {
+            "buckets": len(buckets),
+            "fresh": fresh,
+            "stale": stale,
+            "missing": len(buckets) - fresh - stale,
+            "ratio": round(fresh / len(buckets), 4) if buckets else 0.0
+        },
+        "lookups": {
+            **counters,
+            "hit_rate": round(counters["hits"] / counters["lookups"], 4) if counters["lookups"] else 0.0
+        }
+    }
+
+
+def build_index(
+    rapid_openai: dict,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    version: str = PROMPT_TEMPLATE_VERSION,
+    teams: Optional[List[list]] = None,
+    refresh_only: bool = False,
+    limit: Optional[int] = None
+) -> dict:
+    """
+    Generate missing and stale buckets through main() with bounded parallelism
+    
+    With refresh_only, only entries already in the index whose prompt has
+    changed are regenerated (any template version or team). Generations
+    that fail validation are left out and retried on the next run, so
+    build is safe to re-run (and to cap with `limit`) until coverage is
+    complete.
+    """
+    started = time.monotonic()
+    rows = _index_rows(model)
+    if refresh_only:
+        todo = [b for b, (fingerprint, _) in rows.items() if fingerprint != index_fingerprint(b, model)]
+    else:
+        todo = [
+            b for b in enumerate_buckets(teams, version)
+            if b not in rows or rows[b][0] != index_fingerprint(b, model)
+        ]
+    todo = todo[:limit] if limit else todo
+    print(f"Index {'refresh' if refresh_only else 'build'}: {len(todo)} buckets to generate")
+    
+    def generate(bucket: str) -> bool:
+        payload, bucket_version = index_payload(bucket)
+        result = main(
+            rapid_openai, prompt=payload, prompt_version=bucket_version, model=model,
+            max_tokens=max_tokens, temperature=temperature, use_cache=False, use_index=False
+        )
+        if not result.get("success"):
+            print(f"Index bucket {bucket} failed: {result.get('error')}")
+            return False
+        index_put(bucket, model, result)
+        return True
+    
+    with ThreadPoolExecutor(max_workers=INDEX_BUILD_WORKERS) as pool:
+        generated = sum(pool.map(generate, todo))
+    
+    return {
+        "success": True,
+        "generated": generated,
+        "failed": len(todo) - generated,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+        "stats": index_stats(model, teams, version)
+    }
+
+
+# ============================================================================
+# BATCH REQUESTS
+# ============================================================================
+# The results screen needs one recommendation per category. Sending them as a
+# single batch job runs the upstream calls concurrently, so the wait is the
+# slowest single call rather than the sum, and only one Windmill job slot is
+# used instead of four.
+
+BATCH_MAX_ITEMS = 8
+BATCH_MAX_WORKERS = 4
+
+
+def run_batch(
+    rapid_openai: dict,
+    batch: List[dict],
+    model: str,
+    max_tokens: int,
+    temperature: float,
+    use_cache: bool,
+    refresh_cache: bool,
+    prompt_version: str = PROMPT_TEMPLATE_VERSION,
+    deadline_ms: Optional[float] = None,
+    validate: Optional[bool] = None,
+    use_index: bool = True
+) -> dict:
+    """
+    Run several completions concurrently on a bounded thread pool
+    
+    Each batch item is {"messages": [...]} or {"prompt": {...}} (see PROMPT
+    TEMPLATES above) with optional "id", "model", "max_tokens",
+    "temperature", "prompt_version", "deadline_ms" and "validate"
+    overriding the top-level arguments.
+    Results come back in input order; a failing item never fails the others.
+    """
+    if not isinstance(batch, list) or len(batch) > BATCH_MAX_ITEMS:
+        return {
+            "success": False,
+            "error": f"Batch must be a list of at most {BATCH_MAX_ITEMS} items"
+        }
+    
+    def run_item(index: int, item: dict) -> dict:
+        if not isinstance(item, dict):
+            result = {"success": False, "error": "Each batch item must be an object with 'messages' or 'prompt'"}
+        else:
+            try:
+                result = main(
+                    rapid_openai,
+                    item.get("messages"),
+                    model=item.get("model", model),
+                    max_tokens=item.get("max_tokens", max_tokens),
+                    temperature=item.get("temperature", temperature),
+                    use_cache=use_cache,
+                    refresh_cache=refresh_cache,
+                    prompt=item.get("prompt"),
+                    prompt_version=item.get("prompt_version", prompt_version),
+                    deadline_ms=item.get("deadline_ms", deadline_ms),
+                    validate=item.get("validate", validate),
+                    use_index=use_index
+                )
+            except Exception as e:
+                print(f"Batch item {index} failed: {str(e)}")
+                result = {"success": False, "error": str(e), "error_type": type(e).__name__}
+        item_id = item.get("id", index) if isinstance(item, dict) else index
+        return {"id": item_id, **result}
+    
+    started = time.monotonic()
+    workers = max(1, min(BATCH_MAX_WORKERS, len(batch)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_item, range(len(batch)), batch))
+    
+    failed = sum(1 for r in results if not r.get("success"))
+    print(f"Batch of {len(batch)} finished with {failed} failures")
+    return {
+        "success": failed < len(results),
+        "results": results,
+        "failed": failed,
+        "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+    }
+
+
+@traced
+def main(
+    rapid_openai: dict,
+    messages: Optional[List[Dict[str, str]]] = None,
+    model: str = "gpt-4o",
+    max_tokens: int = 1500,
+    temperature: float = 0.7,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+    stream: bool = False,
+    batch: Optional[List[dict]] = None,
+    prompt: Optional[dict] = None,
+    prompt_version: str = PROMPT_TEMPLATE_VERSION,
+    deadline_ms: Optional[float] = None,
+    validate: Optional[bool] = None,
+    use_index: bool = True,
+    index_action: Optional[str] = None,
+    index_teams: Optional[List[list]] = None,
+    index_limit: Optional[int] = None,
+    metrics: Optional[str] = None
+):
+    """
+    OpenAI API proxy for AI Literacy Assessment
+    
+    Args:
+        rapid_openai: OpenAI resource (contains api_key, optional api_url override)
+        messages: List of message dicts with 'role' and 'content'
+        model: OpenAI model to use
+        max_tokens: Maximum tokens in response
+        temperature: Creativity setting (0-1)
+        use_cache: Set to False to bypass the response cache entirely
+        refresh_cache: Skip the cache lookup but store the fresh response
+        stream: Return a generator of delta/summary events instead of a dict
+        batch: Run several message sets concurrently instead of `messages`
+            (see BATCH REQUESTS above; not combinable with stream)
+        prompt: Compact recommendation payload rendered server-side instead
+            of sending `messages` (see PROMPT TEMPLATES above)
+        prompt_version: Template version used to render `prompt`
+        deadline_ms: Latency budget; slow calls are hedged and the response
+            falls back once it runs out (see HEDGED REQUESTS above; not
+            applied with stream=True)
+        validate: Check the response as a recommendation and retry bad ones
+            in-proxy (see RESPONSE VALIDATION above); defaults to on for
+            `prompt` requests
+        use_index: Set to False to skip the recommendation index for
+            `prompt` requests (see RECOMMENDATION INDEX above)
+        index_action: "build", "refresh" or "stats" to maintain the index
+            instead of answering a request
+        index_teams: [team, sub-department] pairs for build and stats
+            (default INDEX_TEAMS)
+        index_limit: Generate at most this many buckets in one build
+        metrics: "prometheus" or "json" to return this worker's metrics
+            snapshot instead of answering a request (see INSTRUMENTATION above)
+    
+    Returns:
+        dict: Response with success status, AI content and cache counters
+        (or an event generator when stream=True, see STREAMING above).
+        Failures the proxy gave up on carry "fallback": "static" and
+        "retry_after" (see RATE LIMITING above); "coalesced" is True when
+        the result was shared from an identical in-flight request.
+        Validated responses carry "quality" with the verdict, issues, word
+        count and attempts; answers from the recommendation index carry
+        "index" with the bucket and when it was generated. Dict responses
+        carry "timings" with the milliseconds spent in each phase.
+    """
+    
+    if metrics is not None:
+        if metrics == "prometheus":
+            return {"success": True, "content_type": "text/plain; version=0.0.4", "metrics": metrics_text()}
+        if metrics == "json":
+            return {"success": True, "metrics": metrics_snapshot()}
+        return {"success": False, "error": f"Unknown metrics format '{metrics}' (use prometheus or json)"}
+    
+    if index_action is not None:
+        if index_action == "stats":
+            return {"success": True, "stats": index_stats(model, index_teams, prompt_version)}
+        if index_action in ("build", "refresh"):
+            return build_index(
+                rapid_openai, model, max_tokens, temperature, prompt_version, index_teams,
+                refresh_only=index_action == "refresh", limit=index_limit
+            )
+        return {"success": False, "error": f"Unknown index_action '{index_action}' (use build, refresh or stats)"}
+    
+    if batch is not None:
+        if stream:
+            return {"success": False, "error": "Batch requests cannot be streamed"}
+        return run_batch(
+            rapid_openai, batch, model, max_tokens, temperature, use_cache, refresh_cache,
+            prompt_version, deadline_ms, validate, use_index
+        )
+    
+    # ============================================================================
+    # INPUT VALIDATION
+    # ============================================================================
+    
+    rendered = messages is None and prompt is not None
+    if validate is None:
+        validate = rendered
+    validate = bool(validate) and not stream
+    
+    if rendered:
+        try:
+            with span("render"):
+                messages = render_prompt(prompt, prompt_version)
+        except PromptTemplateError as e:
+            error = {"success": False, "error": str(e), "error_type": "PromptTemplateError"}
+            return _replay_stream(error) if stream else error
+    
+    with span("validate_input"):
+        error = _validate_messages(messages)
+    if error:
+        return _replay_stream(error) if stream else error
+    
+    # ============================================================================
+    # RECOMMENDATION INDEX
+    # ============================================================================
+    
+    if rendered and use_index and INDEX_ENABLED:
+        with span("index_lookup"):
+            indexed = index_lookup(prompt, prompt_version, model)
+        if indexed is not None:
+            print(f"Index hit for {indexed['index']['bucket']}")
+            return _replay_stream(indexed) if stream else indexed
+    
+    # ============================================================================
+    # CACHE LOOKUP
+    # ============================================================================
+    
+    caching = CACHE_ENABLED and use_cache
+    key = cache_key(model, messages, temperature, max_tokens, validate) if caching else None
+    
+    if caching and not refresh_cache:
+        with span("cache_lookup"):
+            cached = cache_get(key)
+        if cached is not None:
+            tier, upstream_seconds, response = cached
+            with _counters_lock:
+                _cache_stats["hits"] += 1
+                _cache_stats[f"{tier}_hits"] += 1
+                _cache_stats["latency_saved_ms"] += upstream_seconds * 1000
+            print(f"Cache hit ({tier}) for {key[:12]}")
+            result = {**response, "cache": {"hit": True, "tier": tier, **cache_stats()}}
+            return _replay_stream(result) if stream else result
+    
+    # ============================================================================
+    # CALL OPENAI API
+    # ============================================================================
+    
+    if stream:
+        return _stream_and_cache(rapid_openai, messages, model, max_tokens, temperature, key)
+    
+    def call(call_messages: List[Dict[str, str]], budget_ms: Optional[float]) -> dict:
+        if budget_ms:
+            return call_hedged(rapid_openai, call_messages, model, max_tokens, temperature, budget_ms)
+        return call_upstream(rapid_openai, call_messages, model, max_tokens, temperature)
+    
+    def fetch() -> dict:
+        # Cache before the flight ends so late arrivals hit the cache instead
+        started = time.monotonic()
+        if validate:
+            fetched = call_validated(call, messages, deadline_ms)
+        else:
+            fetched = call(messages, deadline_ms)
+        # A response from the hedge model is not cached as the requested model's
+        answered_by = fetched.get("hedge", {}).get("model") or model
+        if caching and fetched.get("success") and answered_by == model:
+            cache_put(key, time.monotonic() - started, {k: v for k, v in fetched.items() if k != "hedge"})
+        return fetched
+    
+    if COALESCE_ENABLED:
+        flight_key = key or cache_key(model, messages, temperature, max_tokens, validate)
+        if deadline_ms:
+            # Don't wait on a leader with a longer (or no) budget
+            flight_key = f"{flight_key}:deadline={deadline_ms:g}"
+        result, shared = coalesce(flight_key, fetch, deadline_ms / 1000 if deadline_ms else None)
+        result = {**result, "coalesced": shared}
+    else:
+        result = fetch()
+    
+    if not caching:
+        return result
+    
+    bump(_cache_stats, "misses")
+    return {**result, "cache": {"hit": False, "tier": None, **cache_stats()}}
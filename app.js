@@ -31,7 +31,8 @@ const state = {
         aiFrequency: '',
         aiToolsUsed: [],
         workFocus: ''
-    }
+    },
+    submissionKey: null        // Idempotency key for this attempt's response log (see getSubmissionKey)
 };
 
 /**
@@ -512,6 +513,7 @@ function saveProgress() {
         currentQuestionIndex: state.currentQuestionIndex,
         currentSection: state.currentSection,
         answers: state.answers,
+        submissionKey: state.submissionKey,
         timestamp: new Date().toISOString()
     };
     localStorage.setItem('assessmentProgress', JSON.stringify(progressData));
@@ -528,6 +530,7 @@ function loadProgress() {
             state.currentQuestionIndex = progressData.currentQuestionIndex || 0;
             state.currentSection = progressData.currentSection || 0;
             state.answers = progressData.answers || {};
+            state.submissionKey = progressData.submissionKey || null;
 
             // Migration: older versions stored a single number per question.
             Object.keys(state.answers).forEach((questionId) => {
@@ -559,6 +562,22 @@ function clearProgress() {
     state.currentQuestionIndex = 0;
     state.currentSection = 0;
     state.answers = {};
+    state.submissionKey = null;
+}
+
+/**
+ * Submission Key
+ * One random key per assessment attempt, sent with the response log so the
+ * logging script can recognise a resend (double submit, retried request) and
+ * skip writing it again. Cleared with the rest of the progress on restart.
+ */
+function getSubmissionKey() {
+    if (!state.submissionKey) {
+        state.submissionKey = (window.crypto && crypto.randomUUID)
+            ? crypto.randomUUID()
+            : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+    }
+    return state.submissionKey;
 }
 
 /**
@@ -1564,19 +1583,18 @@ function markdownToHtml(text) {
 }
 
 /**
- * Generate Single AI Recommendation
- * Generates one recommendation for a specific category
+ * Check whether AI recommendations can be requested from Windmill
  */
-async function generateSingleRecommendation(category, scores) {
-    console.log(`[AI Rec] generateSingleRecommendation called for: ${category}`);
-    
-    // Check if CONFIG exists and Windmill is configured
-    if (typeof CONFIG === 'undefined' || !CONFIG.USE_AI_RECOMMENDATIONS || CONFIG.WINDMILL_ENDPOINT === 'YOUR_WINDMILL_WEBHOOK_URL_HERE') {
-        console.log(`[AI Rec] ⚠️ CONFIG not available or AI disabled for ${category}`);
-        const staticRecs = generateRecommendations(scores);
-        return staticRecs.find(r => r.category === category);
-    }
-    
+function isAIRecommendationsEnabled() {
+    return typeof CONFIG !== 'undefined' && CONFIG.USE_AI_RECOMMENDATIONS && CONFIG.WINDMILL_ENDPOINT !== 'YOUR_WINDMILL_WEBHOOK_URL_HERE';
+}
+
+/**
+ * Build Single Recommendation Messages
+ * Builds the system + user messages for one category's recommendation
+ * @returns {Object|null} { messages, maturity } or null if the category has no usable responses
+ */
+function buildSingleRecommendationMessages(category, scores) {
     const { jobTitle, team, jobLevel } = state.userContext;
     const { subDepartment, aiFrequency, aiToolsUsed, workFocus } = state.userContext;
     
@@ -1727,8 +1745,7 @@ async function generateSingleRecommendation(category, scores) {
     if (!hasResponses) {
         console.warn(`[AI Rec] ⚠️ hasResponses=false for ${category} — all ${categoryQuestions.length} questions had no matching options. Using static fallback.`);
         console.warn(`[AI Rec] state.answers keys:`, Object.keys(state.answers));
-        const staticRecs = generateRecommendations(scores);
-        return staticRecs.find(r => r.category === category);
+        return null;
     }
     
     console.log(`[AI Rec] hasResponses=true for ${category}, proceeding to API call...`);
@@ -2041,18 +2058,124 @@ FORMATTING RULES:
 - Stay tightly focused on the ONE dimension being assessed
 - Total: 300-450 words. Hard cap. Count your words. If over 450, delete sentences until you're under.`;
     
-    // API call with retry logic (prevents transient failures from killing the recommendation)
-    const MAX_RETRIES = 2;
-    const requestBody = JSON.stringify({
-        rapid_openai: "$res:u/VinceDeFreitas/rapid_openai",
+    return {
         messages: [
             { role: 'system', content: systemMessage },
             { role: 'user', content: prompt }
         ],
+        maturity: maturity
+    };
+}
+
+/**
+ * Build Recommendation Payload
+ * Compact alternative to buildSingleRecommendationMessages: the Windmill proxy
+ * renders the same messages from this with its versioned prompt templates, so
+ * the multi-kilobyte system prompt is not sent on every call.
+ * Only call for categories where hasCategoryResponses is true.
+ * @returns {Object} { category, profile, scores, nuance, responses }
+ */
+function buildRecommendationPayload(category, scores) {
+    const { jobTitle, team, subDepartment, jobLevel, aiFrequency, aiToolsUsed, workFocus } = state.userContext;
+    
+    // Selected values per question, read from scores.questionNuance like the full prompt
+    const responses = {};
+    state.questions.filter(q => q.category === category).forEach(question => {
+        const nuanceData = scores.questionNuance[question.id];
+        if (nuanceData && nuanceData.values.length > 0) {
+            responses[question.id] = nuanceData.values;
+        }
+    });
+    
+    const categoryNuanceData = scores.categoryNuance[category] || {};
+    return {
+        category: category,
+        profile: { jobTitle, team, subDepartment, jobLevel, aiFrequency, aiToolsUsed, workFocus },
+        scores: {
+            score: scores.categories[category],
+            maturity: scores.categoryMaturities[category],
+            hasNotStarted: scores.hasNotStarted,
+            categoryMaturities: scores.hasNotStarted ? scores.categoryMaturities : undefined
+        },
+        nuance: {
+            multiSelectCount: categoryNuanceData.multiSelectCount || 0,
+            totalQuestions: categoryNuanceData.totalQuestions || 0
+        },
+        responses: responses
+    };
+}
+
+/**
+ * Check whether a category has at least one answer matching a question option,
+ * the same test buildSingleRecommendationMessages applies before building a prompt
+ */
+function hasCategoryResponses(category, scores) {
+    return state.questions.some(question => {
+        if (question.category !== category) return false;
+        const nuanceData = scores.questionNuance[question.id];
+        const answers = nuanceData ? nuanceData.values : [];
+        return answers.some(value => question.options.some(opt => opt.value == value));
+    });
+}
+
+/**
+ * Check whether the server-rendered prompt templates should be used
+ */
+function useServerPrompts() {
+    return typeof CONFIG !== 'undefined' && Boolean(CONFIG.USE_SERVER_PROMPTS);
+}
+
+/**
+ * Check whether the AI returned an error message instead of a recommendation
+ */
+function isInvalidRecommendationText(text) {
+    return text.includes("essential information is missing") || 
+        text.includes("Could you please provide");
+}
+
+/**
+ * Generate Single AI Recommendation
+ * Generates one recommendation for a specific category
+ */
+async function generateSingleRecommendation(category, scores) {
+    console.log(`[AI Rec] generateSingleRecommendation called for: ${category}`);
+    
+    // Check if CONFIG exists and Windmill is configured
+    if (!isAIRecommendationsEnabled()) {
+        console.log(`[AI Rec] ⚠️ CONFIG not available or AI disabled for ${category}`);
+        const staticRecs = generateRecommendations(scores);
+        return staticRecs.find(r => r.category === category);
+    }
+    
+    const built = buildSingleRecommendationMessages(category, scores);
+    if (!built) {
+        const staticRecs = generateRecommendations(scores);
+        return staticRecs.find(r => r.category === category);
+    }
+    const { messages, maturity } = built;
+    
+    // API call with retry logic (prevents transient failures from killing the recommendation)
+    const MAX_RETRIES = 2;
+    const requestBody = JSON.stringify({
+        rapid_openai: "$res:u/VinceDeFreitas/rapid_openai",
+        messages: messages,
         model: CONFIG.OPENAI_MODEL,
         max_tokens: CONFIG.OPENAI_MAX_TOKENS,
-        temperature: CONFIG.OPENAI_TEMPERATURE
+        temperature: CONFIG.OPENAI_TEMPERATURE,
+        deadline_ms: CONFIG.RECOMMENDATION_DEADLINE_MS,
+        validate: true
     });
+    // First attempt sends the compact payload; retries fall back to full messages
+    // in case the deployed proxy predates the prompt templates
+    const compactRequestBody = useServerPrompts() ? JSON.stringify({
+        rapid_openai: "$res:u/VinceDeFreitas/rapid_openai",
+        prompt: buildRecommendationPayload(category, scores),
+        prompt_version: CONFIG.PROMPT_TEMPLATE_VERSION,
+        model: CONFIG.OPENAI_MODEL,
+        max_tokens: CONFIG.OPENAI_MAX_TOKENS,
+        temperature: CONFIG.OPENAI_TEMPERATURE,
+        deadline_ms: CONFIG.RECOMMENDATION_DEADLINE_MS
+    }) : null;
     
     for (let attempt = 0; attempt <= MAX_RETRIES; attempt++) {
         try {
@@ -2060,15 +2183,17 @@ FORMATTING RULES:
                 console.log(`[AI Rec] Retry ${attempt}/${MAX_RETRIES} for ${category}...`);
                 await sleep(2000 * attempt);
             }
+            const body = attempt === 0 && compactRequestBody ? compactRequestBody : requestBody;
             
             console.log(`[AI Rec] Calling Windmill for ${category} (attempt ${attempt + 1}/${MAX_RETRIES + 1})...`);
+            const requestStarted = performance.now();
             const response = await fetch(CONFIG.WINDMILL_ENDPOINT, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                     'Authorization': `Bearer ${CONFIG.WINDMILL_TOKEN}`
                 },
-                body: requestBody
+                body: body
             });
             
             if (!response.ok) {
@@ -2081,6 +2206,14 @@ FORMATTING RULES:
             const data = await response.json();
             console.log(`[AI Rec] Windmill response for ${category}:`, { success: data.success, hasResponse: !!data.response, hasContent: !!data.content, hasError: !!data.error });
             
+            // The proxy already retried with backoff (or its circuit breaker is open),
+            // so retrying from here would only add load - show the static content
+            if (data.fallback === 'static') {
+                console.warn(`[AI Rec] Proxy asked for static fallback for ${category} (retry after ${data.retry_after}s):`, data.error);
+                const staticRecs = generateRecommendations(scores);
+                return staticRecs.find(r => r.category === category);
+            }
+            
             // Handle Windmill response format from Python script
             let recommendationText;
             if (data.success && data.response) {
@@ -2102,16 +2235,19 @@ FORMATTING RULES:
                 throw new Error('Unexpected response format from Windmill');
             }
             
-            // Check if the AI returned an error message instead of a recommendation
-            if (recommendationText.includes("essential information is missing") || 
-                recommendationText.includes("Could you please provide")) {
+            // The proxy validates and retries bad generations itself (data.quality);
+            // only check here if the deployed proxy predates that
+            if (!data.quality && isInvalidRecommendationText(recommendationText)) {
                 console.warn(`[AI Rec] AI returned error message for ${category}`);
                 if (attempt < MAX_RETRIES) continue;
                 const staticRecs = generateRecommendations(scores);
                 return staticRecs.find(r => r.category === category);
             }
             
-            console.log(`[AI Rec] ✅ Successfully generated AI recommendation for ${category} (${recommendationText.length} chars)`);
+            const quality = data.quality ? `, ${data.quality.verdict} after ${data.quality.attempts} attempt(s)` : '';
+            console.log(`[AI Rec] ✅ Successfully generated AI recommendation for ${category} (${recommendationText.length} chars${quality})`);
+            // Round trip vs time spent inside the proxy: the difference is Windmill queueing and network
+            console.log(`[AI Rec] Timing for ${category}: ${Math.round(performance.now() - requestStarted)} ms round trip`, data.timings || {});
             return {
                 category: category,
                 maturity: maturity,
@@ -2130,6 +2266,88 @@ FORMATTING RULES:
     }
 }
 
+/**
+ * Generate Batch AI Recommendations
+ * Requests several categories in one Windmill job; the proxy runs them concurrently
+ * @param {Array<string>} categories - Category names to generate
+ * @returns {Object} Map of category name to recommendation (missing entries failed
+ *                   and should fall back to generateSingleRecommendation; entries
+ *                   the proxy marked for fallback hold static content)
+ */
+async function generateBatchRecommendations(categories, scores) {
+    const recommendations = {};
+    if (!isAIRecommendationsEnabled()) return recommendations;
+    
+    // The compact path skips building the full messages (the system prompt
+    // alone is tens of kilobytes per category) and only checks for responses
+    const batch = [];
+    const maturities = {};
+    categories.forEach(category => {
+        if (useServerPrompts()) {
+            if (!hasCategoryResponses(category, scores)) return;
+            batch.push({ id: category, prompt: buildRecommendationPayload(category, scores) });
+            maturities[category] = scores.categoryMaturities[category];
+        } else {
+            const built = buildSingleRecommendationMessages(category, scores);
+            if (!built) return;
+            batch.push({ id: category, messages: built.messages });
+            maturities[category] = built.maturity;
+        }
+    });
+    if (batch.length === 0) return recommendations;
+    
+    try {
+        console.log(`[AI Rec] Calling Windmill batch for ${batch.length} categories...`);
+        const response = await fetch(CONFIG.WINDMILL_ENDPOINT, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Authorization': `Bearer ${CONFIG.WINDMILL_TOKEN}`
+            },
+            body: JSON.stringify({
+                rapid_openai: "$res:u/VinceDeFreitas/rapid_openai",
+                batch: batch,
+                prompt_version: CONFIG.PROMPT_TEMPLATE_VERSION,
+                model: CONFIG.OPENAI_MODEL,
+                max_tokens: CONFIG.OPENAI_MAX_TOKENS,
+                temperature: CONFIG.OPENAI_TEMPERATURE,
+                deadline_ms: CONFIG.RECOMMENDATION_DEADLINE_MS,
+                validate: true
+            })
+        });
+        
+        if (!response.ok) {
+            console.error(`[AI Rec] Windmill batch API ${response.status}`);
+            return recommendations;
+        }
+        
+        const data = await response.json();
+        let staticRecs = null;
+        (data.results || []).forEach(item => {
+            if (item.fallback === 'static') {
+                // Upstream is overloaded; don't follow up with per-category calls
+                staticRecs = staticRecs || generateRecommendations(scores);
+                const staticRec = staticRecs.find(r => r.category === item.id);
+                if (staticRec) recommendations[item.id] = staticRec;
+                console.warn(`[AI Rec] Batch item for ${item.id} fell back to static content:`, item.error);
+            } else if (item.success && item.response && (item.quality || !isInvalidRecommendationText(item.response))) {
+                recommendations[item.id] = {
+                    category: item.id,
+                    maturity: maturities[item.id],
+                    text: item.response
+                };
+            } else {
+                console.warn(`[AI Rec] Batch item failed for ${item.id}:`, item.error || 'invalid recommendation text');
+            }
+        });
+        console.log(`[AI Rec] ✅ Batch returned ${Object.keys(recommendations).length}/${batch.length} recommendations in ${data.elapsed_ms} ms`);
+    } catch (error) {
+        console.error('[AI Rec] Batch request failed, falling back to per-category calls:', error.message);
+    }
+    
+    return recommendations;
+}
+
 /**
  * Generate AI-Powered Recommendations Sequentially
  * Generates recommendations one at a time with callback for progressive rendering
@@ -2152,10 +2370,11 @@ async function generateAIRecommendations(scores, onRecommendationReady) {
     
     const categories = ['Delegation', 'Communication', 'Discernment', 'Keeping It Twilio'];
     const recommendations = [];
+    const batched = CONFIG.USE_BATCH_RECOMMENDATIONS ? await generateBatchRecommendations(categories, scores) : {};
     
     for (const category of categories) {
         console.log(`Generating recommendation for ${category}...`);
-        const recommendation = await generateSingleRecommendation(category, scores);
+        const recommendation = batched[category] || await generateSingleRecommendation(category, scores);
         recommendations.push(recommendation);
         
         // Call the callback immediately with this recommendation
@@ -2281,6 +2500,7 @@ async function logAssessmentResponse(scores) {
         // Prepare anonymous response data
         const responseData = {
             timestamp: new Date().toISOString(),
+            submissionKey: getSubmissionKey(),
             
             // User demographics (no personally identifiable information)
             team: state.userContext.team,
@@ -2513,30 +2733,40 @@ function renderResults(scores, recommendations) {
     tabsContainer.appendChild(tabsContent);
     combinedResultsEl.appendChild(tabsContainer);
     
+    // Show the loading spinner in a tab's recommendation container
+    function showRecommendationLoading(category, recContainer) {
+        recContainer.innerHTML = `
+            <div class="loading-recommendation">
+                <div class="loading-spinner"></div>
+                <p>Generating personalized recommendations for ${category}...</p>
+            </div>
+        `;
+    }
+    
     // Simple async function for generating a single tab's recommendation
-    async function generateRecommendationForTab(category, tabPanel) {
+    // (precomputed: recommendation already fetched by the batch request, if any)
+    async function generateRecommendationForTab(category, tabPanel, precomputed) {
         // Check if already generated
         if (tabPanel.dataset.generated === 'true') {
             return;
         }
         
+        // A batch request for this tab is still in flight; generateAllTabs fills it in
+        if (tabPanel.dataset.generated === 'batch') {
+            return;
+        }
+        
         const recContainer = document.getElementById(`rec-${category}`);
         if (!recContainer) {
             console.error(`[AI Rec] Container not found for category: ${category}`);
             return;
         }
         
-        // Show loading state
-        recContainer.innerHTML = `
-            <div class="loading-recommendation">
-                <div class="loading-spinner"></div>
-                <p>Generating personalized recommendations for ${category}...</p>
-            </div>
-        `;
+        showRecommendationLoading(category, recContainer);
         
         try {
             console.log(`[AI Rec] Starting generation for ${category}...`);
-            const recommendation = await generateSingleRecommendation(category, scores);
+            const recommendation = precomputed || await generateSingleRecommendation(category, scores);
             if (recommendation && recommendation.text) {
                 const isAI = recommendation.text.length > 200;
                 console.log(`[AI Rec] ${category} complete (${isAI ? 'AI' : 'STATIC'}, ${recommendation.text.length} chars)`);
@@ -2604,14 +2834,29 @@ function renderResults(scores, recommendations) {
         });
     });
     
-    // Auto-generate ALL tabs sequentially on page load
-    // Sequential (not parallel) to avoid overwhelming the Windmill API
+    // Auto-generate ALL tabs on page load
+    // With batching enabled, one Windmill job generates every tab concurrently;
+    // otherwise tabs are generated sequentially to avoid overwhelming the Windmill API
     (async function generateAllTabs() {
-        console.log('[AI Rec] Starting sequential generation of all tabs...');
+        let batched = {};
+        if (typeof CONFIG !== 'undefined' && CONFIG.USE_BATCH_RECOMMENDATIONS) {
+            console.log('[AI Rec] Starting batch generation of all tabs...');
+            const pendingPanels = Array.from(document.querySelectorAll('.tab-panel'))
+                .filter(panel => panel.dataset.generated !== 'true');
+            pendingPanels.forEach(panel => {
+                panel.dataset.generated = 'batch';
+                showRecommendationLoading(panel.dataset.category, document.getElementById(`rec-${panel.dataset.category}`));
+            });
+            batched = await generateBatchRecommendations(pendingPanels.map(panel => panel.dataset.category), scores);
+            // Failed items fall through to a per-category request below
+            pendingPanels.forEach(panel => { panel.dataset.generated = 'false'; });
+        } else {
+            console.log('[AI Rec] Starting sequential generation of all tabs...');
+        }
         for (const category of state.categories) {
             const panel = document.querySelector(`.tab-panel[data-category="${category.name}"]`);
             if (panel && panel.dataset.generated !== 'true') {
-                await generateRecommendationForTab(category.name, panel);
+                await generateRecommendationForTab(category.name, panel, batched[category.name]);
             }
         }
         console.log('[AI Rec] All tabs generation complete.');
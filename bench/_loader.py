@@ -0,0 +1,31 @@
+"""
+Load the Windmill scripts as modules for local benchmarking.
+
+The scripts are deployed by copy-paste and several have hyphenated file
+names, so they cannot be imported normally.
+"""
+
+import contextlib
+import importlib.util
+import io
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_script(filename: str, module_name: str = None):
+    """Import a repo-root script by file name and return the module"""
+    module_name = module_name or Path(filename).stem.replace("-", "_").lower()
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, REPO_ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def quiet():
+    """Context manager that swallows the scripts' execution-log prints"""
+    return contextlib.redirect_stdout(io.StringIO())
@@ -0,0 +1,151 @@
+"""
+Benchmark: cohort rollup queries vs on-the-fly aggregation.
+
+Loads synthetic submissions into assessment_responses with the rollup
+triggers from windmill-cohort-rollups.py installed, checks that the
+rollups match a direct aggregation of the responses, and then times cohort
+queries (team x job level x quarter) both ways. Also reports the per-insert
+cost the triggers add.
+
+Point it at a THROWAWAY database — both tables are truncated at the start:
+
+    createdb assessment_bench
+    python bench/cohort_rollups.py --dbname assessment_bench --rows 50000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from _loader import load_script
+from synthetic import LEVELS, TEAMS, make_submission
+
+QUARTERS = [("2026-01-01", "2026-04-01"), ("2026-04-01", "2026-07-01")]
+
+
+def direct_query(cur, rollups, team: str, job_level: str, since: str, until: str) -> dict:
+    """The same numbers as query_cohort, aggregated from the raw responses"""
+    levels = rollups.MATURITY_LEVELS
+    histogram = lambda column: ", ".join(f"count(*) FILTER (WHERE {column} = '{level}')" for level in levels)
+    categories = list(rollups.CATEGORY_COLUMNS)
+    cur.execute(
+        f"""
+        SELECT count(*), count(*) FILTER (WHERE has_not_started), avg(overall_score),
+               {histogram('overall_maturity')},
+               {', '.join(f"avg({col}_score)" for col in rollups.CATEGORY_COLUMNS.values())},
+               {', '.join(histogram(f"category_maturities->>'{c}'") for c in categories)}
+        FROM assessment_responses
+        WHERE team = %s AND job_level = %s AND timestamp >= %s AND timestamp < %s
+        """,
+        (team, job_level, since, until)
+    )
+    row = list(cur.fetchone())
+    n = len(levels)
+    respondents, not_started, overall_mean = row[:3]
+    overall_hist, row = row[3:3 + n], row[3 + n:]
+    means, row = row[:len(categories)], row[len(categories):]
+    return {
+        "respondents": respondents,
+        "notStarted": not_started,
+        "overall": {
+            "mean": round(float(overall_mean), 2) if respondents else None,
+            "distribution": dict(zip(levels, overall_hist))
+        },
+        "categories": {
+            c: {
+                "mean": round(float(means[i]), 2) if respondents else None,
+                "distribution": dict(zip(levels, row[i * n:(i + 1) * n]))
+            }
+            for i, c in enumerate(categories)
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbname", required=True)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--inserts", type=int, default=300)
+    args = parser.parse_args()
+
+    pipeline = load_script("windmill-logging-pipeline.py")
+    rollups = load_script("windmill-cohort-rollups.py")
+    resource = {
+        "host": args.host, "port": args.port, "user": args.user,
+        "password": args.password or None, "dbname": args.dbname, "sslmode": "disable"
+    }
+    sink = pipeline.PostgresSink(resource)
+    pool = sink.get_pool()
+    conn = pool.getconn()
+    conn.autocommit = False
+
+    rng = random.Random(12)
+    submissions = [make_submission(rng) for _ in range(args.rows)]
+    probes = [make_submission(rng) for _ in range(args.inserts)]
+
+    # Single-row insert cost without and with the rollup triggers
+    with conn, conn.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS assessment_cohort_rollups CASCADE")
+        cur.execute("DROP FUNCTION IF EXISTS assessment_rollup_insert, assessment_rollup_update, "
+                    "assessment_rollup_delete CASCADE")
+        cur.execute("TRUNCATE assessment_responses")
+    insert_ms = {}
+    for label in ("no rollups", "with rollups"):
+        if label == "with rollups":
+            with conn, conn.cursor() as cur:
+                rollups.install_rollups(cur)
+        timings = []
+        for s in probes:
+            start = time.perf_counter()
+            sink.insert([s])
+            timings.append(time.perf_counter() - start)
+        insert_ms[label] = statistics.median(timings) * 1000
+        with conn, conn.cursor() as cur:
+            cur.execute("TRUNCATE assessment_responses, assessment_cohort_rollups"
+                        if label == "with rollups" else "TRUNCATE assessment_responses")
+
+    start = time.perf_counter()
+    sink.copy(submissions)
+    load_seconds = time.perf_counter() - start
+
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM assessment_cohort_rollups")
+        cohort_rows = cur.fetchone()[0]
+        start = time.perf_counter()
+        rollups.rebuild_rollups(cur)
+        rebuild_seconds = time.perf_counter() - start
+
+    cohorts = [(rng.choice(TEAMS), rng.choice(LEVELS), *rng.choice(QUARTERS)) for _ in range(args.queries)]
+    rollup_times, direct_times = [], []
+    with conn, conn.cursor() as cur:
+        for team, level, since, until in cohorts:
+            start = time.perf_counter()
+            from_rollups = rollups.query_cohort(cur, team=team, job_level=level, since=since, until=until)
+            rollup_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            direct = direct_query(cur, rollups, team, level, since, until)
+            direct_times.append(time.perf_counter() - start)
+
+            from_rollups.pop("rollupRows")
+            assert from_rollups == direct, (team, level, since, from_rollups, direct)
+    pool.putconn(conn)
+
+    print(f"rows {args.rows}, cohort rollup rows {cohort_rows}")
+    print(f"single insert (median)  no rollups {insert_ms['no rollups']:.2f} ms   "
+          f"with rollups {insert_ms['with rollups']:.2f} ms")
+    print(f"COPY load with triggers {load_seconds:.2f} s   full rebuild {rebuild_seconds:.2f} s")
+    for label, timings in (("rollup query", rollup_times), ("direct aggregation", direct_times)):
+        print(f"{label:<19} mean {statistics.mean(timings) * 1000:7.2f} ms   "
+              f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:7.2f} ms")
+    print(f"✅ {len(cohorts)} cohort queries matched direct aggregation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: cold-start cost of each Windmill script.
+
+Starts a fresh interpreter per sample (like a cold Windmill worker), loads
+the script and makes its first main() call, and reports the median import
+time, first-call time and which heavy dependencies were imported along the
+way. The proxy is measured on a disk-cache hit (answered without going
+upstream) and on a first live call against a local fake OpenAI; the
+logging pipeline with the stdout sink alone, with stdout and file, and with
+the Sheets sink on a spooled submission. Startup cost can be tracked across
+changes with --save-baseline / --compare, as in load_suite.py.
+
+    python bench/cold_start.py --samples 7
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+from synthetic import make_submission
+
+HEAVY_MODULES = ["requests", "urllib3", "googleapiclient", "google.oauth2", "psycopg2", "numpy"]
+# Import regressions smaller than this are noise
+MIN_REGRESSION_MS = 5.0
+
+# Runs in the child interpreter: {setup} configures the module `m`, {call} is
+# the first main() call (or None to only import)
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from _loader import load_script, quiet
+m = load_script({script!r})
+imported = time.perf_counter()
+{setup}
+with quiet():
+    result = {call}
+done = time.perf_counter()
+assert result is None or result.get("success"), result
+print("RESULT", json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_call_ms": (done - imported) * 1000,
+    "heavy": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+
+def scenarios(tmp: str, upstream_url: str) -> dict:
+    submission = make_submission(random.Random(23))
+    # Every sample logs the same submission, so each child gets a fresh
+    # in-memory dedupe index (a file would mark samples 2+ as duplicates)
+    cache_db = os.path.join(tmp, "cache.sqlite")
+    messages = [{"role": "user", "content": "cold start"}]
+    return {
+        "proxy (cache hit)": ("WINDMILL_SCRIPT.py", f"m.CACHE_DB_PATH = {cache_db!r}",
+                              f"m.main({{'api_key': 't'}}, {messages!r})"),
+        "proxy (live call)": ("WINDMILL_SCRIPT.py", "",
+                              f"m.main({{'api_key': 't', 'api_url': {upstream_url!r}}}, {messages!r}, use_cache=False)"),
+        "log (stdout)": ("windmill-logging-pipeline.py",
+                         "m.ENABLED_SINKS = ['stdout']; m.DEDUPE_PATH = ':memory:'",
+                         f"m.main(**{submission!r})"),
+        "log (stdout, file)": ("windmill-logging-pipeline.py",
+                               f"m.LOG_FILE_PATH = {os.path.join(tmp, 'log.jsonl')!r}; m.DEDUPE_PATH = ':memory:'",
+                               f"m.main(**{submission!r})"),
+        "log (sheets, spooled)": ("windmill-logging-pipeline.py",
+                                  f"m.ENABLED_SINKS = ['stdout', 'sheets']; "
+                                  f"m.SPOOL_PATH = {os.path.join(tmp, 'spool.sqlite')!r}; m.DEDUPE_PATH = ':memory:'",
+                                  f"m.main(**{submission!r})")
+    }
+
+
+def sample(script: str, setup: str, call: str) -> dict:
+    code = CHILD.format(script=script, setup=setup, call=call, heavy=HEAVY_MODULES)
+    bench_dir = os.path.dirname(os.path.abspath(__file__))
+    out = subprocess.run([sys.executable, "-c", code], cwd=bench_dir, capture_output=True, text=True)
+    # Background threads (e.g. the spool drainer) may print after the result
+    lines = [l for l in out.stdout.splitlines() if l.startswith("RESULT ")]
+    if out.returncode or not lines:
+        raise RuntimeError(f"{script} failed:\n{out.stdout[-2000:]}{out.stderr[-2000:]}")
+    return json.loads(lines[0][len("RESULT "):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=7)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help=f"allowed relative import-time growth (and at least {MIN_REGRESSION_MS:g} ms)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenAI(latency=0.05) as upstream:
+        # Prime the disk cache the cache-hit scenario reads
+        proxy = load_script("WINDMILL_SCRIPT.py")
+        proxy.CACHE_DB_PATH = os.path.join(tmp, "cache.sqlite")
+        with quiet():
+            proxy.main({"api_key": "t", "api_url": upstream.url}, [{"role": "user", "content": "cold start"}])
+
+        print(f"{'scenario':24} {'import ms':>10} {'first call ms':>14}   heavy modules loaded")
+        for name, (script, setup, call) in scenarios(tmp, upstream.url).items():
+            runs = [sample(script, setup, call) for _ in range(args.samples)]
+            results[name] = {
+                "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+                "first_call_ms": round(statistics.median(r["first_call_ms"] for r in runs), 1),
+                "heavy": runs[-1]["heavy"]
+            }
+            r = results[name]
+            print(f"{name:24} {r['import_ms']:10.1f} {r['first_call_ms']:14.1f}   {', '.join(r['heavy']) or '-'}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{name} import {baseline[name]['import_ms']} -> {r['import_ms']} ms"
+            for name, r in results.items()
+            if name in baseline
+            and r["import_ms"] > baseline[name]["import_ms"] * (1 + args.tolerance)
+            and r["import_ms"] - baseline[name]["import_ms"] > MIN_REGRESSION_MS
+        ]
+        if regressions:
+            sys.exit("Regressions: " + "; ".join(regressions))
+        print("no import-time regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: columnar export vs parsing JSONB responses.
+
+Builds a windmill-export-columnar.py export from synthetic rows (shaped like
+the assessment_responses query), then compares loading the per-question
+answers for the whole history from the JSON text against memory-mapping the
+export, scoring both with the re-scoring engine and requiring identical
+results. Also reports export size and incremental-append speed.
+
+    python bench/columnar_export.py --rows 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from _loader import load_script
+from synthetic import make_submission
+
+
+def make_rows(rng: random.Random, count: int, first_id: int, exporter) -> list:
+    rows = []
+    for offset in range(count):
+        s = make_submission(rng)
+        values = {
+            'id': first_id + offset,
+            'timestamp': datetime.fromisoformat(s['timestamp']).replace(tzinfo=None),
+            'has_not_started': s['hasNotStarted'],
+            'overall_score': round(s['overallScore'], 2),
+            'team': s['team'],
+            'sub_department': s['subDepartment'],
+            'job_level': s['jobLevel'],
+            'overall_maturity': s['overallMaturity'],
+            'responses': s['responses']
+        }
+        for category, col in exporter.CATEGORY_COLUMNS.items():
+            values[f'{col}_score'] = round(s['categoryScores'][category], 2)
+            values[f'{col}_maturity'] = s['categoryMaturities'][category]
+        rows.append(tuple(values[name] for name in exporter.SOURCE_COLUMNS))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--append", type=int, default=1000)
+    args = parser.parse_args()
+
+    exporter = load_script("windmill-export-columnar.py")
+    engine = load_script("windmill-rescore-responses.py")
+    question_ids = [qid for qid, _ in engine.QUESTIONS]
+
+    rng = random.Random(13)
+    rows = make_rows(rng, args.rows, 1, exporter)
+    response_index = exporter.SOURCE_COLUMNS.index('responses')
+    json_text = [json.dumps(row[response_index]) for row in rows]
+    export_dir = tempfile.mkdtemp(prefix="assessment_export_")
+
+    start = time.perf_counter()
+    for i in range(0, len(rows), exporter.EXPORT_BATCH_SIZE):
+        exporter.append_rows(export_dir, rows[i:i + exporter.EXPORT_BATCH_SIZE])
+    export_seconds = time.perf_counter() - start
+
+    # Current approach: parse every row's JSON
+    start = time.perf_counter()
+    parsed = engine.answers_matrix([json.loads(text) for text in json_text])
+    from_json = engine.score_matrix(parsed)
+    json_seconds = time.perf_counter() - start
+
+    # Columnar: memory-map the export
+    start = time.perf_counter()
+    export = exporter.ColumnarExport(export_dir)
+    peaks = export.peak_values(question_ids)
+    from_export = engine.score_matrix(peaks)
+    columnar_seconds = time.perf_counter() - start
+
+    assert np.array_equal(parsed, peaks)
+    for key in from_json:
+        assert np.array_equal(from_json[key], from_export[key]), key
+    assert list(export.decode('team')[:100]) == [row[exporter.SOURCE_COLUMNS.index('team')] for row in rows[:100]]
+
+    extra = make_rows(rng, args.append, args.rows + 1, exporter)
+    start = time.perf_counter()
+    exporter.append_rows(export_dir, extra)
+    append_seconds = time.perf_counter() - start
+    assert exporter.ColumnarExport(export_dir).rows == args.rows + args.append
+
+    json_bytes = sum(len(text) for text in json_text)
+    question_bytes = sum(os.path.getsize(os.path.join(export_dir, f"q_{q}.bin")) for q in question_ids)
+    total_bytes = sum(os.path.getsize(os.path.join(export_dir, f)) for f in os.listdir(export_dir))
+
+    print(f"rows {args.rows}: export {export_seconds:.2f} s ({args.rows / export_seconds:,.0f} rows/s)")
+    print(f"load + score answers   JSON parse {json_seconds * 1000:8.1f} ms   "
+          f"columnar {columnar_seconds * 1000:8.1f} ms")
+    print(f"per-question answers   JSON {json_bytes / 1e6:7.1f} MB   columnar {question_bytes / 1e6:7.1f} MB   "
+          f"(whole export {total_bytes / 1e6:.1f} MB)")
+    print(f"append {args.append} rows       {append_seconds * 1000:.1f} ms")
+    print("✅ columnar and JSON answers scored identically")
+
+
+if __name__ == "__main__":
+    main()
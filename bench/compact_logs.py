@@ -0,0 +1,120 @@
+"""
+Benchmark: compact, sampled execution-log records vs pretty-printed dumps.
+
+Logs synthetic submissions through windmill-logging-pipeline.py's stdout
+sink with LOG_FORMAT "pretty" (the banner plus indented JSON) and "compact"
+(one JSON line, LOG_FIELDS only, full responses sampled), to stdout and to
+a rotating LOG_PATH file. Reports
+bytes and log lines per submission and per-call time, and checks that every
+compact record still carries enough to rebuild the submission's responses
+and, with windmill-rescore-responses.py, its category scores and maturities.
+
+    python bench/compact_logs.py --submissions 2000 --sample-rate 0.05
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import random
+import tempfile
+import time
+
+from _loader import load_script
+from synthetic import make_submission
+
+
+class CountingStream:
+    """stdout stand-in that keeps only what was written (lines and bytes)"""
+
+    def __init__(self):
+        self.lines = []
+        self.bytes = 0
+
+    def write(self, text: str) -> int:
+        self.lines.append(text)
+        self.bytes += len(text.encode())
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run(log, submissions: list) -> tuple:
+    """(bytes and lines per submission, microseconds per call, captured output) with stdout captured"""
+    stream = CountingStream()
+    with contextlib.redirect_stdout(stream):
+        start = time.perf_counter()
+        for submission in submissions:
+            log(submission)
+        elapsed = time.perf_counter() - start
+    output = "".join(stream.lines)
+    return (stream.bytes / len(submissions), output.count("\n") / len(submissions),
+            elapsed / len(submissions) * 1e6, output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--sample-rate", type=float, default=0.05)
+    parser.add_argument("--rotate-kb", type=int, default=256,
+                        help="LOG_MAX_BYTES for the rotating-file run")
+    args = parser.parse_args()
+
+    rng = random.Random(25)
+    submissions = [make_submission(rng) for _ in range(args.submissions)]
+    pipeline = load_script("windmill-logging-pipeline.py")
+    engine = load_script("windmill-rescore-responses.py")
+    log = pipeline.StdoutSink().write
+
+    print(f"{args.submissions} submissions, responses sampled at {args.sample_rate:.0%}")
+    print(f"{'sink':14} {'format':8} {'bytes/submission':>17} {'lines':>6} {'us/call':>9}")
+    pipeline.LOG_VERBOSE_SAMPLE_RATE = args.sample_rate
+    results = {}
+    for log_format in ("pretty", "compact"):
+        pipeline.LOG_FORMAT = log_format
+        random.seed(25)
+        results[log_format] = run(log, submissions)
+        size, lines, us, _ = results[log_format]
+        print(f"{'stdout':14} {log_format:8} {size:17.0f} {lines:6.1f} {us:9.1f}")
+    pretty, compact = results["pretty"], results["compact"]
+    print(f"{'':14} {'':8} {pretty[0] / compact[0]:16.1f}x {pretty[1] / compact[1]:5.0f}x "
+          f"{pretty[2] / compact[2]:8.1f}x smaller / faster")
+    output = compact[3]
+
+    records = [json.loads(line) for line in output.splitlines()]
+    assert len(records) == args.submissions
+    sampled = sum(1 for r in records if r.get("sampled"))
+    # Category and maturity follow from the question and value
+    for record, submission in zip(records, submissions):
+        rebuilt = {
+            question_id: {
+                "category": pipeline.QUESTION_CATEGORIES[question_id],
+                "value": value,
+                "maturity": pipeline._maturity_of_value(value)
+            }
+            for question_id, value in record["answers"].items()
+        }
+        assert rebuilt == submission["responses"], (rebuilt, submission["responses"])
+    for scored, submission in zip(engine.score_responses([r["answers"] for r in records]), submissions):
+        assert scored["categoryMaturities"] == submission["categoryMaturities"]
+        assert all(abs(scored["categories"][category] - score) < 1e-9
+                   for category, score in submission["categoryScores"].items())
+    print(f"{'':14} {sampled} records sampled with full responses; responses and category scores "
+          f"rebuilt from every record")
+
+    # Rotating file instead of stdout
+    with tempfile.TemporaryDirectory() as tmp:
+        pipeline.LOG_FORMAT = "compact"
+        pipeline.LOG_PATH = os.path.join(tmp, "assessment_responses.log")
+        pipeline.LOG_MAX_BYTES = args.rotate_kb * 1024
+        _, _, us, _ = run(log, submissions)
+        files = sorted(glob.glob(pipeline.LOG_PATH + "*"))
+        total = sum(os.path.getsize(f) for f in files)
+        print(f"rotating file  compact  {total / args.submissions:17.0f} {'':6} {us:9.1f}   "
+              f"{len(files)} files (max {pipeline.LOG_BACKUP_COUNT} backups of {args.rotate_kb} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark: submission dedupe in windmill-logging-pipeline.py.
+
+Replays synthetic submissions with resends mixed in - the same
+submissionKey sent again (a double submit or retried request from app.js)
+and keyless retries caught by the content-derived key - through main() with
+the file and Sheets sinks, with DEDUPE_ENABLED off and on. Reports the
+sink writes and Sheets rows saved, the latency of a duplicate short-circuit
+vs a logged submission, the per-claim cost of the index, and checks that a
+fresh index over the same file (a restarted worker) still knows the keys
+and that a resend after a failed Sheets write reaches Sheets (and only
+Sheets).
+
+    python bench/dedupe.py --submissions 300 --resend-rate 0.3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from google.auth.credentials import AnonymousCredentials
+
+from _loader import load_script, quiet
+from fakes import FakeSheets
+from synthetic import make_submission
+
+
+def traffic(rng: random.Random, count: int, resend_rate: float, keyless_rate: float) -> list:
+    """(submission kwargs, is_resend) in arrival order; a resend follows its original within a few calls"""
+    events = []
+    for i in range(count):
+        submission = make_submission(rng)
+        if rng.random() >= keyless_rate:
+            submission["submissionKey"] = str(uuid.UUID(int=rng.getrandbits(128)))
+        events.append((i, submission, False))
+        if rng.random() < resend_rate:
+            events.append((i + rng.uniform(0.5, 3), dict(submission), True))
+    return [(submission, resend) for _, submission, resend in sorted(events, key=lambda e: e[0])]
+
+
+def replay(calls: list, dedupe: bool, latency: float, concurrency: int, tmp: str) -> dict:
+    pipeline = load_script("windmill-logging-pipeline.py")
+    pipeline.DEDUPE_ENABLED = dedupe
+    pipeline.DEDUPE_PATH = os.path.join(tmp, f"dedupe-{dedupe}.sqlite")
+    # Rows are counted right after the replay, so Sheets is written in the request
+    pipeline.SPOOL_ENABLED = False
+    pipeline.BUFFER_ENABLED = False
+    log_path = os.path.join(tmp, f"responses-{dedupe}.jsonl")
+
+    with FakeSheets(latency=latency) as fake:
+        pipeline.register_sink(pipeline.FileSink(log_path))
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        pipeline.ENABLED_SINKS = ["stdout", "file", "sheets"]
+
+        def one(call):
+            start = time.perf_counter()
+            result = pipeline.main(**call[0])
+            return time.perf_counter() - start, result
+
+        with quiet(), ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(one, calls))
+        assert all(r["success"] for _, r in outcomes), [r for _, r in outcomes if not r["success"]][:1]
+
+        with open(log_path) as f:
+            file_lines = sum(1 for _ in f)
+        return {
+            "pipeline": pipeline,
+            "outcomes": outcomes,
+            "sheets_requests": fake.requests,
+            "summary_rows": len(fake.rows["Summary"]),
+            "response_rows": len(fake.rows["Responses"]),
+            "file_lines": file_lines
+        }
+
+
+def resend_after_failure(tmp: str) -> tuple:
+    """(file lines, Summary rows) after a submission whose Sheets write failed is sent again"""
+    pipeline = load_script("windmill-logging-pipeline.py", "dedupe_resend")
+    pipeline.DEDUPE_PATH = os.path.join(tmp, "dedupe-resend.sqlite")
+    pipeline.SPOOL_ENABLED = False
+    pipeline.BUFFER_ENABLED = False
+    log_path = os.path.join(tmp, "responses-resend.jsonl")
+    pipeline.register_sink(pipeline.FileSink(log_path))
+    pipeline.ENABLED_SINKS = ["stdout", "file", "sheets"]
+    submission = {**make_submission(random.Random(7)), "submissionKey": str(uuid.uuid4())}
+
+    with FakeSheets() as fake:
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        fake.fail_rate = 1.0
+        with quiet():
+            first = pipeline.main(**submission)
+        assert first["success"] and not first["sinks"]["sheets"]["success"], first["sinks"]
+        fake.fail_rate = 0.0
+        with quiet():
+            second = pipeline.main(**submission)
+        assert not second.get("duplicate") and second["sinks"]["file"].get("duplicate"), second["sinks"]
+        with open(log_path) as f:
+            return sum(1 for _ in f), len(fake.rows["Summary"])
+
+
+def claim_cost(index_class, path: str, keys: int) -> tuple:
+    """Mean microseconds per first claim (file upsert) and per repeat claim (memory hit)"""
+    index = index_class(path)
+    names = [f"client:{uuid.uuid4()}" for _ in range(keys)]
+    start = time.perf_counter()
+    for name in names:
+        assert index.claim(name, 3600)
+    first = (time.perf_counter() - start) / keys * 1e6
+    start = time.perf_counter()
+    for name in names:
+        assert not index.claim(name, 3600)
+    repeat = (time.perf_counter() - start) / keys * 1e6
+    return first, repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--resend-rate", type=float, default=0.3,
+                        help="share of submissions sent a second time")
+    parser.add_argument("--keyless-rate", type=float, default=0.2,
+                        help="share of submissions without a submissionKey (older clients)")
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--claims", type=int, default=5000)
+    args = parser.parse_args()
+
+    calls = traffic(random.Random(24), args.submissions, args.resend_rate, args.keyless_rate)
+    resends = sum(1 for _, resend in calls if resend)
+    print(f"{len(calls)} calls: {args.submissions} submissions, {resends} resends")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        off = replay(calls, False, args.latency_ms / 1000, args.concurrency, tmp)
+        on = replay(calls, True, args.latency_ms / 1000, args.concurrency, tmp)
+
+        print(f"{'':12} {'file lines':>11} {'Sheets requests':>16} {'Summary rows':>13} {'Responses rows':>15}")
+        for name, r in (("dedupe off", off), ("dedupe on", on)):
+            print(f"{name:12} {r['file_lines']:11} {r['sheets_requests']:16} "
+                  f"{r['summary_rows']:13} {r['response_rows']:15}")
+        assert on["summary_rows"] == args.submissions, on["summary_rows"]
+        assert on["file_lines"] == args.submissions, on["file_lines"]
+        assert off["summary_rows"] == len(calls)
+
+        # Sinks are claimed one by one, so with concurrent callers the two
+        # copies of a pair can split the sinks between them; each sink still
+        # gets exactly one copy
+        duplicates = [t for t, r in on["outcomes"] if r.get("duplicate")]
+        logged = [t for t, r in on["outcomes"] if not r.get("duplicate")]
+        split = sum(1 for _, r in on["outcomes"]
+                    if not r.get("duplicate") and any(s.get("duplicate") for s in r["sinks"].values()))
+        assert len(duplicates) + split // 2 <= resends, (len(duplicates), split, resends)
+        print(f"resends      {len(duplicates)} acknowledged without writing, "
+              f"{split} calls shared the sinks with a concurrent copy")
+        stats = on["pipeline"].get_dedupe_index().snapshot()
+        print(f"dedupe stats {stats}")
+        print(f"latency      logged median {statistics.median(logged) * 1000:7.2f} ms   "
+              f"duplicate median {statistics.median(duplicates) * 1000:6.2f} ms")
+
+        # A restarted worker: a fresh index over the same file still knows every key
+        pipeline = on["pipeline"]
+        restarted = pipeline.DedupeIndex(pipeline.DEDUPE_PATH)
+        keys = [pipeline.sink_key(pipeline.submission_key(s, s.get("submissionKey", ""))[0], "sheets")
+                for s, resend in calls if not resend]
+        known = sum(1 for key in keys if not restarted.claim(key, 60))
+        assert known == len(keys), (known, len(keys))
+        print(f"restart      {known}/{len(keys)} keys recognised by a fresh index over the same file")
+
+        file_lines, summary_rows = resend_after_failure(tmp)
+        assert (file_lines, summary_rows) == (1, 1), (file_lines, summary_rows)
+        print(f"resend       after a failed Sheets write: {summary_rows} Summary row, "
+              f"{file_lines} file line (only the failed sink rewritten)")
+
+        first, repeat = claim_cost(pipeline.DedupeIndex, os.path.join(tmp, "claims.sqlite"), args.claims)
+        memory_only, _ = claim_cost(pipeline.DedupeIndex, None, args.claims)
+        print(f"claim cost   new key {first:6.1f} us (file)   {memory_only:5.1f} us (memory only)   "
+              f"repeat {repeat:5.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""
+Local stand-ins for the upstream services the Windmill scripts talk to.
+
+Each fake runs on 127.0.0.1 in a background thread and is used as a
+context manager:
+
+    with FakeOpenAI(latency=0.2) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class _FakeServer:
+    """Base class: threaded HTTP/1.1 server with keep-alive and counters"""
+
+    def __init__(self, handler_class, connect_delay: float = 0.0):
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        fake = self
+
+        class Handler(handler_class):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                # A new TCP connection: simulate the TLS handshake round trips
+                with fake._lock:
+                    fake.connections += 1
+                if fake.connect_delay:
+                    time.sleep(fake.connect_delay)
+                super().setup()
+
+            def log_message(self, format, *args):
+                pass
+
+        Handler.fake = fake
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _OpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        fake = self.fake
+        fake.count_request()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        rejection = fake.admit()
+        if rejection is not None:
+            status, headers, injected = rejection
+            if injected and fake.latency:
+                # An injected failure comes back after upstream did the work
+                time.sleep(fake.latency_for(body))
+            payload = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        latency = fake.latency_for(body)
+        if latency:
+            time.sleep(latency)
+        reply = fake.reply_for(body)
+        if body.get("stream"):
+            self._stream(fake, body, reply)
+            return
+        if fake.chunk_delay:
+            # A blocking completion still takes the full generation time
+            time.sleep(fake.chunk_delay * len(reply.split(" ")))
+        payload = json.dumps(fake.completion(body, reply)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, fake, body, reply):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in fake.stream_chunks(body, reply):
+                if fake.chunk_delay:
+                    time.sleep(fake.chunk_delay)
+                data = f"data: {chunk}\n\n".encode()
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up mid-stream (e.g. a cancelled hedge)
+            with fake._lock:
+                fake.abandoned_streams += 1
+            self.close_connection = True
+
+
+class FakeOpenAI(_FakeServer):
+    """
+    Minimal /v1/chat/completions stand-in
+
+    Args:
+        latency: Seconds to wait before answering each request
+        connect_delay: Seconds added to every new TCP connection
+        reply: Completion text returned for every request
+        replies: Completion texts to pick from at random instead of `reply`
+        chunk_delay: Seconds between streamed chunks (one chunk per word)
+        fail_rate: Fraction of requests rejected at random with fail_status
+            (after `latency`, like an upstream failing mid-request)
+        fail_status: Status code for injected failures (429 or a 5xx)
+        throttle_rate: Further fraction of requests rejected with 429 (on
+            top of fail_rate, so 5xx and 429s can be injected together)
+        capacity_rps: Requests per second accepted before answering 429
+            (a token bucket holding one second's worth); None for unlimited
+        retry_after: Retry-After seconds sent with injected 429s; None to
+            omit it (capacity 429s send retry-after-ms until the next token)
+        model_latency: Per-model latency overriding `latency`
+        slow_rate: Fraction of requests that take `slow_latency` instead
+            (a heavy tail)
+        latency_jitter: Spread latencies uniformly by this fraction either way
+    """
+
+    def __init__(self, latency: float = 0.0, connect_delay: float = 0.0,
+                 reply: str = "Hello! Yes, I'm working correctly.",
+                 chunk_delay: float = 0.0, fail_rate: float = 0.0, fail_status: int = 429,
+                 capacity_rps: float = None, retry_after: float = None, seed: int = 0,
+                 model_latency: dict = None, slow_rate: float = 0.0, slow_latency: float = 0.0,
+                 latency_jitter: float = 0.0, replies: list = None, throttle_rate: float = 0.0):
+        self.latency = latency
+        self.reply = reply
+        self.replies = replies
+        self.chunk_delay = chunk_delay
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.throttle_rate = throttle_rate
+        self.capacity_rps = capacity_rps
+        self.retry_after = retry_after
+        self.model_latency = model_latency or {}
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.latency_jitter = latency_jitter
+        self.rejected = 0
+        self.abandoned_streams = 0
+        self._rng = random.Random(seed)
+        self._tokens = capacity_rps or 0.0
+        self._refilled_at = time.monotonic()
+        super().__init__(_OpenAIHandler, connect_delay=connect_delay)
+
+    def latency_for(self, body: dict) -> float:
+        """Seconds to wait before answering this request"""
+        with self._lock:
+            slow = self.slow_rate and self._rng.random() < self.slow_rate
+            spread = 1 + self.latency_jitter * (2 * self._rng.random() - 1)
+        if slow:
+            return self.slow_latency
+        return self.model_latency.get(body.get("model"), self.latency) * spread
+
+    def reply_for(self, body: dict) -> str:
+        """Completion text for this request"""
+        if not self.replies:
+            return self.reply
+        with self._lock:
+            return self._rng.choice(self.replies)
+
+    def admit(self):
+        """None to serve the request, else (status, headers, injected) to reject it with"""
+        headers = {}
+        with self._lock:
+            status = None
+            roll = self._rng.random() if self.fail_rate or self.throttle_rate else 1.0
+            if roll < self.fail_rate + self.throttle_rate:
+                status = self.fail_status if roll < self.fail_rate else 429
+                if status == 429 and self.retry_after is not None:
+                    headers["Retry-After"] = f"{self.retry_after:g}"
+            elif self.capacity_rps:
+                now = time.monotonic()
+                self._tokens = min(self.capacity_rps, self._tokens + (now - self._refilled_at) * self.capacity_rps)
+                self._refilled_at = now
+                if self._tokens < 1:
+                    status = 429
+                    headers["retry-after-ms"] = str(int((1 - self._tokens) / self.capacity_rps * 1000) + 1)
+                else:
+                    self._tokens -= 1
+            if status is None:
+                return None
+            self.rejected += 1
+        return status, headers, "retry-after-ms" not in headers
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v1/chat/completions"
+
+    def completion(self, body: dict, reply: str = None) -> dict:
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "model": body.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply if reply is None else reply},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 9, "total_tokens": 21}
+        }
+
+    def stream_chunks(self, body: dict, reply: str = None):
+        """SSE data payloads for a streamed completion, ending with usage and [DONE]"""
+        model = body.get("model", "gpt-4o")
+        words = (self.reply if reply is None else reply).split(" ")
+        for i, word in enumerate(words):
+            content = word if i == 0 else " " + word
+            yield json.dumps({"model": model, "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}]})
+        yield json.dumps({"model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        yield json.dumps({"model": model, "choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": len(words), "total_tokens": 12 + len(words)}})
+        yield "[DONE]"
+
+
+class _SheetsHandler(BaseHTTPRequestHandler):
+    def _reply(self, payload: dict, status: int = 200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        fake = self.fake
+        fake.count_request()
+        if fake.latency:
+            time.sleep(fake.latency)
+        self._reply({"sheets": [
+            {"properties": {"sheetId": sheet_id, "title": title}}
+            for title, sheet_id in fake.sheet_ids.items()
+        ]})
+
+    def do_POST(self):
+        fake = self.fake
+        fake.count_request()
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if fake.latency:
+            time.sleep(fake.latency)
+        if fake.outage:
+            self._reply({"error": {"code": 503, "message": "The service is currently unavailable."}}, status=503)
+            return
+        status = fake.injected_failure()
+        if status:
+            self._reply({"error": {"code": status, "message": "Injected failure"}}, status=status)
+            return
+        titles = {sheet_id: title for title, sheet_id in fake.sheet_ids.items()}
+        path = self.path.split("?")[0]
+        if path.endswith(":batchUpdate"):
+            for request in body.get("requests", []):
+                append = request.get("appendCells", {})
+                fake.add_rows(titles[append["sheetId"]], [
+                    [next(iter(cell["userEnteredValue"].values())) for cell in row["values"]]
+                    for row in append.get("rows", [])
+                ])
+            self._reply({"replies": [{} for _ in body.get("requests", [])]})
+        elif path.endswith(":append"):
+            title = unquote(path.split("/values/")[1]).split("!")[0]
+            fake.add_rows(title, body.get("values", []))
+            self._reply({"updates": {"updatedRange": f"{title}!A1"}})
+        else:
+            self._reply({"error": {"message": "unknown method"}}, status=404)
+
+
+class FakeSheets(_FakeServer):
+    """
+    Sheets v4 stand-in for spreadsheets.get, batchUpdate(appendCells) and values.append
+
+    Point the script at it with SHEETS_API_ENDPOINT = fake.base_url and pass
+    google.auth.credentials.AnonymousCredentials() to get_service(). Set
+    `outage = True` to make every write fail with 503 until cleared, or
+    fail_rate / throttle_rate to fail that fraction of writes at random with
+    fail_status / 429 (quota exceeded).
+    """
+
+    def __init__(self, latency: float = 0.0, connect_delay: float = 0.0,
+                 fail_rate: float = 0.0, fail_status: int = 503, throttle_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.outage = False
+        self.fail_rate = fail_rate
+        self.fail_status = fail_status
+        self.throttle_rate = throttle_rate
+        self.rejected = 0
+        self._rng = random.Random(seed)
+        self.sheet_ids = {"Summary": 0, "Responses": 1}
+        self.rows = {title: [] for title in self.sheet_ids}
+        super().__init__(_SheetsHandler, connect_delay=connect_delay)
+
+    def add_rows(self, title: str, rows: list) -> None:
+        with self._lock:
+            self.rows[title].extend(rows)
+
+    def injected_failure(self):
+        """Status code to fail this write with, or None"""
+        with self._lock:
+            roll = self._rng.random() if self.fail_rate or self.throttle_rate else 1.0
+            if roll < self.fail_rate + self.throttle_rate:
+                self.rejected += 1
+                return self.fail_status if roll < self.fail_rate else 429
+        return None
+
+
+class PostgresProxy:
+    """
+    TCP stand-in in front of a real (throwaway) local Postgres
+
+    Forwards the wire protocol unchanged, waiting `latency` seconds before
+    passing on each client message (about one per query round trip) and
+    dropping the connection on `fail_rate` of them, like a network fault
+    mid-query. `host` may be a Unix socket directory. Point the script's
+    resource at proxy.host / proxy.port.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 5432, latency: float = 0.0,
+                 fail_rate: float = 0.0, seed: int = 0):
+        self.upstream = (host, port)
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.connections = 0
+        self.messages = 0
+        self.dropped = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self._sockets = []
+
+    @property
+    def host(self) -> str:
+        return "127.0.0.1"
+
+    @property
+    def port(self) -> int:
+        return self._server.getsockname()[1]
+
+    def _connect_upstream(self) -> socket.socket:
+        host, port = self.upstream
+        if host.startswith("/"):
+            upstream = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            upstream.connect(f"{host}/.s.PGSQL.{port}")
+            return upstream
+        return socket.create_connection((host, port))
+
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            upstream = self._connect_upstream()
+            with self._lock:
+                self.connections += 1
+                self._sockets.extend([client, upstream])
+            threading.Thread(target=self._pump, args=(client, upstream, True), daemon=True).start()
+            threading.Thread(target=self._pump, args=(upstream, client, False), daemon=True).start()
+
+    def _pump(self, source: socket.socket, target: socket.socket, from_client: bool):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                if from_client:
+                    with self._lock:
+                        self.messages += 1
+                        drop = self.fail_rate and self._rng.random() < self.fail_rate
+                        if drop:
+                            self.dropped += 1
+                    if self.latency:
+                        time.sleep(self.latency)
+                    if drop:
+                        break
+                target.sendall(data)
+        except OSError:
+            pass
+        for sock in (source, target):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.close()
+        with self._lock:
+            for sock in self._sockets:
+                sock.close()
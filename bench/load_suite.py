@@ -0,0 +1,268 @@
+"""
+Load suite: seeded assessment bursts through the proxy and logging pipeline.
+
+Replays a burst of completed assessments (Poisson arrivals at --rate per
+second, at most --workers running at once like a Windmill worker group)
+through each target's main() against the local stand-ins in fakes.py, with
+injected latency, errors and 429s, and reports throughput and p50/p95/p99
+per target. Latency is measured from each assessment's scheduled arrival,
+so time spent queued behind a saturated target counts.
+
+    proxy          WINDMILL_SCRIPT.py, one batch of four recommendations (FakeOpenAI)
+    log-stdout     windmill-logging-pipeline.py with the stdout sink
+    log-postgres   ... stdout and Postgres sinks (PostgresProxy; needs --dbname)
+    log-sheets     ... stdout and Sheets sinks (FakeSheets, spooled)
+    log-pipeline   ... stdout, file and Sheets sinks, plus Postgres with --dbname
+
+Each logging target gets its own copy of the pipeline module (its own sinks,
+spool and dedupe index), like a separately deployed script.
+
+Runs with the same --seed and settings replay the same arrivals, payloads
+and injected faults. Save a baseline, then compare a later run against it;
+the comparison exits non-zero if a target's p95 or throughput regressed
+beyond --tolerance or its error rate rose. Postgres targets insert into
+assessment_responses, so point --dbname at a THROWAWAY database:
+
+    python bench/load_suite.py --assessments 200 --rate 2 --save-baseline /tmp/load_baseline.json
+    python bench/load_suite.py --assessments 200 --rate 2 --compare /tmp/load_baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.auth.credentials import AnonymousCredentials
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI, FakeSheets, PostgresProxy
+from synthetic import make_submission, recommendation_payloads, recommendation_text
+
+TARGETS = ["proxy", "log-stdout", "log-postgres", "log-sheets", "log-pipeline"]
+# Settings that must match for two runs to be comparable
+SETTINGS = ["assessments", "rate", "workers", "seed", "latency_ms", "sheets_latency_ms", "pg_latency_ms",
+            "jitter", "error_rate", "throttle_rate"]
+# An error rate this far above the baseline's counts as a regression
+ERROR_RATE_SLACK = 0.01
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def drive(arrivals: list, workers: int, call) -> dict:
+    """Run call(i) for each arrival at its scheduled time; latency is from the schedule"""
+    start = time.perf_counter() + 0.05
+
+    def one(i):
+        time.sleep(max(0.0, start + arrivals[i] - time.perf_counter()))
+        ok = call(i)
+        return time.perf_counter() - (start + arrivals[i]), ok
+
+    with quiet(), ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(one, range(len(arrivals))))
+    wall = time.perf_counter() - start
+
+    latencies = [t * 1000 for t, _ in outcomes]
+    errors = sum(1 for _, ok in outcomes if not ok)
+    return {
+        "completed": len(outcomes),
+        "errors": errors,
+        "error_rate": round(errors / len(outcomes), 4),
+        "throughput": round(len(outcomes) / wall, 2),
+        **{f"p{int(p * 100)}_ms": round(percentile(latencies, p), 1) for p in (0.5, 0.95, 0.99)},
+        "max_ms": round(max(latencies), 1)
+    }
+
+
+def run_proxy(args, work: list, arrivals: list, tmp: str) -> dict:
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    proxy.CACHE_DB_PATH = os.path.join(tmp, "cache.sqlite")
+    proxy.INDEX_DB_PATH = os.path.join(tmp, "index.sqlite")
+    with FakeOpenAI(latency=args.latency_ms / 1000, latency_jitter=args.jitter, reply=recommendation_text(),
+                    fail_rate=args.error_rate, fail_status=503, throttle_rate=args.throttle_rate,
+                    seed=args.seed) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        def call(i):
+            batch = [{"id": p["category"], "prompt": p} for p in work[i]["payloads"]]
+            result = proxy.main(resource, batch=batch)
+            return result["success"] and all(item["success"] for item in result["results"])
+
+        stats = drive(arrivals, args.workers, call)
+    return {**stats, "upstream_calls": upstream.requests}
+
+
+def load_pipeline(target: str, sinks: list, tmp: str):
+    """A fresh copy of the logging pipeline for one target, writing under tmp"""
+    pipeline = load_script("windmill-logging-pipeline.py", module_name=target.replace("-", "_"))
+    pipeline.ENABLED_SINKS = list(sinks)
+    pipeline.DEDUPE_PATH = os.path.join(tmp, "dedupe.sqlite")
+    pipeline.SPOOL_PATH = os.path.join(tmp, "spool.sqlite")
+    pipeline.LOG_FILE_PATH = os.path.join(tmp, "responses.jsonl")
+    return pipeline
+
+
+def stored_everywhere(pipeline, submission: dict) -> bool:
+    """A submission counts as an error unless every enabled sink stored it"""
+    result = pipeline.main(**submission)
+    return result["success"] and all(sink["success"] for sink in result.get("sinks", {}).values())
+
+
+def run_stdout(args, work: list, arrivals: list, tmp: str) -> dict:
+    pipeline = load_pipeline("log-stdout", ["stdout"], tmp)
+    return drive(arrivals, args.workers, lambda i: stored_everywhere(pipeline, work[i]["submission"]))
+
+
+def pg_resource(args, proxy: PostgresProxy) -> dict:
+    return {"host": proxy.host, "port": proxy.port, "user": args.user,
+            "password": args.password or None, "dbname": args.dbname, "sslmode": "disable"}
+
+
+def run_postgres(args, work: list, arrivals: list, tmp: str) -> dict:
+    pipeline = load_pipeline("log-postgres", ["stdout", "postgres"], tmp)
+    with PostgresProxy(args.host, args.port, latency=args.pg_latency_ms / 1000, seed=args.seed) as db:
+        pipeline.register_sink(pipeline.PostgresSink(pg_resource(args, db)))
+        # Warm the pool and schema check before injecting faults, as on a warm worker
+        pipeline.get_sink("postgres").get_pool()
+        db.fail_rate = args.error_rate
+        stats = drive(arrivals, args.workers, lambda i: stored_everywhere(pipeline, work[i]["submission"]))
+    return {**stats, "round_trips": db.messages, "dropped": db.dropped}
+
+
+def run_sheets(args, work: list, arrivals: list, tmp: str) -> dict:
+    pipeline = load_pipeline("log-sheets", ["stdout", "sheets"], tmp)
+    with FakeSheets(latency=args.sheets_latency_ms / 1000, fail_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, seed=args.seed) as fake:
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        pipeline.get_sink("sheets").get_service()
+        stats = drive(arrivals, args.workers, lambda i: stored_everywhere(pipeline, work[i]["submission"]))
+    return {**stats, "upstream_calls": fake.requests}
+
+
+def run_pipeline(args, work: list, arrivals: list, tmp: str) -> dict:
+    pipeline = load_pipeline("log-pipeline", ["stdout", "file", "sheets"], tmp)
+    with FakeSheets(latency=args.sheets_latency_ms / 1000, fail_rate=args.error_rate,
+                    throttle_rate=args.throttle_rate, seed=args.seed) as fake, \
+            PostgresProxy(args.host, args.port, latency=args.pg_latency_ms / 1000, seed=args.seed) as db:
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        if args.dbname:
+            pipeline.register_sink(pipeline.PostgresSink(pg_resource(args, db)))
+            pipeline.ENABLED_SINKS.append("postgres")
+            pipeline.get_sink("postgres").get_pool()
+        db.fail_rate = args.error_rate
+        stats = drive(arrivals, args.workers, lambda i: stored_everywhere(pipeline, work[i]["submission"]))
+    return {**stats, "sinks": ",".join(pipeline.ENABLED_SINKS)}
+
+
+RUNNERS = {
+    "proxy": run_proxy,
+    "log-stdout": run_stdout,
+    "log-postgres": run_postgres,
+    "log-sheets": run_sheets,
+    "log-pipeline": run_pipeline
+}
+
+
+def compare(baseline: dict, results: dict, settings: dict, tolerance: float) -> list:
+    """Print each target against the baseline; return the regressions"""
+    if baseline["settings"] != settings:
+        changed = {k: (baseline["settings"].get(k), v) for k, v in settings.items() if baseline["settings"].get(k) != v}
+        sys.exit(f"Baseline was recorded with different settings (baseline, now): {changed}")
+
+    regressions = []
+    print(f"\n{'vs baseline':14} {'p95 ms':>18} {'throughput/s':>20} {'error rate':>18}")
+    for name, now in results.items():
+        base = baseline["targets"].get(name)
+        if base is None:
+            print(f"{name:14} (not in baseline)")
+            continue
+        checks = [
+            ("p95", now["p95_ms"] > base["p95_ms"] * (1 + tolerance)),
+            ("throughput", now["throughput"] < base["throughput"] * (1 - tolerance)),
+            ("error rate", now["error_rate"] > base["error_rate"] + ERROR_RATE_SLACK)
+        ]
+        failed = [label for label, bad in checks if bad]
+        regressions.extend(f"{name} {label}" for label in failed)
+        print(f"{name:14} {base['p95_ms']:8.1f} -> {now['p95_ms']:7.1f} {base['throughput']:9.2f} -> "
+              f"{now['throughput']:8.2f} {base['error_rate']:8.2%} -> {now['error_rate']:6.2%}"
+              f"   {'REGRESSED: ' + ', '.join(failed) if failed else 'ok'}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help="comma-separated subset of: " + ", ".join(TARGETS))
+    parser.add_argument("--assessments", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=2.0, help="assessment arrivals per second")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent jobs per target")
+    parser.add_argument("--seed", type=int, default=22)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="fake OpenAI latency")
+    parser.add_argument("--sheets-latency-ms", type=float, default=80.0)
+    parser.add_argument("--pg-latency-ms", type=float, default=1.0, help="added per Postgres round trip")
+    parser.add_argument("--jitter", type=float, default=0.3, help="fake OpenAI latency spread (fraction)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="fraction of upstream calls failed with 503 / dropped Postgres connections")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="fraction of OpenAI and Sheets calls answered with 429")
+    parser.add_argument("--host", default="127.0.0.1", help="Postgres host or Unix socket directory")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbname", help="THROWAWAY Postgres database; Postgres targets are skipped without it")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative p95 / throughput change before a comparison fails")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    if not args.dbname and "log-postgres" in targets:
+        print("log-postgres skipped: pass --dbname to run it")
+        targets.remove("log-postgres")
+
+    rng = random.Random(args.seed)
+    arrivals, at = [], 0.0
+    work = []
+    for _ in range(args.assessments):
+        arrivals.append(at)
+        at += rng.expovariate(args.rate)
+        submission = make_submission(rng)
+        work.append({"submission": submission, "payloads": recommendation_payloads(rng, submission)})
+
+    print(f"{args.assessments} assessments over {arrivals[-1]:.1f} s, {args.workers} workers, "
+          f"errors {args.error_rate:.0%}, 429s {args.throttle_rate:.0%}")
+    print(f"{'target':14} {'ok':>5} {'errors':>6} {'per s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    results = {}
+    for name in targets:
+        with tempfile.TemporaryDirectory() as tmp:
+            r = RUNNERS[name](args, work, arrivals, tmp)
+        results[name] = r
+        extra = {k: v for k, v in r.items() if k not in ("completed", "errors", "error_rate", "throughput",
+                                                         "p50_ms", "p95_ms", "p99_ms", "max_ms")}
+        print(f"{name:14} {r['completed'] - r['errors']:5} {r['errors']:6} {r['throughput']:7.2f} "
+              f"{r['p50_ms']:8.1f} {r['p95_ms']:8.1f} {r['p99_ms']:8.1f} {r['max_ms']:8.1f}   {extra or ''}")
+
+    settings = {k: getattr(args, k) for k in SETTINGS}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"settings": settings, "targets": results}, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, settings, args.tolerance)
+        if regressions:
+            sys.exit(f"Regressions: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
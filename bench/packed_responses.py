@@ -0,0 +1,101 @@
+"""
+Benchmark: compact responses_packed encoding vs JSONB responses.
+
+Round-trips synthetic responses through encode_responses/decode_responses in
+windmill-logging-pipeline.py, then compares stored size and the cost of
+turning a full scan into the re-scoring engine's answers matrix: parsing
+JSON text vs decoding packed bytes. With --dbname it also loads the rows
+into a THROWAWAY local Postgres database and compares on-disk column sizes
+and SELECT scan times.
+
+    python bench/packed_responses.py --rows 100000
+    python bench/packed_responses.py --rows 100000 --dbname assessment_bench
+"""
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from _loader import load_script
+from synthetic import make_submission
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbname")
+    args = parser.parse_args()
+
+    pipeline = load_script("windmill-logging-pipeline.py")
+    engine = load_script("windmill-rescore-responses.py")
+
+    rng = random.Random(14)
+    submissions = [make_submission(rng) for _ in range(args.rows)]
+    # Legacy rows stored bare numbers for single answers
+    for s in submissions[::5]:
+        for data in s["responses"].values():
+            if len(data["value"]) == 1:
+                data["value"] = data["value"][0]
+    responses = [s["responses"] for s in submissions]
+
+    packed, encode_seconds = timed(lambda: [pipeline.encode_responses(r) for r in responses])
+    decoded, decode_seconds = timed(lambda: [pipeline.decode_responses(p) for p in packed])
+    assert decoded == responses, "round trip changed the responses"
+
+    json_text = [json.dumps(r) for r in responses]
+    from_json, json_seconds = timed(lambda: engine.answers_matrix([json.loads(t) for t in json_text]))
+    from_packed, packed_seconds = timed(lambda: engine.packed_answers_matrix(packed))
+    assert np.array_equal(from_json, from_packed)
+
+    print(f"rows {args.rows}: all encodable {all(p is not None for p in packed)}, round trip exact")
+    print(f"size per assessment    JSON {sum(map(len, json_text)) / args.rows:7.1f} B   "
+          f"packed {sum(map(len, packed)) / args.rows:5.1f} B")
+    print(f"encode {args.rows / encode_seconds:,.0f}/s   decode to dicts {args.rows / decode_seconds:,.0f}/s")
+    print(f"answers matrix         JSON parse {json_seconds * 1000:8.1f} ms   packed {packed_seconds * 1000:8.1f} ms")
+
+    if not args.dbname:
+        return
+
+    resource = {
+        "host": args.host, "port": args.port, "user": args.user,
+        "password": args.password or None, "dbname": args.dbname, "sslmode": "disable"
+    }
+    sink = pipeline.PostgresSink(resource)
+    pool = sink.get_pool()
+    conn = pool.getconn()
+    with conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE assessment_responses")
+    sink.copy(submissions)
+    with conn, conn.cursor() as cur:
+        cur.execute("SELECT sum(pg_column_size(responses)), sum(pg_column_size(responses_packed)) "
+                    "FROM assessment_responses")
+        jsonb_bytes, packed_bytes = cur.fetchone()
+
+        def scan(column):
+            cur.execute(f"SELECT {column} FROM assessment_responses")
+            return [row[0] for row in cur.fetchall()]
+
+        rows_json, scan_json = timed(lambda: engine.answers_matrix(scan("responses")))
+        rows_packed, scan_packed = timed(lambda: engine.packed_answers_matrix(scan("responses_packed")))
+        assert np.array_equal(rows_json, rows_packed)
+    pool.putconn(conn)
+
+    print(f"postgres column size   JSONB {jsonb_bytes / 1e6:7.1f} MB   packed {packed_bytes / 1e6:5.1f} MB")
+    print(f"postgres scan + matrix JSONB {scan_json * 1000:8.1f} ms   packed {scan_packed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
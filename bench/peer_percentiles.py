@@ -0,0 +1,118 @@
+"""
+Benchmark: peer-percentile lookups from cohort Fenwick histograms.
+
+Builds windmill-peer-percentiles.py's PeerIndex over synthetic history
+(loaded from memory instead of Postgres), checks every lookup against a
+naive scan of the cohort, and reports lookup and incremental-update cost
+plus resident memory and evictions when there are more cohorts than fit
+in the budget.
+
+    python bench/peer_percentiles.py --rows 200000 --teams 300 --budget-mb 8
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from _loader import load_script
+from synthetic import LEVELS, make_submission
+
+
+def make_rows(rng: random.Random, count: int, teams: list) -> list:
+    """(team, job level, scores in SCORE_COLUMNS order) rounded like the DB columns"""
+    rows = []
+    for _ in range(count):
+        s = make_submission(rng)
+        scores = tuple(round(s["categoryScores"][c], 2) for c in s["categoryScores"]) + (round(s["overallScore"], 2),)
+        rows.append((rng.choice(teams), s["jobLevel"], scores))
+    return rows
+
+
+def naive_percentile(rows: list, series: int, score: float) -> float:
+    values = [r[series] for r in rows]
+    below = sum(1 for v in values if v < score)
+    equal = sum(1 for v in values if v == score)
+    return round(100.0 * (below + equal / 2) / len(values), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--teams", type=int, default=300)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--budget-mb", type=float, default=8.0)
+    args = parser.parse_args()
+
+    peers = load_script("windmill-peer-percentiles.py")
+    rng = random.Random(12)
+    teams = [f"Team {i:03d}" for i in range(args.teams)]
+    rows = make_rows(rng, args.rows, teams)
+
+    by_cohort = defaultdict(list)
+    for team, level, scores in rows:
+        for key in ((team, level), (peers.ALL, level), (peers.ALL, peers.ALL)):
+            by_cohort[key].append(scores)
+
+    load_seconds = [0.0]
+
+    def load_cohort(team, job_level):
+        start = time.perf_counter()
+        cohort = list(by_cohort.get((team, job_level), []))
+        load_seconds[0] += time.perf_counter() - start
+        return cohort
+
+    index = peers.PeerIndex(load_cohort, memory_budget=int(args.budget_mb * 1024 * 1024))
+    series_names = peers.SERIES
+
+    # Lookups for random respondents, checked against a naive scan
+    lookups = []
+    for _ in range(args.lookups):
+        team, level, scores = rng.choice(rows)
+        series = rng.randrange(len(series_names))
+        start = time.perf_counter()
+        result = index.percentiles(team, level, {series_names[series]: scores[series]})
+        lookups.append(time.perf_counter() - start)
+        cohort = by_cohort[(result["cohort"]["team"], result["cohort"]["jobLevel"])]
+        expected = naive_percentile(cohort, series, scores[series])
+        assert result["percentiles"][series_names[series]] == expected, (result, expected)
+
+    # Warm lookups on a resident cohort
+    team, level, scores = rows[0]
+    index.percentiles(team, level, {"Overall": scores[-1]})
+    warm = []
+    for _ in range(args.lookups):
+        start = time.perf_counter()
+        index.percentiles(team, level, dict(zip(series_names, scores)))
+        warm.append(time.perf_counter() - start)
+
+    # Incremental updates
+    new_rows = make_rows(rng, 20000, teams)
+    start = time.perf_counter()
+    for team, level, scores in new_rows:
+        index.add(team, level, scores)
+    add_seconds = time.perf_counter() - start
+
+    naive = []
+    cohort = by_cohort[(peers.ALL, peers.ALL)]
+    for _ in range(20):
+        start = time.perf_counter()
+        naive_percentile(cohort, 4, 2.5)
+        naive.append(time.perf_counter() - start)
+
+    print(f"rows {args.rows}, cohorts {len(by_cohort)}, "
+          f"resident {len(index._cohorts)} ({index.memory_bytes() / 1024 / 1024:.1f} MB of {args.budget_mb} MB), "
+          f"{peers.CohortHistogram.BYTES / 1024:.1f} KB per cohort")
+    print(f"lookup incl. cold loads  mean {statistics.mean(lookups) * 1e6:7.1f} us   "
+          f"p95 {statistics.quantiles(lookups, n=20)[-1] * 1e6:7.1f} us   "
+          f"(of which loading {load_seconds[0] / args.lookups * 1e6:.1f} us)")
+    print(f"warm lookup, 5 series    mean {statistics.mean(warm) * 1e6:7.1f} us")
+    print(f"naive scan, everyone     mean {statistics.mean(naive) * 1e6:7.1f} us")
+    print(f"incremental add          {len(new_rows) / add_seconds:,.0f} rows/s")
+    print(f"stats {index.stats}")
+    print(f"✅ {args.lookups} lookups matched a naive scan of the cohort")
+
+
+if __name__ == "__main__":
+    main()
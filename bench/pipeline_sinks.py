@@ -0,0 +1,93 @@
+"""
+Benchmark: concurrent sink fan-out with per-sink timeouts.
+
+Runs windmill-logging-pipeline.py with the stdout, file and Sheets sinks
+(Sheets against a local stand-in) plus a stalled sink standing in for an
+unreachable database. Compares writing the sinks one after another with
+the pipeline's concurrent dispatch, and prints the per-sink counters.
+
+    python bench/pipeline_sinks.py --submissions 30 --latency-ms 80 --stall-ms 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from google.auth.credentials import AnonymousCredentials
+
+from _loader import load_script, quiet
+from fakes import FakeSheets
+from synthetic import make_submission
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--stall-ms", type=float, default=2000.0)
+    parser.add_argument("--stall-timeout-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    pipeline = load_script("windmill-logging-pipeline.py")
+
+    class StalledSink(pipeline.Sink):
+        name = "stalled"
+
+        def write(self, submission, dedupe_key=None):
+            time.sleep(args.stall_ms / 1000)
+            raise ConnectionError("connection timed out")
+
+    rng = random.Random(9)
+    submissions = [make_submission(rng) for _ in range(args.submissions)]
+    tmp = tempfile.mkdtemp()
+    log_path = os.path.join(tmp, "responses.jsonl")
+    pipeline.DEDUPE_PATH = os.path.join(tmp, "dedupe.sqlite")
+    # Write Sheets in the request, so both runs wait for the stand-in
+    pipeline.SPOOL_ENABLED = False
+    pipeline.BUFFER_ENABLED = False
+
+    with FakeSheets(latency=args.latency_ms / 1000) as fake:
+        pipeline.register_sink(pipeline.FileSink(log_path))
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        pipeline.register_sink(StalledSink(), timeout=args.stall_timeout_ms / 1000)
+        pipeline.ENABLED_SINKS = ["stdout", "file", "sheets", "stalled"]
+        sinks = [pipeline.get_sink(name) for name in pipeline.ENABLED_SINKS]
+
+        # Warm the Sheets client so both runs measure steady state
+        with quiet():
+            pipeline.get_sink("sheets").write(submissions[0])
+
+        sequential = []
+        for submission in submissions:
+            start = time.perf_counter()
+            with quiet():
+                for sink in sinks:
+                    try:
+                        sink.write(submission)
+                    except ConnectionError:
+                        pass
+            sequential.append(time.perf_counter() - start)
+
+        concurrent = []
+        for submission in submissions:
+            start = time.perf_counter()
+            with quiet():
+                result = pipeline.main(**submission)
+            concurrent.append(time.perf_counter() - start)
+            assert result["success"], result
+
+        # Let stalled writes finish so their outcomes show up in the counters
+        time.sleep(args.stall_ms / 1000 + 0.2)
+
+    for label, timings in (("sequential", sequential), ("pipeline", concurrent)):
+        print(f"{label:<11} mean {statistics.mean(timings) * 1000:7.1f} ms   "
+              f"max {max(timings) * 1000:7.1f} ms")
+    print(json.dumps(pipeline.sink_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
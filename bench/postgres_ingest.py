@@ -0,0 +1,80 @@
+"""
+Benchmark: assessment_responses ingestion throughput against a local Postgres.
+
+Compares one INSERT per submission (what each Windmill job does), the same
+under a concurrent burst of jobs sharing the pool, multi-row INSERTs, and
+COPY for backfills.
+
+Point it at a THROWAWAY database — rows are inserted into
+assessment_responses and the table is truncated at the start of the run:
+
+    createdb assessment_bench
+    python bench/postgres_ingest.py --dbname assessment_bench --rows 5000
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script
+from synthetic import make_submission
+
+
+def timed(label: str, rows: int, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {rows:>7} rows  {elapsed:7.2f} s  {rows / elapsed:10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--user", default="postgres")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--dbname", required=True)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--burst-workers", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    pipeline = load_script("windmill-logging-pipeline.py")
+    resource = {
+        "host": args.host, "port": args.port, "user": args.user,
+        "password": args.password or None, "dbname": args.dbname, "sslmode": "disable"
+    }
+    sink = pipeline.PostgresSink(resource)
+    pool = sink.get_pool()
+    conn = pool.getconn()
+    with conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE assessment_responses")
+    pool.putconn(conn)
+
+    rng = random.Random(11)
+    submissions = [make_submission(rng) for _ in range(args.rows)]
+
+    def one_by_one():
+        for s in submissions:
+            sink.insert([s])
+
+    def burst():
+        with ThreadPoolExecutor(max_workers=args.burst_workers) as executor:
+            list(executor.map(lambda s: sink.insert([s]), submissions))
+
+    def multi_row():
+        for i in range(0, len(submissions), args.batch_size):
+            sink.insert(submissions[i:i + args.batch_size])
+
+    def copy():
+        sink.copy(submissions)
+
+    timed("single-row INSERT", args.rows, one_by_one)
+    timed(f"burst x{args.burst_workers} (pooled)", args.rows, burst)
+    timed(f"multi-row INSERT ({args.batch_size})", args.rows, multi_row)
+    timed("COPY backfill", args.rows, copy)
+
+
+if __name__ == "__main__":
+    main()
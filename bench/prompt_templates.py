@@ -0,0 +1,163 @@
+"""
+Parity check and payload sizes for server-side prompt templates.
+
+Runs buildSingleRecommendationMessages and buildRecommendationPayload from
+app.js under Node for synthetic respondents, renders the compact payloads
+with WINDMILL_SCRIPT.py's prompt templates, and requires byte-identical
+messages (and the same "no usable responses" outcome). Reports request body
+size with full messages vs the compact payload, how many distinct system
+prefixes were produced, and render time.
+
+    python bench/prompt_templates.py --cases 2000
+"""
+
+import argparse
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+
+from _loader import REPO_ROOT, load_script
+from synthetic import CATEGORIES, QUESTIONS, SUB_DEPARTMENTS, TEAMS
+
+JS_DATA = (
+    ("const", "jobLevelExpectations", r"\{.*?^\};"),
+    ("const", "dummyQuestions", r"\[.*?^\];"),
+    ("const", "dummyCategories", r"\[.*?^\];"),
+)
+JS_DECLARATIONS = (
+    "getJobLevelDescription", "normalizeAnswerValue", "getMaturityLevel", "calculateScores",
+    "buildSingleRecommendationMessages", "buildRecommendationPayload"
+)
+
+NODE_RUNNER = """
+const fs = require('fs');
+const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+console.log = () => {};
+console.warn = () => {};
+const state = { questions: dummyQuestions, categories: dummyCategories, answers: {}, userContext: {} };
+const out = input.map(({ userContext, answers }) => {
+    state.userContext = userContext;
+    state.answers = answers;
+    const scores = calculateScores();
+    return dummyCategories.map(({ name }) => {
+        const built = buildSingleRecommendationMessages(name, scores);
+        return {
+            messages: built ? built.messages : null,
+            payload: buildRecommendationPayload(name, scores)
+        };
+    });
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+JOB_TITLES = ["Software Engineer", "Account Executive", "Product Manager", "Recruiter", "VP, Finance"]
+JOB_LEVELS = ["S1", "S2", "S3", "S4", "P1", "P2", "P3", "P4", "P5", "P6", "P7",
+              "M2", "M3", "M4", "M5", "M6", "E7", "E8", "X9", ""]
+FREQUENCIES = ["never", "rarely", "monthly", "weekly", "daily", ""]
+TOOLS = ["Gemini", "NotebookLM", "ChatGPT", "GitHub Copilot", "Claude Code", "ZoomAI", "LoomAI",
+         "Perplexity", "Cursor"]
+WORK_FOCUS = ["", "", "Quarterly board decks", "Incident postmortems for the messaging API"]
+
+
+def extract_js() -> str:
+    """Pull the prompt builders, scoring and their data out of app.js"""
+    source = (REPO_ROOT / "app.js").read_text()
+    chunks = []
+    for keyword, name, body in JS_DATA:
+        chunks.append(re.search(rf"^{keyword} {name} = {body}", source, re.S | re.M).group(0))
+    for name in JS_DECLARATIONS:
+        chunks.append(re.search(rf"^function {name}\(.*?^\}}", source, re.S | re.M).group(0))
+    return "\n\n".join(chunks)
+
+
+def run_js(cases: list) -> list:
+    completed = subprocess.run(
+        ["node", "-e", extract_js() + "\n" + NODE_RUNNER], input=json.dumps(cases),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def random_case(rng: random.Random) -> dict:
+    team = rng.choice(TEAMS)
+    tools = rng.sample(TOOLS, rng.randint(0, 4)) if rng.random() < 0.9 else ["None"]
+    answers = {}
+    for question_id in QUESTIONS:
+        kind = rng.random()
+        if kind < 0.05:
+            continue
+        values = sorted(rng.sample([1, 2, 3, 4], 1 if kind < 0.8 else rng.choice([2, 3])))
+        if kind > 0.97:
+            values = [str(v) for v in values] + [5]
+        answers[question_id] = values
+    return {
+        "userContext": {
+            "jobTitle": rng.choice(JOB_TITLES),
+            "team": team,
+            "subDepartment": rng.choice(SUB_DEPARTMENTS[team]) if team in SUB_DEPARTMENTS and rng.random() < 0.7 else "",
+            "jobLevel": rng.choice(JOB_LEVELS),
+            "aiFrequency": rng.choice(FREQUENCIES),
+            "aiToolsUsed": tools,
+            "workFocus": rng.choice(WORK_FOCUS)
+        },
+        "answers": answers
+    }
+
+
+def request_bytes(body: dict) -> int:
+    return len(json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=2000)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    rng = random.Random(15)
+    cases = [random_case(rng) for _ in range(args.cases)]
+    expected = run_js(cases)
+
+    full_bytes, compact_bytes, render_seconds = [], [], []
+    system_prefixes = set()
+    for index, per_category in enumerate(expected):
+        for category, js in zip(CATEGORIES, per_category):
+            start = time.perf_counter()
+            try:
+                rendered = proxy.render_prompt(js["payload"], proxy.PROMPT_TEMPLATE_VERSION)
+            except proxy.PromptTemplateError:
+                rendered = None
+            render_seconds.append(time.perf_counter() - start)
+
+            if rendered != js["messages"]:
+                print(f"❌ mismatch on case {index}, {category}: {json.dumps(cases[index])}")
+                for role, (a, b) in enumerate(zip(js["messages"] or [{}], rendered or [{}])):
+                    if a != b:
+                        print(f"   app.js message {role}: {json.dumps(a)[:2000]}")
+                        print(f"   proxy  message {role}: {json.dumps(b)[:2000]}")
+                sys.exit(1)
+            if rendered is None:
+                continue
+
+            system_prefixes.add(rendered[0]["content"])
+            common = {"rapid_openai": "$res:u/VinceDeFreitas/rapid_openai", "model": "gpt-4o",
+                      "max_tokens": 2800, "temperature": 0.7}
+            full_bytes.append(request_bytes({**common, "messages": js["messages"]}))
+            compact_bytes.append(request_bytes({**common, "prompt": js["payload"], "prompt_version": "v1"}))
+
+    calls = len(full_bytes)
+    system_chars = len(next(iter(system_prefixes)))
+    print(f"✅ {calls} rendered prompts byte-identical to app.js "
+          f"({args.cases * len(CATEGORIES) - calls} correctly rejected as having no usable responses)")
+    print(f"distinct system prefixes  {len(system_prefixes)} ({system_chars:,} chars, ~{system_chars // 4:,} tokens)")
+    print(f"request body per call     full messages {sum(full_bytes) / calls:8,.0f} B   "
+          f"compact payload {sum(compact_bytes) / calls:6,.0f} B   "
+          f"({sum(full_bytes) / sum(compact_bytes):.0f}x smaller)")
+    print(f"server-side render        mean {sum(render_seconds) / len(render_seconds) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark: one batch job for all four categories vs four sequential calls.
+
+    python bench/proxy_batch.py --latency-ms 800
+"""
+
+import argparse
+import time
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+CATEGORIES = ["Delegation", "Communication", "Discernment", "Keeping It Twilio"]
+
+
+def messages_for(category: str) -> list:
+    return [{"role": "user", "content": f"Recommendation for {category}"}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    with FakeOpenAI(latency=args.latency_ms / 1000) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        start = time.perf_counter()
+        with quiet():
+            for category in CATEGORIES:
+                assert proxy.main(resource, messages_for(category), use_cache=False)["success"]
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with quiet():
+            result = proxy.main(
+                resource,
+                batch=[{"id": c, "messages": messages_for(c)} for c in CATEGORIES],
+                use_cache=False
+            )
+        batched = time.perf_counter() - start
+
+    assert result["success"] and result["failed"] == 0, result
+    print(f"sequential (4 jobs)  {sequential * 1000:8.1f} ms")
+    print(f"batch (1 job)        {batched * 1000:8.1f} ms")
+    print(f"speedup              {sequential / batched:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: response cache hit rate and latency saved.
+
+Replays a burst of recommendation requests drawn from a small set of
+(category, maturity, jobLevel, team) profiles — most respondents share a
+handful of profiles — through WINDMILL_SCRIPT.py:main against a local fake
+OpenAI, then reports upstream calls made and latency saved.
+
+    python bench/proxy_cache.py --requests 200 --profiles 20 --latency-ms 300
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+CATEGORIES = ["Delegation", "Communication", "Discernment", "Keeping It Twilio"]
+MATURITIES = ["Not Started", "Compliant", "Competent", "Creative"]
+LEVELS = ["P2", "P3", "S1", "M2", "E1"]
+TEAMS = ["Engineering", "Sales", "Marketing", "Product"]
+
+
+def make_profiles(count: int, rng: random.Random) -> list:
+    return [
+        (rng.choice(CATEGORIES), rng.choice(MATURITIES), rng.choice(LEVELS), rng.choice(TEAMS))
+        for _ in range(count)
+    ]
+
+
+def messages_for(profile: tuple) -> list:
+    category, maturity, level, team = profile
+    return [
+        {"role": "system", "content": "You are an experienced AI literacy coach at Twilio."},
+        {"role": "user", "content": f"Category: {category}\nMaturity: {maturity}\nLevel: {level}\nTeam: {team}"}
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    profiles = make_profiles(args.profiles, rng)
+    # Zipf-like popularity: a few profiles account for most submissions
+    weights = [1 / (rank + 1) for rank in range(len(profiles))]
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        proxy.CACHE_DB_PATH = os.path.join(tmp, "cache.sqlite")
+        with FakeOpenAI(latency=args.latency_ms / 1000) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                profile = rng.choices(profiles, weights)[0]
+                with quiet():
+                    result = proxy.main(resource, messages_for(profile), max_tokens=2800)
+                assert result["success"], result
+            elapsed = time.perf_counter() - start
+
+    stats = result["cache"]
+    hit_rate = stats["hits"] / args.requests
+    print(f"requests        {args.requests}")
+    print(f"upstream calls  {upstream.requests}")
+    print(f"hit rate        {hit_rate:.1%} (memory {stats['memory_hits']}, disk {stats['disk_hits']})")
+    print(f"latency saved   {stats['latency_saved_ms'] / 1000:.1f} s")
+    print(f"wall time       {elapsed:.1f} s (uncached would be ~{args.requests * args.latency_ms / 1000:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
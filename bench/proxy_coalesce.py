@@ -0,0 +1,105 @@
+"""
+Benchmark: single-flight coalescing of identical concurrent requests.
+
+Replays a shared-link burst: --respondents people drawn from a few
+profiles finish within --window-ms of each other and their byte-identical
+requests reach WINDMILL_SCRIPT.py:main before the first response is
+cached. Compares upstream calls with COALESCE_ENABLED off and on, then
+checks that an upstream error reaches every waiting caller and that
+followers give up after COALESCE_WAIT_TIMEOUT.
+
+    python bench/proxy_coalesce.py --respondents 60 --profiles 4 --latency-ms 1500
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+
+def messages_for(profile: int) -> list:
+    return [
+        {"role": "system", "content": "You are an experienced AI literacy coach at Twilio."},
+        {"role": "user", "content": f"Recommendation for profile {profile}"}
+    ]
+
+
+def burst(proxy, resource: dict, arrivals: list) -> list:
+    """Send each (delay, profile) request at its arrival time; return the results"""
+    start = time.perf_counter()
+
+    def send(arrival):
+        delay, profile = arrival
+        time.sleep(max(0.0, start + delay - time.perf_counter()))
+        return proxy.main(resource, messages_for(profile))
+
+    with quiet(), ThreadPoolExecutor(max_workers=len(arrivals)) as pool:
+        return list(pool.map(send, arrivals))
+
+
+def fresh_state(proxy, tmp: str, name: str) -> None:
+    proxy.CACHE_DB_PATH = os.path.join(tmp, f"{name}.sqlite")
+    proxy._cache_db = None
+    proxy._memory_cache.clear()
+    proxy._limiters.clear()
+    for counters in (proxy._cache_stats, proxy._coalesce_stats):
+        for k in counters:
+            counters[k] = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--respondents", type=int, default=60)
+    parser.add_argument("--profiles", type=int, default=4)
+    parser.add_argument("--window-ms", type=float, default=1000.0)
+    parser.add_argument("--latency-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    rng = random.Random(17)
+    arrivals = [(rng.uniform(0, args.window_ms / 1000), rng.randrange(args.profiles))
+                for _ in range(args.respondents)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, enabled in (("no coalescing", False), ("coalescing", True)):
+            fresh_state(proxy, tmp, label.replace(" ", "_"))
+            proxy.COALESCE_ENABLED = enabled
+            with FakeOpenAI(latency=args.latency_ms / 1000) as upstream:
+                resource = {"api_key": "test", "api_url": upstream.url}
+                start = time.perf_counter()
+                results = burst(proxy, resource, arrivals)
+                elapsed = time.perf_counter() - start
+            assert all(r["success"] for r in results)
+            shared = sum(1 for r in results if r.get("coalesced"))
+            hits = sum(1 for r in results if r["cache"]["hit"])
+            print(f"{label:14} upstream calls {upstream.requests:3}   shared {shared:3}   cache hits {hits:3}   "
+                  f"wall {elapsed * 1000:6.0f} ms")
+        print(f"coalescing stats {proxy.coalesce_stats()}")
+
+        # Errors propagate to every follower
+        fresh_state(proxy, tmp, "errors")
+        with FakeOpenAI(latency=args.latency_ms / 1000, fail_rate=1.0, fail_status=400) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            results = burst(proxy, resource, [(0.01 * i, 0) for i in range(10)])
+        assert upstream.requests == 1 and all(r["error"] == "OpenAI API returned 400" for r in results), results
+        print(f"upstream error   1 upstream call, error delivered to all {len(results)} callers")
+
+        # Followers stop waiting after the per-key timeout
+        fresh_state(proxy, tmp, "timeouts")
+        proxy.COALESCE_WAIT_TIMEOUT = 0.2
+        with FakeOpenAI(latency=1.0) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            results = burst(proxy, resource, [(0.05 * i, 0) for i in range(5)])
+        timed_out = sum(1 for r in results if "Timed out" in r.get("error", ""))
+        assert results[0]["success"] and timed_out == 4, results
+        print(f"wait timeout     leader succeeded, {timed_out} followers timed out after "
+              f"{proxy.COALESCE_WAIT_TIMEOUT} s")
+
+
+if __name__ == "__main__":
+    main()
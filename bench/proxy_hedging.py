@@ -0,0 +1,101 @@
+"""
+Simulation: time-to-recommendation percentiles with deadline-aware hedging.
+
+Drives WINDMILL_SCRIPT.py:main with distinct requests against a local fake
+OpenAI whose latency has a heavy tail (--slow-rate of calls take
+--slow-ms), and a faster fallback model. Compares a single call per
+request, hedging to the same model, and hedging to the faster model in
+HEDGE_MODELS, reporting p50/p95/p99/max, extra upstream load and which path
+won.
+
+    python bench/proxy_hedging.py --requests 300 --deadline-ms 4000
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+REPLY = " ".join(["word"] * 60)
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def run(proxy, args, deadline_ms, hedge_models: dict) -> dict:
+    proxy.HEDGE_MODELS = hedge_models
+    proxy._latencies.clear()
+    for k in proxy._hedge_stats:
+        proxy._hedge_stats[k] = 0
+
+    with FakeOpenAI(latency=args.latency_ms / 1000, model_latency={"gpt-4o-mini": args.fast_ms / 1000},
+                    latency_jitter=0.3, slow_rate=args.slow_rate, slow_latency=args.slow_ms / 1000,
+                    reply=REPLY, chunk_delay=0.002, seed=18) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        def one(i):
+            start = time.perf_counter()
+            result = proxy.main(resource, [{"role": "user", "content": f"request {i}"}],
+                                use_cache=False, deadline_ms=deadline_ms)
+            return time.perf_counter() - start, result
+
+        with quiet(), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(one, range(args.requests)))
+        # Let cancelled losers hang up before reading the counters
+        time.sleep(0.5)
+
+    times = [t for t, _ in outcomes]
+    paths = {}
+    for _, result in outcomes:
+        path = (result.get("hedge") or {}).get("path") or ("ok" if result["success"] else "failed")
+        paths[path] = paths.get(path, 0) + 1
+    return {
+        "times": times,
+        "failed": sum(1 for _, r in outcomes if not r["success"]),
+        "upstream": upstream.requests,
+        "abandoned": upstream.abandoned_streams,
+        "paths": paths
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--fast-ms", type=float, default=200.0)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=6000.0)
+    parser.add_argument("--deadline-ms", type=float, default=4000.0)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    # Isolate tail latency from rate limiting
+    proxy.RATE_LIMIT_ENABLED = False
+    proxy.COALESCE_ENABLED = False
+
+    print(f"{args.requests} requests, {args.slow_rate:.0%} take {args.slow_ms / 1000:g} s, "
+          f"budget {args.deadline_ms / 1000:g} s")
+    scenarios = (
+        ("single call", None, {}),
+        ("hedge same model", args.deadline_ms, {}),
+        ("hedge to gpt-4o-mini", args.deadline_ms, {"gpt-4o": "gpt-4o-mini"}),
+    )
+    for label, deadline_ms, hedge_models in scenarios:
+        r = run(proxy, args, deadline_ms, hedge_models)
+        t = r["times"]
+        print(f"{label:21} p50 {percentile(t, 0.5) * 1000:6.0f} ms   p95 {percentile(t, 0.95) * 1000:6.0f} ms   "
+              f"p99 {percentile(t, 0.99) * 1000:6.0f} ms   max {max(t) * 1000:6.0f} ms   "
+              f"mean {statistics.mean(t) * 1000:5.0f} ms")
+        print(f"{'':21} upstream calls {r['upstream']} (+{r['upstream'] / args.requests - 1:.0%}), "
+              f"cancelled mid-stream {r['abandoned']}, failed {r['failed']}, paths {r['paths']}")
+    print(f"observed latency {proxy.hedge_stats()['latency_ms']}")
+
+
+if __name__ == "__main__":
+    main()
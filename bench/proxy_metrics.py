@@ -0,0 +1,98 @@
+"""
+Benchmark: per-phase timings, token counters and the Prometheus snapshot.
+
+Drives WINDMILL_SCRIPT.py:main against a local fake OpenAI with a mix of
+fresh and repeated (cached) recommendation requests, then prints where the
+time went per phase (rolling p50/p95/p99), the token counters and the head
+of main(metrics="prometheus"). Also checks each request's "timings" add up
+to its total and measures the instrumentation's own overhead on cache hits,
+the cheapest path, with METRICS_ENABLED off and on.
+
+    python bench/proxy_metrics.py --requests 200 --latency-ms 300
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+from synthetic import recommendation_text
+
+# Phases nested inside another phase; they are excluded when checking that
+# a request's spans account for its total
+NESTED = {"total", "upstream_connect"}
+
+
+def cache_hit_cost(proxy, resource: dict, calls: int, enabled: bool) -> float:
+    """Mean microseconds per cache-hit main() call"""
+    proxy.METRICS_ENABLED = enabled
+    messages = [{"role": "user", "content": "cached"}]
+    with quiet():
+        proxy.main(resource, messages)
+        start = time.perf_counter()
+        for _ in range(calls):
+            proxy.main(resource, messages)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=80,
+                        help="distinct prompts among the requests (the rest are cache hits)")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--connect-ms", type=float, default=20.0)
+    parser.add_argument("--overhead-calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    proxy.RATE_LIMIT_ENABLED = False
+    rng = random.Random(21)
+    prompts = [rng.randrange(args.distinct) for _ in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeOpenAI(latency=args.latency_ms / 1000, connect_delay=args.connect_ms / 1000,
+                       reply=recommendation_text(), latency_jitter=0.3, seed=21) as upstream:
+        proxy.CACHE_DB_PATH = os.path.join(tmp, "cache.sqlite")
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        def one(prompt):
+            messages = [{"role": "user", "content": f"Recommendation {prompt}"}]
+            return proxy.main(resource, messages, validate=True)
+
+        with quiet(), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(one, prompts))
+        assert all(r["success"] for r in results), [r for r in results if not r["success"]][:1]
+
+        gaps = [r["timings"]["total"] - sum(ms for phase, ms in r["timings"].items() if phase not in NESTED)
+                for r in results]
+        print(f"{args.requests} requests, {upstream.requests} upstream calls")
+        print(f"unaccounted time per request (total - spans): median {statistics.median(gaps):.2f} ms, "
+              f"max {max(gaps):.2f} ms")
+
+        snapshot = proxy.main(resource, metrics="json")["metrics"]
+        print(f"{'phase':18} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for phase, h in snapshot["phases"].items():
+            w = h["window"]
+            print(f"{phase:18} {w['count']:6} {w.get('p50', 0):9.2f} {w.get('p95', 0):9.2f} {w.get('p99', 0):9.2f}")
+        print(f"tokens {snapshot['tokens']}")
+
+        text = proxy.main(resource, metrics="prometheus")["metrics"]
+        lines = text.splitlines()
+        print(f"prometheus snapshot: {len(lines)} lines, {len(text)} bytes; e.g.")
+        for line in [l for l in lines if "phase=\"total\"" in l][-3:]:
+            print(f"  {line}")
+
+        off = cache_hit_cost(proxy, resource, args.overhead_calls, False)
+        on = cache_hit_cost(proxy, resource, args.overhead_calls, True)
+        print(f"cache hit cost   metrics off {off:6.1f} us   on {on:6.1f} us   (+{on - off:.1f} us per call)")
+
+
+if __name__ == "__main__":
+    main()
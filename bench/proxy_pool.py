@@ -0,0 +1,68 @@
+"""
+Benchmark: pooled keep-alive client vs a fresh connection per call.
+
+Runs WINDMILL_SCRIPT.py:main against a local fake OpenAI that adds a fixed
+delay to every new TCP connection (standing in for the TCP+TLS handshake to
+api.openai.com), then reports per-call latency and connections opened.
+
+    python bench/proxy_pool.py --calls 50 --handshake-ms 40
+"""
+
+import argparse
+import statistics
+import time
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+MESSAGES = [{"role": "user", "content": "Hello, are you working?"}]
+
+
+def run(proxy, resource: dict, calls: int, fresh_each_call: bool) -> list:
+    timings = []
+    for _ in range(calls):
+        if fresh_each_call:
+            proxy.reset_client()
+        start = time.perf_counter()
+        with quiet():
+            result = proxy.main(resource, MESSAGES, max_tokens=100, use_cache=False)
+        timings.append(time.perf_counter() - start)
+        assert result["success"], result
+    return timings
+
+
+def report(label: str, timings: list, connections: int) -> None:
+    print(f"{label:<10} mean {statistics.mean(timings) * 1000:7.2f} ms   "
+          f"p95 {statistics.quantiles(timings, n=20)[-1] * 1000:7.2f} ms   "
+          f"connections {connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    # Back-to-back calls would otherwise be paced by the token bucket
+    proxy.RATE_LIMIT_ENABLED = False
+    with FakeOpenAI(latency=args.latency_ms / 1000, connect_delay=args.handshake_ms / 1000) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        fresh = run(proxy, resource, args.calls, fresh_each_call=True)
+        fresh_connections = upstream.connections
+
+        proxy.reset_client()
+        pooled = run(proxy, resource, args.calls, fresh_each_call=False)
+        pooled_connections = upstream.connections - fresh_connections
+
+    report("fresh", fresh, fresh_connections)
+    report("pooled", pooled, pooled_connections)
+    saved = (sum(fresh) - sum(pooled)) / args.calls
+    print(f"handshake time saved per call: {saved * 1000:.2f} ms")
+    print(f"pool stats: {proxy.pool_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark: proxy rate limiting under a burst that exceeds upstream capacity.
+
+Simulates a rollout: many browsers finish the assessment at once and each
+asks WINDMILL_SCRIPT.py:main for four recommendations, retrying failures
+the way generateSingleRecommendation does (sleep 2 s * attempt, at most
+three attempts, then static content). The local fake OpenAI accepts only
+--capacity-rps requests per second and also injects random 429s with a
+Retry-After. Runs once with RATE_LIMIT_ENABLED off (every 429 goes back to
+the browser) and once with the limiter, checks that the limiter's median
+throughput is not below the run without it, then checks that the circuit
+breaker fails fast through a full upstream outage.
+
+    python bench/proxy_ratelimit.py --browsers 40 --capacity-rps 20
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+CATEGORIES = ["Delegation", "Communication", "Discernment", "Keeping It Twilio"]
+CLIENT_ATTEMPTS = 3
+
+
+def browser(proxy, resource: dict, index: int, sleep_scale: float, started: float, done: list) -> None:
+    """One respondent's four recommendations with app.js's client-side retry loop"""
+    for category in CATEGORIES:
+        messages = [{"role": "user", "content": f"Respondent {index}: recommendation for {category}"}]
+        outcome = "static"
+        for attempt in range(CLIENT_ATTEMPTS):
+            if attempt:
+                time.sleep(2.0 * attempt * sleep_scale)
+            result = proxy.main(resource, messages, use_cache=False)
+            if result.get("success"):
+                outcome = "ai"
+                break
+            if result.get("fallback") == "static":
+                break
+        done.append((time.perf_counter() - started, outcome))
+
+
+def run(proxy, args, limited: bool) -> dict:
+    proxy.RATE_LIMIT_ENABLED = limited
+    proxy._limiters.clear()
+    done = []
+    with FakeOpenAI(latency=args.latency_ms / 1000, capacity_rps=args.capacity_rps,
+                    fail_rate=args.fail_rate, retry_after=args.retry_after, seed=16) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+        started = time.perf_counter()
+        with quiet(), ThreadPoolExecutor(max_workers=args.browsers) as pool:
+            for i in range(args.browsers):
+                pool.submit(browser, proxy, resource, i, args.client_sleep_scale, started, done)
+        elapsed = time.perf_counter() - started
+
+    ai = sorted(t for t, outcome in done if outcome == "ai")
+    per_second = [0] * (int(elapsed) + 1)
+    for t in ai:
+        per_second[int(t)] += 1
+    busy = per_second[:max(1, int(ai[-1]) if ai else 1)]
+    return {
+        "elapsed": elapsed,
+        "ai": len(ai),
+        "static": len(done) - len(ai),
+        "upstream": upstream.requests,
+        "rejected": upstream.rejected,
+        "median_rps": statistics.median(busy),
+        "min_rps": min(busy),
+        "limiter": proxy.limiter_stats().get("gpt-4o")
+    }
+
+
+def outage(proxy, args) -> dict:
+    """Upstream answering 503 to everything: how fast do callers get the fallback marker?"""
+    proxy.RATE_LIMIT_ENABLED = True
+    proxy._limiters.clear()
+    times = []
+    with FakeOpenAI(latency=args.latency_ms / 1000, fail_rate=1.0, fail_status=503) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+        with quiet():
+            for i in range(args.browsers):
+                start = time.perf_counter()
+                result = proxy.main(resource, [{"role": "user", "content": f"outage {i}"}], use_cache=False)
+                times.append(time.perf_counter() - start)
+                assert result.get("fallback") == "static", result
+    return {"requests": len(times), "upstream": upstream.requests, "times": times,
+            "limiter": proxy.limiter_stats()["gpt-4o"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--browsers", type=int, default=40)
+    parser.add_argument("--capacity-rps", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--fail-rate", type=float, default=0.02)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--proxy-rps", type=float, default=30.0,
+                        help="token bucket rate configured in the proxy (deliberately above capacity)")
+    parser.add_argument("--client-sleep-scale", type=float, default=0.5,
+                        help="scale app.js's 2 s * attempt retry sleeps to keep the run short")
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    proxy.MODEL_RATE_LIMITS["gpt-4o"] = (args.proxy_rps, int(args.proxy_rps))
+
+    total = args.browsers * len(CATEGORIES)
+    print(f"{args.browsers} browsers x 4 categories against {args.capacity_rps:g} req/s upstream "
+          f"({args.fail_rate:.0%} random 429s, Retry-After {args.retry_after:g} s)")
+    results = {}
+    for label, limited in (("no limiter", False), ("limiter", True)):
+        r = results[label] = run(proxy, args, limited)
+        print(f"{label:11}  AI {r['ai']:4}/{total}   static {r['static']:4}   "
+              f"upstream calls {r['upstream']:5} (429s {r['rejected']:5})   "
+              f"AI recs/s median {r['median_rps']:5.1f} min {r['min_rps']:3}   wall {r['elapsed']:5.1f} s")
+        if r["limiter"]:
+            l = r["limiter"]
+            print(f"             limit settled at {l['limit']}, {l['retries']} in-proxy retries, "
+                  f"{l['breaker_opens']} breaker opens, "
+                  f"mean admission wait {l['wait_ms'] / l['admitted']:.0f} ms")
+    # Isolated 429s must not cost throughput: they pause the model but only
+    # a cluster of them lowers the concurrency limit
+    assert results["limiter"]["median_rps"] >= results["no limiter"]["median_rps"], results
+
+    o = outage(proxy, args)
+    print(f"outage (503s)  {o['requests']} requests -> {o['upstream']} upstream calls, "
+          f"fallback in median {statistics.median(o['times']) * 1000:.1f} ms "
+          f"(first {o['times'][0] * 1000:.0f} ms, breaker opens {o['limiter']['breaker_opens']})")
+
+
+if __name__ == "__main__":
+    main()
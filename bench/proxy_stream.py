@@ -0,0 +1,60 @@
+"""
+Benchmark: time-to-first-token with stream=True vs a blocking call.
+
+Runs WINDMILL_SCRIPT.py:main against a local fake OpenAI that emits one
+SSE chunk per word with a fixed delay, the way a 300-450 word
+recommendation trickles out of gpt-4o.
+
+    python bench/proxy_stream.py --words 400 --chunk-ms 15
+"""
+
+import argparse
+import time
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+
+MESSAGES = [{"role": "user", "content": "Write a recommendation."}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--chunk-ms", type=float, default=15.0)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+
+    reply = " ".join(f"word{i}" for i in range(args.words))
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    with FakeOpenAI(latency=args.latency_ms / 1000, chunk_delay=args.chunk_ms / 1000, reply=reply) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        start = time.perf_counter()
+        with quiet():
+            result = proxy.main(resource, MESSAGES, use_cache=False)
+        blocking = time.perf_counter() - start
+        assert result["success"], result
+
+        start = time.perf_counter()
+        first_token = None
+        chunks = 0
+        with quiet():
+            for event in proxy.main(resource, MESSAGES, use_cache=False, stream=True):
+                if event["type"] == "delta":
+                    chunks += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                else:
+                    summary = event
+        total = time.perf_counter() - start
+
+    assert summary["success"] and summary["response"] == reply, summary
+    print(f"blocking wait          {blocking * 1000:8.1f} ms")
+    print(f"streamed first token   {first_token * 1000:8.1f} ms")
+    print(f"streamed total         {total * 1000:8.1f} ms")
+    print(f"summary usage          {summary['usage']} finish_reason={summary['finish_reason']}")
+    print(f"chunks forwarded       {chunks}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Simulation: bad generations retried by the browser vs validated in the proxy.
+
+A local fake OpenAI answers --bad-rate of calls with a bad recommendation
+(a "Could you please provide" reply, too short, wrong heading style, or
+slightly too long) and the rest with a well-formed one. The "browser
+retry" run mimics generateSingleRecommendation before validation: only the
+invalid-phrase check, and each retry pays another Windmill job
+(--job-overhead-ms) plus app.js's 2 s * attempt sleep. The "proxy
+validation" run sends validate=True and makes one browser round trip.
+Reports browser round trips, upstream calls, time-to-recommendation and how
+many delivered recommendations would pass the proxy's checks.
+
+    python bench/proxy_validation.py --recommendations 200 --bad-rate 0.3
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+from synthetic import recommendation_text
+
+CLIENT_ATTEMPTS = 3
+
+
+def replies(bad_rate: float) -> list:
+    good = recommendation_text(380)
+    bad = [
+        "Some essential information is missing. Could you please provide your recent work examples?",
+        recommendation_text(180),
+        recommendation_text(380, "**{}:**"),
+        recommendation_text(490),
+    ]
+    bad_count = round(100 * bad_rate)
+    return [bad[i % len(bad)] for i in range(bad_count)] + [good] * (100 - bad_count)
+
+
+def is_invalid_recommendation_text(text: str) -> bool:
+    """app.js isInvalidRecommendationText"""
+    return "essential information is missing" in text or "Could you please provide" in text
+
+
+def run(proxy, args, validate: bool) -> dict:
+    outcomes = []
+    with FakeOpenAI(latency=args.latency_ms / 1000, replies=replies(args.bad_rate), seed=19) as upstream:
+        resource = {"api_key": "test", "api_url": upstream.url}
+
+        def browser(i):
+            messages = [{"role": "user", "content": f"Recommendation {i}"}]
+            start = time.perf_counter()
+            round_trips = 0
+            text = None
+            for attempt in range(CLIENT_ATTEMPTS):
+                if attempt:
+                    time.sleep(2.0 * attempt * args.client_sleep_scale)
+                time.sleep(args.job_overhead_ms / 1000)
+                round_trips += 1
+                result = proxy.main(resource, messages, use_cache=False, validate=validate)
+                if result.get("fallback") == "static":
+                    break
+                if result.get("success") and (validate or not is_invalid_recommendation_text(result["response"])):
+                    text = result["response"]
+                    break
+            return time.perf_counter() - start, round_trips, text
+
+        with quiet(), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(browser, range(args.recommendations)))
+
+    delivered = [text for _, _, text in outcomes if text is not None]
+    verdicts = {}
+    for text in delivered:
+        verdict = proxy.validate_recommendation(text)["verdict"]
+        verdicts[verdict] = verdicts.get(verdict, 0) + 1
+    times = sorted(t for t, _, _ in outcomes)
+    return {
+        "times": times,
+        "round_trips": sum(r for _, r, _ in outcomes),
+        "upstream": upstream.requests,
+        "static": len(outcomes) - len(delivered),
+        "verdicts": verdicts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--recommendations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--bad-rate", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--job-overhead-ms", type=float, default=800.0,
+                        help="browser -> Windmill round trip and job queue wait per attempt")
+    parser.add_argument("--client-sleep-scale", type=float, default=0.25,
+                        help="scale app.js's 2 s * attempt retry sleeps to keep the run short")
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    proxy.RATE_LIMIT_ENABLED = False
+    proxy.COALESCE_ENABLED = False
+
+    print(f"{args.recommendations} recommendations, {args.bad_rate:.0%} of generations bad")
+    for label, validate in (("browser retry", False), ("proxy validation", True)):
+        r = run(proxy, args, validate)
+        t = r["times"]
+        n = args.recommendations
+        print(f"{label:17} browser round trips {r['round_trips']:4} ({r['round_trips'] / n:.2f}/rec)   "
+              f"upstream calls {r['upstream']:4}   static {r['static']:3}   "
+              f"p50 {statistics.median(t) * 1000:5.0f} ms   p95 {t[int(0.95 * len(t))] * 1000:5.0f} ms")
+        print(f"{'':17} delivered verdicts {r['verdicts']}")
+    print(f"validation stats {proxy.validation_stats()}")
+
+
+if __name__ == "__main__":
+    main()
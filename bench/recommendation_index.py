@@ -0,0 +1,115 @@
+"""
+Benchmark: precomputed recommendation index in WINDMILL_SCRIPT.py.
+
+Builds the index with index_action="build" against a local fake OpenAI for
+the teams (and sub-departments) in synthetic.py, then replays synthetic
+respondents' prompt payloads through main() and reports the hit rate, why
+misses were generated live, and latency for indexed vs live answers.
+Finally changes a level expectation (a prompt edit), checks that affected
+entries stop being served, and runs index_action="refresh".
+
+    python bench/recommendation_index.py --respondents 500 --latency-ms 800
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _loader import load_script, quiet
+from fakes import FakeOpenAI
+from synthetic import SUB_DEPARTMENTS, TEAMS, make_submission, recommendation_payloads, recommendation_text
+
+
+def replay(proxy, resource: dict, traffic: list, concurrency: int) -> dict:
+    def one(payload):
+        start = time.perf_counter()
+        result = proxy.main(resource, prompt=payload, use_cache=False)
+        return time.perf_counter() - start, result
+
+    with quiet(), ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, traffic))
+
+    hit_times, live_times = [], []
+    reasons = {}
+    for payload, (elapsed, result) in zip(traffic, outcomes):
+        assert result["success"], result
+        if result.get("index"):
+            hit_times.append(elapsed)
+            continue
+        live_times.append(elapsed)
+        reason = proxy.index_bucket(payload)[1] or "uncovered or stale"
+        reasons[reason] = reasons.get(reason, 0) + 1
+    return {"hit_times": hit_times, "live_times": live_times, "reasons": reasons}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--respondents", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=800.0,
+                        help="fake upstream latency for live generations")
+    parser.add_argument("--build-latency-ms", type=float, default=5.0,
+                        help="fake upstream latency while building (keeps the build short)")
+    parser.add_argument("--build-workers", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--work-focus-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    proxy = load_script("WINDMILL_SCRIPT.py")
+    # The fake upstream has no quota; don't pace the build
+    proxy.RATE_LIMIT_ENABLED = False
+    proxy.INDEX_BUILD_WORKERS = args.build_workers
+    teams = [[team, sub] for team in TEAMS for sub in SUB_DEPARTMENTS.get(team, [""])]
+
+    rng = random.Random(20)
+    traffic = [p for _ in range(args.respondents)
+               for p in recommendation_payloads(rng, make_submission(rng), args.work_focus_rate)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        proxy.INDEX_DB_PATH = os.path.join(tmp, "index.sqlite")
+        proxy.CACHE_DB_PATH = os.path.join(tmp, "cache.sqlite")
+
+        with FakeOpenAI(latency=args.build_latency_ms / 1000, reply=recommendation_text()) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            with quiet():
+                built = proxy.main(resource, index_action="build", index_teams=teams)
+        s = built["stats"]["coverage"]
+        print(f"build      {built['generated']} buckets generated ({built['failed']} failed) "
+              f"in {built['elapsed_ms'] / 1000:.1f} s, {upstream.requests} upstream calls, "
+              f"coverage {s['ratio']:.0%} of {s['buckets']}")
+        print(f"index size {os.path.getsize(proxy.INDEX_DB_PATH) / 1e6:.1f} MB")
+
+        with FakeOpenAI(latency=args.latency_ms / 1000, reply=recommendation_text()) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            r = replay(proxy, resource, traffic, args.concurrency)
+            hits, live = r["hit_times"], r["live_times"]
+            print(f"traffic    {len(traffic)} recommendations: {len(hits)} indexed "
+                  f"({len(hits) / len(traffic):.0%}), {len(live)} live, {upstream.requests} upstream calls")
+            print(f"           live because {r['reasons']}")
+            print(f"latency    indexed median {statistics.median(hits) * 1000:.2f} ms   "
+                  f"live median {statistics.median(live) * 1000:.0f} ms")
+
+            # A prompt edit: entries rendered with the old wording go stale
+            proxy.JOB_LEVEL_EXPECTATIONS["P4"] = proxy.JOB_LEVEL_EXPECTATIONS["P4"] + " Mentors peers."
+            proxy._index_fingerprints.clear()
+            stale = proxy.index_stats(teams=teams)["coverage"]
+            senior = [p for p in traffic if proxy._level_family(p["profile"]["jobLevel"]) == "senior"][:100]
+            assert not replay(proxy, resource, senior, args.concurrency)["hit_times"]
+            print(f"prompt edit {stale['stale']} entries stale, coverage now {stale['ratio']:.0%}")
+
+        with FakeOpenAI(latency=args.build_latency_ms / 1000, reply=recommendation_text()) as upstream:
+            resource = {"api_key": "test", "api_url": upstream.url}
+            with quiet():
+                refreshed = proxy.main(resource, index_action="refresh")
+        after = proxy.index_stats(teams=teams)
+        assert refreshed["generated"] == stale["stale"], refreshed
+        print(f"refresh    {refreshed['generated']} entries regenerated in {refreshed['elapsed_ms'] / 1000:.1f} s, "
+              f"coverage {after['coverage']['ratio']:.0%}")
+        print(f"lookups    {after['lookups']}")
+
+
+if __name__ == "__main__":
+    main()
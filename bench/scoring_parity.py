@@ -0,0 +1,140 @@
+"""
+Parity check: NumPy scoring engine vs calculateScores in app.js.
+
+Extracts the scoring functions and question data from app.js, runs them
+under Node on synthetic and boundary-case answer sets, and compares every
+score and maturity label with windmill-rescore-responses.py. Exits non-zero
+on the first mismatch. Also times the vectorized engine on a large batch.
+
+    python bench/scoring_parity.py --cases 5000 --bench-rows 200000
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import subprocess
+import sys
+import time
+
+from _loader import REPO_ROOT, load_script
+
+JS_DECLARATIONS = ("normalizeAnswerValue", "getMaturityLevel", "calculateScores")
+JS_DATA = ("dummyQuestions", "dummyCategories")
+
+NODE_RUNNER = """
+const fs = require('fs');
+const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+const state = { questions: dummyQuestions, categories: dummyCategories, answers: {} };
+const out = input.map(answers => {
+    state.answers = answers;
+    const s = calculateScores();
+    return {
+        overall: s.overall,
+        overallMaturity: s.overallMaturity,
+        hasNotStarted: s.hasNotStarted,
+        categories: s.categories,
+        categoryMaturities: s.categoryMaturities
+    };
+});
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def extract_js() -> str:
+    """Pull the scoring functions and question data out of app.js"""
+    source = (REPO_ROOT / "app.js").read_text()
+    chunks = []
+    for name in JS_DATA:
+        match = re.search(rf"^const {name} = \[.*?^\];", source, re.S | re.M)
+        chunks.append(match.group(0))
+    for name in JS_DECLARATIONS:
+        match = re.search(rf"^function {name}\(.*?^\}}", source, re.S | re.M)
+        chunks.append(match.group(0))
+    return "\n\n".join(chunks)
+
+
+def run_js(answer_sets: list) -> list:
+    script = extract_js() + "\n" + NODE_RUNNER
+    completed = subprocess.run(
+        ["node", "-e", script], input=json.dumps(answer_sets),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def boundary_cases(question_ids: list) -> list:
+    """Uniform answers, unanswered questions and category means on the thresholds"""
+    cases = [{}]
+    for value in (1, 2, 3, 4):
+        cases.append({qid: value for qid in question_ids})
+        cases.append({qid: [value] for qid in question_ids})
+    # Two-question categories averaging exactly 1.5 / 2.5 / 3.5
+    for low, high in ((1, 2), (2, 3), (3, 4)):
+        cases.append({qid: (low if i % 2 else high) for i, qid in enumerate(question_ids)})
+    # Each single question left unanswered, and each category left empty
+    for skip in question_ids:
+        cases.append({qid: 3 for qid in question_ids if qid != skip})
+    cases.append({qid: 4 for qid in question_ids[2:]})
+    cases.append({qid: [] for qid in question_ids})
+    return cases
+
+
+def random_case(rng: random.Random, question_ids: list) -> dict:
+    answers = {}
+    for qid in question_ids:
+        kind = rng.random()
+        if kind < 0.05:
+            continue
+        if kind < 0.7:
+            answers[qid] = rng.randint(1, 4)
+        else:
+            answers[qid] = sorted(rng.sample([1, 2, 3, 4], rng.randint(1, 4)))
+    return answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--bench-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    engine = load_script("windmill-rescore-responses.py")
+    question_ids = [qid for qid, _ in engine.QUESTIONS]
+
+    rng = random.Random(10)
+    cases = boundary_cases(question_ids) + [random_case(rng, question_ids) for _ in range(args.cases)]
+    expected = run_js(cases)
+
+    stored = [{qid: {"value": value} for qid, value in case.items()} for case in cases]
+    actual = engine.score_responses(stored)
+
+    for index, (case, js, py) in enumerate(zip(cases, expected, actual)):
+        if js != py:
+            print(f"❌ mismatch on case {index}: {json.dumps(case)}")
+            print(f"   app.js: {json.dumps(js)}")
+            print(f"   numpy:  {json.dumps(py)}")
+            sys.exit(1)
+    print(f"✅ {len(cases)} answer sets scored identically by app.js and the NumPy engine")
+
+    # Throughput on a large synthetic history
+    answers = [random_case(rng, question_ids) for _ in range(min(args.bench_rows, 20000))]
+    stored = [{qid: {"value": value} for qid, value in case.items()} for case in answers]
+    stored = list(itertools.islice(itertools.cycle(stored), args.bench_rows))
+
+    start = time.perf_counter()
+    matrix = engine.answers_matrix(stored)
+    parsed = time.perf_counter()
+    engine.score_matrix(matrix)
+    scored = time.perf_counter()
+    engine.score_responses(stored)
+    full = time.perf_counter()
+
+    print(f"rows {args.bench_rows}: parse {(parsed - start) * 1000:.0f} ms, "
+          f"score {(scored - parsed) * 1000:.0f} ms, "
+          f"parse+score+labels {(full - scored) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: write-behind buffering vs one Sheets write per submission.
+
+Fires a rollout-style burst of submissions at
+windmill-logging-pipeline.py:main (Sheets sink only, spool off) from
+concurrent callers against a local Sheets stand-in, with and without the
+write-behind buffer, and reports
+caller latency, Sheets requests and time until every row is written.
+
+    python bench/sheets_buffer.py --submissions 300 --callers 10 --latency-ms 150
+"""
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.auth.credentials import AnonymousCredentials
+
+from _loader import load_script, quiet
+from fakes import FakeSheets
+from synthetic import make_submission
+
+
+def burst(pipeline, submissions: list, callers: int) -> list:
+    def call(submission):
+        start = time.perf_counter()
+        assert pipeline.main(**submission)["success"]
+        return time.perf_counter() - start
+
+    with quiet(), ThreadPoolExecutor(max_workers=callers) as executor:
+        return list(executor.map(call, submissions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=300)
+    parser.add_argument("--callers", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--max-pending", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    submissions = [make_submission(rng) for _ in range(args.submissions)]
+    pipeline = load_script("windmill-logging-pipeline.py")
+    pipeline.ENABLED_SINKS = ["sheets"]
+    pipeline.SPOOL_ENABLED = False
+    # Both runs log the same submissions
+    pipeline.DEDUPE_ENABLED = False
+    pipeline.BUFFER_MAX_PENDING = args.max_pending
+
+    for buffered in (False, True):
+        with FakeSheets(latency=args.latency_ms / 1000) as fake:
+            sink = pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url)
+            pipeline.register_sink(sink)
+            pipeline.BUFFER_ENABLED = buffered
+            sink.get_service()
+
+            start = time.perf_counter()
+            timings = burst(pipeline, submissions, args.callers)
+            if buffered:
+                assert sink.get_buffer().flush(timeout=120)
+            total = time.perf_counter() - start
+            written = len(fake.rows["Summary"])
+
+        label = "buffered" if buffered else "direct"
+        print(f"{label:<9} caller mean {statistics.mean(timings) * 1000:7.1f} ms   "
+              f"sheets requests {fake.requests:4d}   all rows written in {total:6.2f} s   "
+              f"({written / total:6.0f} submissions/s)")
+        if buffered:
+            print(f"buffer stats: {sink.get_buffer().stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: cached Sheets client and single batchUpdate per submission.
+
+Runs windmill-logging-pipeline.py:main with the Sheets sink alone (spool
+and buffer off) against a local Sheets stand-in, first rebuilding the
+client for every submission (as every call used to),
+then with the warm cached client, and reports per-submission latency and
+API requests. The old code also made a second values.append round trip
+per submission on top of the client build.
+
+    python bench/sheets_client.py --submissions 50 --latency-ms 80
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from google.auth.credentials import AnonymousCredentials
+
+from _loader import load_script, quiet
+from fakes import FakeSheets
+from synthetic import make_submission
+
+
+def run(pipeline, submissions: list, rebuild_each_call: bool) -> list:
+    timings = []
+    for submission in submissions:
+        start = time.perf_counter()
+        if rebuild_each_call:
+            pipeline.get_sink("sheets").reset_service()
+        with quiet():
+            result = pipeline.main(**submission)
+        timings.append(time.perf_counter() - start)
+        assert result["success"], result
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--submissions", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    submissions = [make_submission(rng) for _ in range(args.submissions)]
+    pipeline = load_script("windmill-logging-pipeline.py")
+
+    with FakeSheets(latency=args.latency_ms / 1000) as fake:
+        pipeline.register_sink(pipeline.SheetsSink(AnonymousCredentials(), api_endpoint=fake.base_url))
+        pipeline.ENABLED_SINKS = ["sheets"]
+        pipeline.SPOOL_ENABLED = False
+        pipeline.BUFFER_ENABLED = False
+        # Both runs log the same submissions
+        pipeline.DEDUPE_ENABLED = False
+
+        # Cold: client rebuilt (service + tab lookup) for every submission
+        start_requests = fake.requests
+        cold = run(pipeline, submissions, rebuild_each_call=True)
+        cold_requests = fake.requests - start_requests
+
+        # Warm: one cached client for every submission
+        start_requests = fake.requests
+        warm = run(pipeline, submissions, rebuild_each_call=False)
+        warm_requests = fake.requests - start_requests
+
+    for label, timings, requests in (("cold", cold, cold_requests), ("warm", warm, warm_requests)):
+        print(f"{label:<6} mean {statistics.mean(timings) * 1000:7.1f} ms   "
+              f"requests/submission {requests / args.submissions:.2f}")
+    print(f"rows written: Summary {len(fake.rows['Summary'])}, Responses {len(fake.rows['Responses'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic assessment submissions shaped like logAssessmentResponse in app.js.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+QUESTIONS = {
+    'q1': 'Delegation', 'q2': 'Delegation',
+    'q4': 'Communication', 'q5': 'Communication', 'q6': 'Communication', 'q7': 'Communication',
+    'q8': 'Discernment', 'q9': 'Discernment',
+    'q10': 'Keeping It Twilio', 'q11': 'Keeping It Twilio', 'q12': 'Keeping It Twilio'
+}
+CATEGORIES = ['Delegation', 'Communication', 'Discernment', 'Keeping It Twilio']
+TEAMS = ['Engineering', 'Product', 'Sales', 'Marketing', 'Customer Success', 'People', 'Finance']
+SUB_DEPARTMENTS = {
+    'Engineering': ['Backend', 'Frontend', 'Infrastructure / Platform', 'Data Engineering', 'Security'],
+    'Product': ['Product Management', 'Product Design / UX', 'Product Analytics'],
+    'Sales': ['Account Executives', 'Sales Engineering / Solutions', 'Sales Operations'],
+    'Marketing': ['Product Marketing', 'Demand Generation', 'Developer Relations'],
+    'Customer Success': ['Customer Success Management', 'Solutions Architecture', 'Renewals']
+}
+LEVELS = ['P1', 'P2', 'P3', 'P4', 'S1', 'S2', 'S3', 'M1', 'M2', 'M3', 'E1', 'E2']
+MATURITY = {1: 'Not Started', 2: 'Compliant', 3: 'Competent', 4: 'Creative'}
+AI_FREQUENCIES = ['never', 'rarely', 'monthly', 'weekly', 'daily']
+WORK_FOCUS = ['Quarterly board decks', 'Incident postmortems for the messaging API']
+
+
+def maturity_label(score: float) -> str:
+    if score < 1.5:
+        return 'Not Started'
+    if score < 2.5:
+        return 'Compliant'
+    if score < 3.5:
+        return 'Competent'
+    return 'Creative'
+
+
+def make_submission(rng: random.Random, start: datetime = None) -> dict:
+    """One completed assessment with realistic multi-select answers"""
+    start = start or datetime(2026, 1, 1, tzinfo=timezone.utc)
+    answers = {}
+    for question_id in QUESTIONS:
+        count = 1 if rng.random() < 0.8 else rng.choice([2, 3])
+        answers[question_id] = sorted(rng.sample([1, 2, 3, 4], count))
+
+    category_scores = {}
+    for category in CATEGORIES:
+        peaks = [max(a) for q, a in answers.items() if QUESTIONS[q] == category]
+        category_scores[category] = sum(peaks) / len(peaks)
+    overall = sum(category_scores.values()) / len(category_scores)
+    has_not_started = any(score < 1.5 for score in category_scores.values())
+
+    team = rng.choice(TEAMS)
+    return {
+        'timestamp': (start + timedelta(minutes=rng.randrange(60 * 24 * 90))).isoformat(),
+        'team': team,
+        'subDepartment': rng.choice(SUB_DEPARTMENTS[team]) if team in SUB_DEPARTMENTS else '',
+        'jobTitle': 'Synthetic Respondent',
+        'jobLevel': rng.choice(LEVELS),
+        'overallScore': overall,
+        'overallMaturity': 'Not Started' if has_not_started else maturity_label(overall),
+        'hasNotStarted': has_not_started,
+        'categoryScores': category_scores,
+        'categoryMaturities': {c: maturity_label(s) for c, s in category_scores.items()},
+        'responses': {
+            # app.js runs getMaturityLevel on the raw answer array, which
+            # coerces single selections to their value and multi-selects to NaN
+            q: {'category': QUESTIONS[q], 'value': a, 'maturity': MATURITY[a[0]] if len(a) == 1 else 'Creative'}
+            for q, a in answers.items()
+        }
+    }
+
+
+def recommendation_text(words: int = 380, heading: str = "### {}") -> str:
+    """A recommendation with the three expected sections and about `words` words"""
+    filler = ("Draft the first version with Gemini, then review the gaps it "
+              "missed before you share it with your team this week").split(" ")
+    sections = ["What to Focus On", "Quick Wins", "Tips for Using AI Tools"]
+    per_section = (words - 12) // len(sections)
+    parts = []
+    for title in sections:
+        parts.append(heading.format(title))
+        parts.append(" ".join(filler[i % len(filler)] for i in range(per_section)))
+    return "\n\n".join(parts)
+
+
+def recommendation_payloads(rng: random.Random, submission: dict, work_focus_rate: float = 0.2) -> list:
+    """buildRecommendationPayload output for each category of a submission"""
+    answers = {q: r['value'] for q, r in submission['responses'].items()}
+    profile = {
+        'jobTitle': submission['jobTitle'],
+        'team': submission['team'],
+        'subDepartment': submission['subDepartment'],
+        'jobLevel': submission['jobLevel'],
+        'aiFrequency': rng.choice(AI_FREQUENCIES),
+        'aiToolsUsed': rng.sample(['Gemini', 'ChatGPT', 'NotebookLM'], rng.randint(0, 2)),
+        'workFocus': rng.choice(WORK_FOCUS) if rng.random() < work_focus_rate else ''
+    }
+    out = []
+    for category in CATEGORIES:
+        questions = [q for q, c in QUESTIONS.items() if c == category]
+        out.append({
+            'category': category,
+            'profile': profile,
+            'scores': {
+                'score': submission['categoryScores'][category],
+                'maturity': submission['categoryMaturities'][category],
+                'hasNotStarted': submission['hasNotStarted'],
+                'categoryMaturities': submission['categoryMaturities'] if submission['hasNotStarted'] else None
+            },
+            'nuance': {
+                'multiSelectCount': sum(1 for q in questions if len(answers[q]) > 1),
+                'totalQuestions': len(questions)
+            },
+            'responses': {q: answers[q] for q in questions}
+        })
+    return out
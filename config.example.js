@@ -20,9 +20,13 @@ const CONFIG = {
     OPENAI_MODEL: 'gpt-4o', // or 'gpt-4-turbo' for faster responses
     OPENAI_MAX_TOKENS: 1500,
     OPENAI_TEMPERATURE: 0.7,
+    RECOMMENDATION_DEADLINE_MS: 20000, // Latency budget per recommendation; the proxy hedges slow calls within it
     
     // Feature flags
     USE_AI_RECOMMENDATIONS: true, // Set to false to use static recommendations
+    USE_BATCH_RECOMMENDATIONS: true, // Generate all four categories in one concurrent Windmill job
+    USE_SERVER_PROMPTS: true, // Send compact payloads; the proxy renders the prompt from its templates
+    PROMPT_TEMPLATE_VERSION: 'v1', // Template version the proxy renders with (see WINDMILL_SCRIPT.py)
     
     // Fallback behavior
     FALLBACK_ON_ERROR: true // Use static recommendations if AI fails
@@ -0,0 +1,323 @@
+"""
+Windmill Script: Cohort Rollups for Maturity Dashboards
+=======================================================
+
+Keeps a small rollup table next to assessment_responses with one row per
+team x sub-department x job level x month. Each row holds respondent counts,
+score sums and maturity histograms (overall and per category). Postgres
+triggers update the rollups in the same transaction as every INSERT, UPDATE
+(e.g. a re-score) or DELETE on assessment_responses. Dashboard questions
+("maturity distribution for Engineering M2s this quarter") then read a
+handful of rollup rows instead of scanning the responses table.
+
+Setup (ONE-TIME, after windmill-logging-pipeline.py's postgres sink has
+created its table):
+1. Create a new script at path: u/VinceDeFreitas/assessment_cohort_rollups
+2. Copy this code into the script editor
+3. Run with action="install" to create the rollup table and triggers and
+   backfill them from existing responses
+
+Actions:
+- install: create/upgrade the rollup table and triggers, then rebuild
+- rebuild: recompute every rollup from assessment_responses (after bulk
+  loads with triggers disabled, or if the rollups are ever in doubt)
+- query: aggregate a cohort over a month range (any filter may be omitted)
+"""
+
+import time
+from datetime import date, datetime
+
+# Windmill PostgreSQL resource (host, port, user, dbname, password, sslmode)
+DB_RESOURCE_PATH = "u/VinceDeFreitas/assessment_db"
+
+# Rollup time bucket (a Postgres date_trunc unit)
+ROLLUP_BUCKET = 'month'
+
+MATURITY_LEVELS = ['Not Started', 'Compliant', 'Competent', 'Creative']
+
+CATEGORY_COLUMNS = {
+    'Delegation': 'delegation',
+    'Communication': 'communication',
+    'Discernment': 'discernment',
+    'Keeping It Twilio': 'twilio'
+}
+
+ROLLUP_KEY = ('team', 'sub_department', 'job_level', 'bucket')
+
+
+def _histogram_sql(column: str) -> str:
+    """Signed respondent counts per maturity level, as an INTEGER[] in MATURITY_LEVELS order"""
+    counts = ', '.join(
+        f"COALESCE(sum(sign) FILTER (WHERE {column} = '{level}'), 0)" for level in MATURITY_LEVELS
+    )
+    return f"ARRAY[{counts}]::INTEGER[]"
+
+
+# Rollup measures: (column, SQL type, aggregate over signed source rows)
+ROLLUP_MEASURES = [
+    ('respondents', 'INTEGER', 'sum(sign)'),
+    ('not_started', 'INTEGER', 'COALESCE(sum(sign) FILTER (WHERE has_not_started), 0)'),
+    ('overall_sum', 'NUMERIC', 'COALESCE(sum(sign * overall_score), 0)'),
+    ('overall_histogram', 'INTEGER[]', _histogram_sql('overall_maturity')),
+]
+for _col in CATEGORY_COLUMNS.values():
+    ROLLUP_MEASURES += [
+        (f'{_col}_count', 'INTEGER', f'COALESCE(sum(sign) FILTER (WHERE {_col}_score IS NOT NULL), 0)'),
+        (f'{_col}_sum', 'NUMERIC', f'COALESCE(sum(sign * {_col}_score), 0)'),
+        (f'{_col}_histogram', 'INTEGER[]', _histogram_sql(f'{_col}_maturity')),
+    ]
+
+
+def _merge_sql(column: str, sql_type: str) -> str:
+    if sql_type == 'INTEGER[]':
+        return f"{column} = assessment_histogram_add(r.{column}, EXCLUDED.{column})"
+    return f"{column} = r.{column} + EXCLUDED.{column}"
+
+
+def upsert_sql(source: str) -> str:
+    """
+    Fold the rows of `source` into the rollups
+
+    `source` must expose assessment_responses columns plus a `sign` column
+    (1 to add a row, -1 to remove it). Groups are upserted in key order so
+    concurrent writers lock rollup rows in the same order.
+    """
+    columns = ', '.join(ROLLUP_KEY + tuple(m[0] for m in ROLLUP_MEASURES))
+    aggregates = ',\n        '.join(m[2] for m in ROLLUP_MEASURES)
+    merges = ',\n        '.join(_merge_sql(m[0], m[1]) for m in ROLLUP_MEASURES)
+    return f"""
+    INSERT INTO assessment_cohort_rollups AS r ({columns})
+    SELECT
+        team, sub_department, job_level,
+        date_trunc('{ROLLUP_BUCKET}', timestamp)::date,
+        {aggregates}
+    FROM {source} AS s
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET
+        {merges},
+        updated_at = CURRENT_TIMESTAMP
+    """
+
+
+_TRIGGER_SOURCES = {
+    'INSERT': "(SELECT *, 1 AS sign FROM new_rows)",
+    'DELETE': "(SELECT *, -1 AS sign FROM old_rows)",
+    'UPDATE': "(SELECT *, 1 AS sign FROM new_rows UNION ALL SELECT *, -1 AS sign FROM old_rows)"
+}
+_TRIGGER_TABLES = {
+    'INSERT': 'NEW TABLE AS new_rows',
+    'DELETE': 'OLD TABLE AS old_rows',
+    'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows'
+}
+
+
+def _trigger_sql(operation: str) -> str:
+    name = f"assessment_rollup_{operation.lower()}"
+    return f"""
+CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $fn$
+BEGIN
+    {upsert_sql(_TRIGGER_SOURCES[operation])};
+    RETURN NULL;
+END
+$fn$ LANGUAGE plpgsql;
+
+DO $do$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = '{name}') THEN
+        CREATE TRIGGER {name}
+            AFTER {operation} ON assessment_responses
+            REFERENCING {_TRIGGER_TABLES[operation]}
+            FOR EACH STATEMENT EXECUTE PROCEDURE {name}();
+    END IF;
+END
+$do$;
+"""
+
+
+ROLLUP_SCHEMA_SQL = f"""
+ALTER TABLE assessment_responses ADD COLUMN IF NOT EXISTS sub_department VARCHAR(100) NOT NULL DEFAULT '';
+
+CREATE TABLE IF NOT EXISTS assessment_cohort_rollups (
+    team VARCHAR(100) NOT NULL,
+    sub_department VARCHAR(100) NOT NULL,
+    job_level VARCHAR(10) NOT NULL,
+    bucket DATE NOT NULL,
+    {', '.join(f'{m[0]} {m[1]} NOT NULL' for m in ROLLUP_MEASURES)},
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY ({', '.join(ROLLUP_KEY)})
+);
+
+CREATE INDEX IF NOT EXISTS idx_rollup_bucket ON assessment_cohort_rollups(bucket);
+CREATE INDEX IF NOT EXISTS idx_rollup_level ON assessment_cohort_rollups(job_level, bucket);
+
+-- Element-wise sum of two maturity histograms
+CREATE OR REPLACE FUNCTION assessment_histogram_add(a INTEGER[], b INTEGER[]) RETURNS INTEGER[] AS $fn$
+    SELECT array_agg(COALESCE(a[i], 0) + COALESCE(b[i], 0) ORDER BY i)::INTEGER[]
+    FROM generate_series(1, GREATEST(cardinality(a), cardinality(b))) AS i
+$fn$ LANGUAGE sql IMMUTABLE;
+""" + ''.join(_trigger_sql(op) for op in ('INSERT', 'UPDATE', 'DELETE'))
+
+
+# ============================================================================
+# MAINTENANCE AND QUERIES
+# ============================================================================
+
+def install_rollups(cur) -> None:
+    """Create the rollup table, helper function and triggers (idempotent)"""
+    cur.execute(ROLLUP_SCHEMA_SQL)
+
+
+def rebuild_rollups(cur) -> int:
+    """
+    Recompute every rollup from assessment_responses
+
+    Blocks writes to assessment_responses until the caller's transaction
+    commits, so no submission is counted twice or missed.
+
+    Returns:
+        Number of rollup rows written
+    """
+    cur.execute("LOCK TABLE assessment_responses IN SHARE MODE")
+    cur.execute("TRUNCATE assessment_cohort_rollups")
+    cur.execute(upsert_sql("(SELECT *, 1 AS sign FROM assessment_responses)"))
+    return cur.rowcount
+
+
+def _month(value) -> date:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return date(value.year, value.month, 1)
+
+
+def query_cohort(cur, team: str = None, sub_department: str = None, job_level: str = None,
+                 since=None, until=None) -> dict:
+    """
+    Aggregate the rollups for one cohort
+
+    Args:
+        team, sub_department, job_level: Cohort filters (None = all)
+        since: First month included (date or ISO string; rounded down to the month)
+        until: First month excluded
+
+    Returns:
+        Respondent counts, mean scores and maturity distributions
+    """
+    filters = []
+    params = []
+    for column, value in (('team', team), ('sub_department', sub_department), ('job_level', job_level)):
+        if value is not None:
+            filters.append(f"{column} = %s")
+            params.append(value)
+    if since is not None:
+        filters.append("bucket >= %s")
+        params.append(_month(since))
+    if until is not None:
+        filters.append("bucket < %s")
+        params.append(_month(until))
+
+    measures = [m[0] for m in ROLLUP_MEASURES]
+    cur.execute(
+        f"SELECT {', '.join(measures)} FROM assessment_cohort_rollups"
+        + (f" WHERE {' AND '.join(filters)}" if filters else ''),
+        params
+    )
+
+    totals = {name: 0 for name in measures}
+    for name in measures:
+        if name.endswith('_histogram'):
+            totals[name] = [0] * len(MATURITY_LEVELS)
+    rows = cur.fetchall()
+    for row in rows:
+        for name, value in zip(measures, row):
+            if name.endswith('_histogram'):
+                totals[name] = [a + b for a, b in zip(totals[name], value)]
+            else:
+                totals[name] += value
+
+    def summary(sum_value, count, histogram):
+        return {
+            'mean': round(float(sum_value) / count, 2) if count else None,
+            'distribution': dict(zip(MATURITY_LEVELS, histogram))
+        }
+
+    respondents = totals['respondents']
+    return {
+        'respondents': respondents,
+        'notStarted': totals['not_started'],
+        'overall': summary(totals['overall_sum'], respondents, totals['overall_histogram']),
+        'categories': {
+            category: summary(totals[f'{col}_sum'], totals[f'{col}_count'], totals[f'{col}_histogram'])
+            for category, col in CATEGORY_COLUMNS.items()
+        },
+        'rollupRows': len(rows)
+    }
+
+
+def main(
+    action: str = 'query',
+    team: str = None,
+    subDepartment: str = None,
+    jobLevel: str = None,
+    since: str = None,
+    until: str = None,
+    db_resource: dict = None
+):
+    """
+    Install, rebuild or query the cohort rollups
+
+    Args:
+        action: "install", "rebuild" or "query"
+        team, subDepartment, jobLevel: Cohort filters for "query" (omit for all)
+        since, until: Month range for "query" (since included, until excluded)
+        db_resource: PostgreSQL connection settings (defaults to the Windmill resource)
+    """
+    import psycopg2
+
+    if db_resource is None:
+        import wmill
+        db_resource = wmill.get_resource(DB_RESOURCE_PATH)
+
+    started = time.monotonic()
+    try:
+        conn = psycopg2.connect(
+            host=db_resource.get('host'),
+            port=db_resource.get('port', 5432),
+            user=db_resource.get('user'),
+            password=db_resource.get('password'),
+            dbname=db_resource.get('dbname'),
+            sslmode=db_resource.get('sslmode', 'prefer')
+        )
+        try:
+            with conn, conn.cursor() as cur:
+                if action == 'install':
+                    install_rollups(cur)
+                    rows = rebuild_rollups(cur)
+                    result = {'message': f'Installed rollups and rebuilt {rows} cohort rows', 'rollupRows': rows}
+                elif action == 'rebuild':
+                    rows = rebuild_rollups(cur)
+                    result = {'message': f'Rebuilt {rows} cohort rows', 'rollupRows': rows}
+                elif action == 'query':
+                    result = query_cohort(cur, team, subDepartment, jobLevel, since, until)
+                else:
+                    return {
+                        'success': False,
+                        'error': f"Unknown action: {action}",
+                        'message': 'action must be "install", "rebuild" or "query"'
+                    }
+        finally:
+            conn.close()
+
+        if action != 'query':
+            print(f"✅ {result['message']}")
+        return {'success': True, **result, 'elapsed_ms': round((time.monotonic() - started) * 1000, 1)}
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Error ({action}): {error_msg}")
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'message': f'Failed to {action} cohort rollups'
+        }
@@ -0,0 +1,382 @@
+"""
+Windmill Script: Columnar Export of Assessment History
+======================================================
+
+Streams assessment_responses into a directory of memory-mappable NumPy
+column files so notebooks and the re-scoring engine can load the whole
+history without parsing every row's JSONB.
+
+Layout (EXPORT_FORMAT_VERSION 1):
+- manifest.json: row count, last exported id, column dtypes, dictionaries
+- <column>.bin: raw little-endian values, one per row
+  - id, timestamp (epoch seconds, UTC), has_not_started
+  - overall and per-category scores (float32, NaN = missing)
+  - team, sub_department, job_level and maturity labels as int16
+    dictionary codes (-1 = missing); the dictionaries live in the manifest
+  - q_<question id>: uint8 bitmask of selected options (bit 0 = value 1),
+    so multi-select answers survive exactly; 0 = unanswered
+
+Each run appends only rows with an id above the manifest's last_id. Column
+files are written before the manifest is replaced, and anything past the
+manifest's row count is truncated on the next run, so an interrupted
+export never leaves a torn row behind.
+
+Ids are assigned at insert but transactions commit out of order, so with
+concurrent logging workers a row can become visible after a higher id was
+already exported. Each run also re-checks the EXPORT_RESCAN_IDS ids below
+last_id and appends any it hasn't exported, so rows are not kept in id
+order. A row committing later than that window is only picked up by a
+rebuild=True run.
+
+Rows already exported are not re-read, so changes to them - re-scoring in
+particular - need a rebuild=True run. windmill-rescore-responses.py queues
+one after apply=True (it rewrites every row, so a rebuild costs the same
+as patching the changed ones); after any other bulk UPDATE, run this
+script with rebuild=True.
+
+Reading:
+    export = ColumnarExport(EXPORT_DIR)
+    export.column('overall_score')      # np.memmap, zero-copy
+    export.decode('team')               # labels
+    export.peak_values()                # (rows x questions) for score_matrix()
+
+Setup:
+1. Create a new script at path: u/VinceDeFreitas/export_assessment_history
+2. Copy this code into the script editor
+3. Schedule it (e.g. hourly) with export_dir on persistent storage
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Windmill PostgreSQL resource (host, port, user, dbname, password, sslmode)
+DB_RESOURCE_PATH = "u/VinceDeFreitas/assessment_db"
+
+EXPORT_DIR = "/tmp/assessment_export"
+EXPORT_FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 5000
+EXPORT_RESCAN_IDS = 10000   # Ids below last_id re-checked for rows that committed late
+MANIFEST_FILE = 'manifest.json'
+
+CATEGORY_COLUMNS = {
+    'Delegation': 'delegation',
+    'Communication': 'communication',
+    'Discernment': 'discernment',
+    'Keeping It Twilio': 'twilio'
+}
+
+NUMERIC_COLUMNS = {
+    'id': '<i8',
+    'timestamp': '<i8',
+    'has_not_started': '|u1',
+    'overall_score': '<f4',
+    **{f'{col}_score': '<f4' for col in CATEGORY_COLUMNS.values()}
+}
+CATEGORICAL_COLUMNS = (
+    ['team', 'sub_department', 'job_level', 'overall_maturity']
+    + [f'{col}_maturity' for col in CATEGORY_COLUMNS.values()]
+)
+CATEGORICAL_DTYPE = '<i2'
+QUESTION_DTYPE = '|u1'
+QUESTION_PREFIX = 'q_'
+
+# Source columns, in the order export rows are fetched
+SOURCE_COLUMNS = list(NUMERIC_COLUMNS) + CATEGORICAL_COLUMNS + ['responses']
+
+# Highest selected value per bitmask (index = mask), for scoring
+_PEAK_BY_MASK = np.array([m.bit_length() for m in range(256)], dtype=np.float64)
+
+
+def answer_mask(value) -> int:
+    """Bitmask of the selected option values (1-8) in one stored answer"""
+    values = value if isinstance(value, list) else [value]
+    mask = 0
+    for v in values:
+        if isinstance(v, int) and not isinstance(v, bool) and 1 <= v <= 8:
+            mask |= 1 << (v - 1)
+    return mask
+
+
+def _epoch_seconds(value) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+# ============================================================================
+# WRITER
+# ============================================================================
+
+def _read_manifest(export_dir: str) -> dict:
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {
+            'version': EXPORT_FORMAT_VERSION,
+            'rows': 0,
+            'last_id': 0,
+            'columns': {
+                **{name: {'dtype': dtype} for name, dtype in NUMERIC_COLUMNS.items()},
+                **{name: {'dtype': CATEGORICAL_DTYPE, 'dictionary': []} for name in CATEGORICAL_COLUMNS}
+            },
+            'questions': []
+        }
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != EXPORT_FORMAT_VERSION:
+        raise ValueError(f"Export format {manifest.get('version')} in {export_dir}; "
+                         f"expected {EXPORT_FORMAT_VERSION} (re-export with rebuild=True)")
+    return manifest
+
+
+def _write_manifest(export_dir: str, manifest: dict) -> None:
+    path = os.path.join(export_dir, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _column_path(export_dir: str, name: str) -> str:
+    return os.path.join(export_dir, f'{name}.bin')
+
+
+def _append_column(export_dir: str, name: str, dtype: str, committed_rows: int, values: np.ndarray) -> None:
+    path = _column_path(export_dir, name)
+    itemsize = np.dtype(dtype).itemsize
+    with open(path, 'ab') as f:
+        # Drop anything a previous interrupted run wrote past the manifest
+        if f.tell() != committed_rows * itemsize:
+            f.truncate(committed_rows * itemsize)
+            f.seek(0, os.SEEK_END)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+
+def append_rows(export_dir: str, rows: list) -> int:
+    """
+    Append rows (tuples in SOURCE_COLUMNS order) to an export
+
+    Returns:
+        Total rows in the export afterwards
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    manifest = _read_manifest(export_dir)
+    if not rows:
+        return manifest['rows']
+    committed = manifest['rows']
+    columns = manifest['columns']
+    index = {name: i for i, name in enumerate(SOURCE_COLUMNS)}
+
+    batch = {}
+    batch['id'] = np.fromiter((row[index['id']] for row in rows), dtype='<i8', count=len(rows))
+    batch['timestamp'] = np.fromiter((_epoch_seconds(row[index['timestamp']]) for row in rows),
+                                     dtype='<i8', count=len(rows))
+    batch['has_not_started'] = np.fromiter((bool(row[index['has_not_started']]) for row in rows),
+                                           dtype='|u1', count=len(rows))
+    for name, dtype in NUMERIC_COLUMNS.items():
+        if name.endswith('_score'):
+            batch[name] = np.array(
+                [np.nan if row[index[name]] is None else float(row[index[name]]) for row in rows], dtype=dtype
+            )
+
+    for name in CATEGORICAL_COLUMNS:
+        dictionary = columns[name]['dictionary']
+        codes = {label: code for code, label in enumerate(dictionary)}
+        values = np.empty(len(rows), dtype=CATEGORICAL_DTYPE)
+        for i, row in enumerate(rows):
+            label = row[index[name]]
+            if label is None:
+                values[i] = -1
+                continue
+            code = codes.get(label)
+            if code is None:
+                code = codes[label] = len(dictionary)
+                dictionary.append(label)
+            values[i] = code
+        batch[name] = values
+
+    questions = manifest['questions']
+    masks = {question_id: np.zeros(len(rows), dtype=QUESTION_DTYPE) for question_id in questions}
+    for i, row in enumerate(rows):
+        responses = row[index['responses']] or {}
+        if isinstance(responses, str):
+            responses = json.loads(responses)
+        for question_id, data in responses.items():
+            if question_id not in masks:
+                # New question: existing rows read as unanswered
+                questions.append(question_id)
+                masks[question_id] = np.zeros(len(rows), dtype=QUESTION_DTYPE)
+                columns[QUESTION_PREFIX + question_id] = {'dtype': QUESTION_DTYPE}
+                _append_column(export_dir, QUESTION_PREFIX + question_id, QUESTION_DTYPE, 0,
+                               np.zeros(committed, dtype=QUESTION_DTYPE))
+            masks[question_id][i] = answer_mask(data.get('value') if isinstance(data, dict) else data)
+    for question_id, values in masks.items():
+        batch[QUESTION_PREFIX + question_id] = values
+
+    for name, values in batch.items():
+        _append_column(export_dir, name, columns[name]['dtype'], committed, values)
+
+    manifest['rows'] = committed + len(rows)
+    manifest['last_id'] = max(manifest['last_id'], int(batch['id'].max()))
+    _write_manifest(export_dir, manifest)
+    return manifest['rows']
+
+
+# ============================================================================
+# READER
+# ============================================================================
+
+class ColumnarExport:
+    """Read-only, memory-mapped view of an export directory"""
+
+    def __init__(self, export_dir: str = EXPORT_DIR):
+        self.export_dir = export_dir
+        self.manifest = _read_manifest(export_dir)
+        self.rows = self.manifest['rows']
+        self.questions = list(self.manifest['questions'])
+
+    def column(self, name: str) -> np.ndarray:
+        """Column values as a zero-copy memmap (codes for categorical columns)"""
+        dtype = np.dtype(self.manifest['columns'][name]['dtype'])
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(_column_path(self.export_dir, name), dtype=dtype, mode='r', shape=(self.rows,))
+
+    def dictionary(self, name: str) -> list:
+        return self.manifest['columns'][name]['dictionary']
+
+    def decode(self, name: str) -> np.ndarray:
+        """Labels for a categorical column (None where missing)"""
+        labels = np.array(self.dictionary(name) + [None], dtype=object)
+        return labels[self.column(name)]
+
+    def masks(self, question_ids: list = None) -> np.ndarray:
+        """(rows x questions) uint8 answer bitmasks"""
+        question_ids = question_ids or self.questions
+        matrix = np.zeros((self.rows, len(question_ids)), dtype=np.uint8)
+        for j, question_id in enumerate(question_ids):
+            if question_id in self.manifest['questions']:
+                matrix[:, j] = self.column(QUESTION_PREFIX + question_id)
+        return matrix
+
+    def peak_values(self, question_ids: list = None) -> np.ndarray:
+        """
+        (rows x questions) highest selected value, 0.0 if unanswered
+
+        Same matrix as answers_matrix() in windmill-rescore-responses.py,
+        so it can go straight into score_matrix().
+        """
+        return _PEAK_BY_MASK[self.masks(question_ids)]
+
+
+# ============================================================================
+# EXPORT JOB
+# ============================================================================
+
+def _late_ids(conn, export_dir: str, last_id: int) -> list:
+    """Ids within EXPORT_RESCAN_IDS below last_id that are in the table but not the export"""
+    floor = max(0, last_id - EXPORT_RESCAN_IDS)
+    with conn.cursor() as cur:
+        cur.execute("SELECT id FROM assessment_responses WHERE id > %s AND id <= %s", (floor, last_id))
+        present = np.fromiter((row[0] for row in cur), dtype='<i8')
+    if not present.size:
+        return []
+    exported = ColumnarExport(export_dir).column('id')
+    return [int(i) for i in np.setdiff1d(present, exported[exported > floor])]
+
+
+def export_from_db(conn, export_dir: str, batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Append rows newer than the export's last_id, and rows below it that
+    committed after it was exported (see EXPORT_RESCAN_IDS)
+
+    Returns:
+        Number of rows appended
+    """
+    last_id = _read_manifest(export_dir)['last_id'] if os.path.exists(export_dir) else 0
+    late = _late_ids(conn, export_dir, last_id) if last_id else []
+    if late:
+        print(f"Appending {len(late)} rows that committed after a higher id was exported")
+    appended = 0
+    with conn.cursor(name='columnar_export') as cur:
+        cur.itersize = batch_size
+        cur.execute(
+            f"SELECT {', '.join(SOURCE_COLUMNS)} FROM assessment_responses "
+            "WHERE id > %s OR id = ANY(%s) ORDER BY id",
+            (last_id, late)
+        )
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            append_rows(export_dir, rows)
+            appended += len(rows)
+    return appended
+
+
+def main(export_dir: str = EXPORT_DIR, rebuild: bool = False, batch_size: int = EXPORT_BATCH_SIZE,
+         db_resource: dict = None):
+    """
+    Export new assessment rows to the columnar export
+
+    Args:
+        export_dir: Directory holding the export (created if missing)
+        rebuild: Delete the existing export and start from the first row
+        batch_size: Rows fetched and appended per batch
+        db_resource: PostgreSQL connection settings (defaults to the Windmill resource)
+    """
+    import psycopg2
+
+    if db_resource is None:
+        import wmill
+        db_resource = wmill.get_resource(DB_RESOURCE_PATH)
+
+    started = time.monotonic()
+    try:
+        if rebuild and os.path.isdir(export_dir):
+            for filename in os.listdir(export_dir):
+                if filename == MANIFEST_FILE or filename.endswith('.bin'):
+                    os.remove(os.path.join(export_dir, filename))
+
+        conn = psycopg2.connect(
+            host=db_resource.get('host'),
+            port=db_resource.get('port', 5432),
+            user=db_resource.get('user'),
+            password=db_resource.get('password'),
+            dbname=db_resource.get('dbname'),
+            sslmode=db_resource.get('sslmode', 'prefer')
+        )
+        try:
+            with conn:
+                appended = export_from_db(conn, export_dir, batch_size)
+        finally:
+            conn.close()
+
+        manifest = _read_manifest(export_dir)
+        print(f"✅ Exported {appended} new rows ({manifest['rows']} total) to {export_dir}")
+        return {
+            'success': True,
+            'message': f'Exported {appended} new rows',
+            'appended': appended,
+            'rows': manifest['rows'],
+            'lastId': manifest['last_id'],
+            'exportDir': export_dir,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Error exporting responses: {error_msg}")
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'message': 'Failed to export responses'
+        }
@@ -0,0 +1,1590 @@
+"""
+Windmill Script: Log Assessment Responses (Pluggable Sink Pipeline)
+===================================================================
+
+One logging script for every destination. Each enabled sink (execution
+logs, local JSONL file, PostgreSQL, Google Sheets) receives the same
+submission concurrently, and a per-sink timeout keeps one slow backend
+from delaying the response. Adding a destination adds no latency to
+submissions beyond the slowest sink's timeout.
+
+This replaces the single-destination scripts (execution logs only,
+PostgreSQL only, Google Sheets only); set ENABLED_SINKS to the
+destination(s) the old script wrote to.
+
+To use:
+1. Copy this entire script
+2. In Windmill, go to Scripts -> u/VinceDeFreitas/log_assessment_response
+3. Replace all code with this
+4. Set ENABLED_SINKS below (create the PostgreSQL / Google resources first
+   if you enable those sinks - see POSTGRESQL_SETUP.md and
+   GOOGLE_SHEETS_PERSONAL.md)
+5. Save and Deploy
+
+No personally identifiable information is collected.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Sinks that receive every submission, in the order they are reported
+ENABLED_SINKS = ['stdout', 'file']
+
+# Seconds each sink may take before the submission is acknowledged without it
+# (the write keeps running in the background and its outcome is still counted)
+SINK_TIMEOUTS = {
+    'stdout': 1.0,
+    'file': 2.0,
+    'postgres': 5.0,
+    'sheets': 8.0
+}
+# Threads per sink; each sink has its own pool so a hung backend can only
+# back up its own writes
+SINK_WORKERS = 4
+
+# Latency histogram buckets (ms) for sink writes and whole submissions;
+# percentiles in sinkStats use the last METRICS_WINDOW_SAMPLES writes
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+METRICS_WINDOW_SAMPLES = 1024
+
+# Resends of an already logged assessment are acknowledged without touching
+# any sink (see DEDUPE INDEX below)
+DEDUPE_ENABLED = True
+DEDUPE_PATH = "/tmp/assessment_dedupe.sqlite"
+DEDUPE_WINDOW = 24 * 3600      # Seconds a client-supplied submissionKey is remembered
+DEDUPE_DERIVED_WINDOW = 120    # Seconds a content-derived key is remembered
+DEDUPE_MAX_KEYS = 50000        # Keys held in memory (oldest evicted first)
+
+# Execution-log format for the stdout sink. 'compact' writes one single-line
+# JSON record per submission with only LOG_FIELDS. 'answers' is the
+# per-question values (question -> value): each response's category and
+# maturity follow from it (see decode_responses), so nothing is lost. The
+# full `responses` (LOG_VERBOSE_FIELDS) are added to a
+# LOG_VERBOSE_SAMPLE_RATE share of records, marked "sampled": true.
+# 'pretty' is the banner plus indented dump of the whole payload. Records
+# go to stdout (the Windmill execution logs) or, with LOG_PATH set, to a
+# size-rotated file on the worker.
+LOG_FORMAT = 'compact'
+LOG_FIELDS = (
+    'timestamp', 'team', 'subDepartment', 'jobTitle', 'jobLevel',
+    'overallScore', 'overallMaturity', 'hasNotStarted',
+    'categoryScores', 'categoryMaturities', 'answers'
+)
+LOG_VERBOSE_FIELDS = ('responses',)
+LOG_VERBOSE_SAMPLE_RATE = 0.05
+LOG_PATH = None                      # None = stdout
+LOG_MAX_BYTES = 10 * 1024 * 1024     # Rotate the file at this size
+LOG_BACKUP_COUNT = 5                 # Rotated files kept
+
+LOG_FILE_PATH = "/tmp/assessment_responses.jsonl"   # file sink; rotated like LOG_PATH
+
+# Windmill PostgreSQL resource (host, port, user, dbname, password, sslmode)
+DB_RESOURCE_PATH = "u/VinceDeFreitas/assessment_db"
+# Connection pool size per worker. A whole org taking the assessment at once
+# produces bursts of concurrent jobs; reusing connections avoids a fresh
+# TCP+TLS+auth handshake for every submission.
+POOL_MIN_CONNECTIONS = 1
+POOL_MAX_CONNECTIONS = 5
+
+GOOGLE_RESOURCE_PATH = "u/VinceDeFreitas/personal_google_sheets"
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+SPREADSHEET_ID = 'YOUR_SPREADSHEET_ID_HERE'  # From Step 1.3 of GOOGLE_SHEETS_PERSONAL.md
+SUMMARY_SHEET = 'Summary'
+RESPONSES_SHEET = 'Responses'
+
+CATEGORY_COLUMNS = {
+    'Delegation': 'delegation',
+    'Communication': 'communication',
+    'Discernment': 'discernment',
+    'Keeping It Twilio': 'twilio'
+}
+
+QUESTION_CATEGORIES = {
+    'q1': 'Delegation', 'q2': 'Delegation',
+    'q4': 'Communication', 'q5': 'Communication', 'q6': 'Communication', 'q7': 'Communication',
+    'q8': 'Discernment', 'q9': 'Discernment',
+    'q10': 'Keeping It Twilio', 'q11': 'Keeping It Twilio', 'q12': 'Keeping It Twilio'
+}
+
+
+# ============================================================================
+# SINKS
+# ============================================================================
+# A sink has a `name` and a `write(submission, dedupe_key)` method that
+# raises on failure and may return a dict of details (a row id, a spool id)
+# for the submission's result. dedupe_key is the key main() claimed for
+# this sink's copy of the submission (None with DEDUPE_ENABLED off); a sink
+# that reports success before the submission is stored must release it if
+# the submission is later dropped, so a resend is logged instead of ignored. Sinks hold their
+# own warm-worker state (connections, clients) and must be safe to call
+# from the pipeline's worker threads.
+
+
+class Sink(ABC):
+    """Base class for logging destinations"""
+
+    name = 'sink'
+
+    @abstractmethod
+    def write(self, submission: dict, dedupe_key: str = None):
+        """Store one submission; raise on failure, optionally return details"""
+
+
+# ============================================================================
+# EXECUTION LOGS AND LOCAL FILE
+# ============================================================================
+
+_log_file = None
+_log_lock = threading.Lock()
+
+
+def _round_or_none(value):
+    return round(value, 2) if value is not None else None
+
+
+def compact_record(submission: dict, verbose: bool = None) -> dict:
+    """
+    One log record with LOG_FIELDS (scores rounded to 2 places, as stored)
+
+    verbose adds LOG_VERBOSE_FIELDS; None samples it at LOG_VERBOSE_SAMPLE_RATE.
+    """
+    responses = submission.get('responses') or {}
+    record = {'event': 'assessment_response'}
+    for field in LOG_FIELDS:
+        if field == 'answers':
+            record['answers'] = {
+                question_id: data.get('value') if isinstance(data, dict) else data
+                for question_id, data in responses.items()
+            }
+        elif field == 'overallScore':
+            record[field] = _round_or_none(submission.get(field))
+        elif field == 'categoryScores':
+            record[field] = {name: _round_or_none(score) for name, score in (submission.get(field) or {}).items()}
+        else:
+            record[field] = submission.get(field)
+    if verbose is None:
+        verbose = random.random() < LOG_VERBOSE_SAMPLE_RATE
+    if verbose:
+        record['sampled'] = True
+        for field in LOG_VERBOSE_FIELDS:
+            record[field] = submission.get(field)
+    return record
+
+
+def get_log_file():
+    """Return the rotating LOG_PATH logger, creating it on first use (None if it can't be opened)"""
+    global _log_file
+    with _log_lock:
+        if _log_file is None:
+            import logging
+            from logging.handlers import RotatingFileHandler
+            try:
+                handler = RotatingFileHandler(
+                    LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+                )
+            except OSError as e:
+                print(f"⚠️ Log file unavailable, logging to stdout: {str(e)}")
+                return None
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            _log_file = logging.getLogger('assessment_responses')
+            _log_file.setLevel(logging.INFO)
+            _log_file.propagate = False
+            _log_file.addHandler(handler)
+        return _log_file
+
+
+def print_pretty(submission: dict) -> None:
+    """Banner, per-category summary and the whole payload as indented JSON"""
+    lines = [
+        "=" * 60,
+        "📊 ASSESSMENT RESPONSE LOGGED",
+        "=" * 60,
+        f"Timestamp: {submission['timestamp']}",
+        f"Team: {submission['team']}"
+    ]
+    if submission.get('subDepartment'):
+        lines.append(f"Sub-Department: {submission['subDepartment']}")
+    lines += [
+        f"Job Title: {submission['jobTitle']}",
+        f"Job Level: {submission['jobLevel']}",
+        f"Overall Score: {submission['overallScore']:.2f}",
+        f"Overall Maturity: {submission['overallMaturity']}",
+        f"Has Not Started: {submission['hasNotStarted']}",
+        "",
+        "Category Scores:"
+    ]
+    for category, score in submission['categoryScores'].items():
+        maturity = submission['categoryMaturities'].get(category, 'Unknown')
+        lines.append(f"  - {category}: {score:.2f} ({maturity})")
+    lines += [
+        "",
+        f"Total Questions Answered: {len(submission['responses'])}",
+        "=" * 60,
+        "",
+        "Full Response Data (JSON):",
+        json.dumps(submission, indent=2),
+        "",
+        "=" * 60
+    ]
+    # One print call so concurrent submissions don't interleave
+    print("\n".join(lines))
+
+
+class StdoutSink(Sink):
+    """Execution logs (visible in the Windmill UI), or LOG_PATH, in LOG_FORMAT"""
+
+    name = 'stdout'
+
+    def write(self, submission: dict, dedupe_key: str = None) -> None:
+        if LOG_FORMAT == 'pretty':
+            print_pretty(submission)
+            return
+        line = json.dumps(compact_record(submission), separators=(',', ':'), default=str)
+        log_file = get_log_file() if LOG_PATH else None
+        if log_file is not None:
+            log_file.info(line)
+        else:
+            print(line)
+
+
+class FileSink(Sink):
+    """JSONL file on the worker's disk, size-rotated like LOG_PATH (LOG_MAX_BYTES, LOG_BACKUP_COUNT)"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _rotate(self) -> None:
+        # Same naming as RotatingFileHandler: path.1 is the newest backup.
+        # Done inline because importing logging.handlers costs more than the
+        # rest of a cold start on the default (stdout + file) sinks.
+        for index in range(LOG_BACKUP_COUNT - 1, 0, -1):
+            source = f'{self.path}.{index}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{index + 1}')
+        if LOG_BACKUP_COUNT > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            open(self.path, 'w').close()
+
+    def write(self, submission: dict, dedupe_key: str = None) -> None:
+        line = (json.dumps(submission, separators=(',', ':')) + "\n").encode('utf-8')
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            if LOG_MAX_BYTES > 0 and size and size + len(line) > LOG_MAX_BYTES:
+                self._rotate()
+            with open(self.path, 'ab') as f:
+                f.write(line)
+
+
+# ============================================================================
+# POSTGRESQL
+# ============================================================================
+# The sink creates the assessment_responses table on its first write (later
+# writes reuse the worker's pool). Per-category scores and maturities go into
+# their own columns for cheap filtering; the full objects are also kept as
+# JSONB. insert(), copy() and backfill_packed() are the bulk entry points for
+# backfills.
+
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS assessment_responses (
+    id SERIAL PRIMARY KEY,
+    timestamp TIMESTAMP NOT NULL,
+    team VARCHAR(100) NOT NULL,
+    sub_department VARCHAR(100) NOT NULL DEFAULT '',
+    job_title VARCHAR(200) NOT NULL,
+    job_level VARCHAR(10) NOT NULL,
+    overall_score DECIMAL(3,2) NOT NULL,
+    overall_maturity VARCHAR(50) NOT NULL,
+    has_not_started BOOLEAN NOT NULL,
+    delegation_score DECIMAL(3,2),
+    communication_score DECIMAL(3,2),
+    discernment_score DECIMAL(3,2),
+    twilio_score DECIMAL(3,2),
+    delegation_maturity VARCHAR(50),
+    communication_maturity VARCHAR(50),
+    discernment_maturity VARCHAR(50),
+    twilio_maturity VARCHAR(50),
+    category_scores JSONB,
+    category_maturities JSONB,
+    responses JSONB,
+    responses_packed BYTEA,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_team ON assessment_responses(team);
+CREATE INDEX IF NOT EXISTS idx_job_level ON assessment_responses(job_level);
+CREATE INDEX IF NOT EXISTS idx_overall_maturity ON assessment_responses(overall_maturity);
+CREATE INDEX IF NOT EXISTS idx_timestamp ON assessment_responses(timestamp);
+
+-- Tables created before sub-departments were logged
+ALTER TABLE assessment_responses ADD COLUMN IF NOT EXISTS sub_department VARCHAR(100) NOT NULL DEFAULT '';
+ALTER TABLE assessment_responses ADD COLUMN IF NOT EXISTS responses_packed BYTEA;
+"""
+
+INSERT_COLUMNS = (
+    'timestamp', 'team', 'sub_department', 'job_title', 'job_level',
+    'overall_score', 'overall_maturity', 'has_not_started',
+    'delegation_score', 'communication_score', 'discernment_score', 'twilio_score',
+    'delegation_maturity', 'communication_maturity', 'discernment_maturity', 'twilio_maturity',
+    'category_scores', 'category_maturities', 'responses', 'responses_packed'
+)
+
+INSERT_SQL = f"""
+INSERT INTO assessment_responses ({', '.join(INSERT_COLUMNS)})
+VALUES %s
+RETURNING id
+"""
+
+# Compact encoding of `responses` stored in responses_packed next to the JSONB:
+# one version byte, then one byte per question in that version's question
+# order. Each question byte is 0 if unanswered, otherwise PACKED_SCALAR (value
+# was a bare number) or PACKED_LIST (value was a list) plus a bitmask of the
+# selected options (bit 0 = value 1). Category and maturity are derived from
+# the question and value, so they are not stored. Decoded lists come back in
+# ascending order. Add a new version (never edit an old one) when questions
+# change.
+PACKED_VERSION = 1
+PACKED_QUESTIONS = {
+    1: ['q1', 'q2', 'q4', 'q5', 'q6', 'q7', 'q8', 'q9', 'q10', 'q11', 'q12']
+}
+PACKED_SCALAR = 0x80
+PACKED_LIST = 0x40
+PACKED_OPTIONS = 4
+
+
+def _maturity_of_value(value) -> str:
+    """getMaturityLevel from app.js applied to a raw answer (number or array)"""
+    if isinstance(value, list):
+        if len(value) > 1:
+            # JS coerces a multi-element array to NaN, which fails every comparison
+            return 'Creative'
+        value = value[0] if value else 0
+    if value < 1.5:
+        return 'Not Started'
+    if value < 2.5:
+        return 'Compliant'
+    if value < 3.5:
+        return 'Competent'
+    return 'Creative'
+
+
+def encode_responses(responses: dict, version: int = PACKED_VERSION):
+    """
+    Pack per-question responses into PACKED_QUESTIONS[version] layout
+
+    Returns:
+        bytes, or None if the responses can't be represented (unknown
+        question or option value); the JSONB copy is always stored
+    """
+    question_ids = PACKED_QUESTIONS[version]
+    if any(question_id not in question_ids for question_id in responses):
+        return None
+
+    packed = bytearray(1 + len(question_ids))
+    packed[0] = version
+    for i, question_id in enumerate(question_ids, start=1):
+        if question_id not in responses:
+            continue
+        data = responses[question_id]
+        value = data.get('value') if isinstance(data, dict) else data
+        values = value if isinstance(value, list) else [value]
+        mask = 0
+        for v in values:
+            if isinstance(v, bool) or not isinstance(v, int) or not 1 <= v <= PACKED_OPTIONS:
+                return None
+            mask |= 1 << (v - 1)
+        packed[i] = (PACKED_LIST if isinstance(value, list) else PACKED_SCALAR) | mask
+    return bytes(packed)
+
+
+def decode_responses(packed: bytes) -> dict:
+    """Unpack responses_packed back into the `responses` JSON shape"""
+    packed = bytes(packed)
+    question_ids = PACKED_QUESTIONS[packed[0]]
+    responses = {}
+    for question_id, code in zip(question_ids, packed[1:]):
+        if not code:
+            continue
+        values = [v for v in range(1, PACKED_OPTIONS + 1) if code & (1 << (v - 1))]
+        value = values if code & PACKED_LIST else values[0]
+        responses[question_id] = {
+            'category': QUESTION_CATEGORIES[question_id],
+            'value': value,
+            'maturity': _maturity_of_value(value)
+        }
+    return responses
+
+
+def build_row(submission: dict) -> tuple:
+    """Flatten one submission into INSERT_COLUMNS order"""
+    from psycopg2.extras import Json
+
+    category_scores = submission.get('categoryScores') or {}
+    category_maturities = submission.get('categoryMaturities') or {}
+    return (
+        submission['timestamp'],
+        submission['team'],
+        submission.get('subDepartment') or '',
+        submission['jobTitle'],
+        submission['jobLevel'],
+        round(submission['overallScore'], 2),
+        submission['overallMaturity'],
+        bool(submission['hasNotStarted']),
+        *[_round_or_none(category_scores.get(name)) for name in CATEGORY_COLUMNS],
+        *[category_maturities.get(name) for name in CATEGORY_COLUMNS],
+        Json(category_scores),
+        Json(category_maturities),
+        Json(submission.get('responses') or {}),
+        encode_responses(submission.get('responses') or {})
+    )
+
+
+class PostgresSink(Sink):
+    """assessment_responses table through a per-worker connection pool"""
+
+    name = 'postgres'
+
+    def __init__(self, db_resource: dict = None, max_connections: int = POOL_MAX_CONNECTIONS):
+        self.db_resource = db_resource
+        self.max_connections = max_connections
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get_pool(self):
+        """Return the sink's connection pool, creating it and the schema on first use"""
+        with self._lock:
+            if self._pool is None:
+                from psycopg2 import pool as pg_pool
+                db = self.db_resource
+                if db is None:
+                    import wmill
+                    db = wmill.get_resource(DB_RESOURCE_PATH)
+                pool = pg_pool.ThreadedConnectionPool(
+                    POOL_MIN_CONNECTIONS, self.max_connections,
+                    host=db.get('host'),
+                    port=db.get('port', 5432),
+                    user=db.get('user'),
+                    password=db.get('password'),
+                    dbname=db.get('dbname'),
+                    sslmode=db.get('sslmode', 'prefer')
+                )
+                conn = pool.getconn()
+                try:
+                    with conn, conn.cursor() as cur:
+                        cur.execute(CREATE_TABLE_SQL)
+                finally:
+                    pool.putconn(conn)
+                self._pool = pool
+            return self._pool
+
+    def insert(self, submissions: list) -> list:
+        """
+        Insert one or more submissions in a single multi-row INSERT
+
+        Returns:
+            List of new row IDs, in input order
+        """
+        from psycopg2.extras import execute_values
+
+        pool = self.get_pool()
+        conn = pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                rows = execute_values(
+                    cur, INSERT_SQL, [build_row(s) for s in submissions],
+                    page_size=500, fetch=True
+                )
+            return [row[0] for row in rows]
+        finally:
+            pool.putconn(conn)
+
+    def copy(self, submissions: list) -> int:
+        """
+        Bulk-load submissions with COPY (for backfills of historical data)
+
+        Returns:
+            Number of rows loaded
+        """
+        import csv
+        import io
+        from psycopg2.extras import Json
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for submission in submissions:
+            writer.writerow([
+                json.dumps(v.adapted) if isinstance(v, Json)
+                else '\\x' + v.hex() if isinstance(v, bytes)
+                else '\\N' if v is None else v
+                for v in build_row(submission)
+            ])
+        buffer.seek(0)
+
+        pool = self.get_pool()
+        conn = pool.getconn()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY assessment_responses ({', '.join(INSERT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buffer
+                )
+                return cur.rowcount
+        finally:
+            pool.putconn(conn)
+
+    def backfill_packed(self, batch_size: int = 5000) -> int:
+        """
+        Fill responses_packed for rows logged before the column existed
+
+        Returns:
+            Number of rows packed (rows that can't be packed stay NULL)
+        """
+        from psycopg2.extras import execute_values
+
+        pool = self.get_pool()
+        conn = pool.getconn()
+        packed_rows = 0
+        last_id = 0
+        try:
+            while True:
+                with conn, conn.cursor() as cur:
+                    cur.execute(
+                        "SELECT id, responses FROM assessment_responses "
+                        "WHERE responses_packed IS NULL AND id > %s ORDER BY id LIMIT %s",
+                        (last_id, batch_size)
+                    )
+                    rows = cur.fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    updates = [(row_id, encode_responses(responses or {})) for row_id, responses in rows]
+                    updates = [(row_id, packed) for row_id, packed in updates if packed is not None]
+                    execute_values(
+                        cur,
+                        "UPDATE assessment_responses AS t SET responses_packed = v.packed "
+                        "FROM (VALUES %s) AS v (id, packed) WHERE t.id = v.id",
+                        updates, template="(%s, %s::bytea)", page_size=1000
+                    )
+                    packed_rows += len(updates)
+        finally:
+            pool.putconn(conn)
+        return packed_rows
+
+    def write(self, submission: dict, dedupe_key: str = None) -> dict:
+        return {'id': self.insert([submission])[0]}
+
+
+# ============================================================================
+# GOOGLE SHEETS
+# ============================================================================
+# One Summary row and one Responses row per question, appended to both tabs
+# in a single batchUpdate. The sink keeps its credentials, Sheets service
+# object and tab IDs for the life of the worker (the service account
+# credentials refresh their own access token on expiry). By default a write
+# only appends the submission to the durable spool; see below.
+
+
+def _cell(value) -> dict:
+    """Convert a Python value to a Sheets CellData"""
+    if isinstance(value, bool):
+        return {'userEnteredValue': {'boolValue': value}}
+    if isinstance(value, (int, float)):
+        return {'userEnteredValue': {'numberValue': value}}
+    if isinstance(value, list):
+        # Multi-select answers
+        return {'userEnteredValue': {'stringValue': ', '.join(str(v) for v in value)}}
+    return {'userEnteredValue': {'stringValue': '' if value is None else str(value)}}
+
+
+def _append_cells(sheet_id: int, rows: list) -> dict:
+    return {
+        'appendCells': {
+            'sheetId': sheet_id,
+            'rows': [{'values': [_cell(v) for v in row]} for row in rows],
+            'fields': 'userEnteredValue'
+        }
+    }
+
+
+def build_rows(submission: dict) -> tuple:
+    """Return (summary_row, response_rows) for one submission"""
+    s = submission
+    scores = s['categoryScores']
+    maturities = s['categoryMaturities']
+    summary_row = [
+        s['timestamp'], s['team'], s['jobTitle'], s['jobLevel'],
+        round(s['overallScore'], 2), s['overallMaturity'], s['hasNotStarted'],
+        *[round(scores.get(name, 0), 2) for name in CATEGORY_COLUMNS],
+        *[maturities.get(name, '') for name in CATEGORY_COLUMNS]
+    ]
+    # One row per question
+    response_rows = [
+        [s['timestamp'], s['team'], s['jobTitle'], s['jobLevel'], question_id,
+         data.get('category', ''), data.get('value', 0), data.get('maturity', '')]
+        for question_id, data in s['responses'].items()
+    ]
+    return summary_row, response_rows
+
+
+# ============================================================================
+# WRITE-BEHIND BUFFER
+# ============================================================================
+# During company-wide rollouts every submission used to cost its own Sheets
+# request and we hit the per-minute quota. With BUFFER_ENABLED (and the spool
+# off or unavailable), the Sheets sink queues the rows and returns; a
+# background thread flushes everything queued so far in one batchUpdate once
+# BUFFER_MAX_BATCH submissions are waiting or the oldest has waited
+# BUFFER_MAX_DELAY seconds. The queue is bounded: when the sheet is slow and
+# BUFFER_MAX_PENDING submissions are waiting, callers block (up to
+# BUFFER_SUBMIT_TIMEOUT) and then fall back to a direct write. A batch that
+# still fails after BUFFER_FLUSH_RETRIES is dropped to the backup log and
+# its submissions' dedupe keys are released, so a resend is logged again.
+
+BUFFER_ENABLED = True
+BUFFER_MAX_BATCH = 50           # Submissions per flush
+BUFFER_MAX_DELAY = 2.0          # Seconds the oldest submission may wait
+BUFFER_MAX_PENDING = 500        # Bound on queued submissions (memory)
+BUFFER_SUBMIT_TIMEOUT = 5.0     # Seconds a caller waits for space before writing directly
+BUFFER_FLUSH_RETRIES = 3        # Failed flushes re-queue the batch this many times
+
+
+class WriteBehindBuffer:
+    """Bounded queue that hands items to flush_fn in bulk from a background thread"""
+
+    def __init__(self, flush_fn, max_batch: int, max_delay: float, max_pending: int, flush_retries: int,
+                 release_fn=None):
+        self.flush_fn = flush_fn
+        self.release_fn = release_fn   # Called with the dedupe key of each dropped item
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.flush_retries = flush_retries
+        self.stats = {'submitted': 0, 'flushes': 0, 'flushed': 0, 'failed_flushes': 0,
+                      'dropped': 0, 'blocked_submits': 0}
+        self._items = []            # (queued_at, attempts, item, dedupe_key)
+        self._in_flight = 0
+        self._draining = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='sheets-write-behind', daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self._items) + self._in_flight
+
+    def submit(self, item, timeout: float, dedupe_key: str = None) -> bool:
+        """Queue an item; returns False if the buffer stayed full for `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self.pending >= self.max_pending:
+                self.stats['blocked_submits'] += 1
+            while self.pending >= self.max_pending and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            if self._closed:
+                return False
+            self._items.append((time.monotonic(), 0, item, dedupe_key))
+            self.stats['submitted'] += 1
+            self._cond.notify_all()
+            return True
+
+    def _due(self) -> bool:
+        return bool(self._items) and (
+            len(self._items) >= self.max_batch or
+            time.monotonic() - self._items[0][0] >= self.max_delay or
+            self._draining > 0 or
+            self._closed
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._closed and not self._items:
+                        return
+                    timeout = self.max_delay - (time.monotonic() - self._items[0][0]) if self._items else None
+                    self._cond.wait(timeout)
+                batch = self._items[:self.max_batch]
+                del self._items[:self.max_batch]
+                self._in_flight = len(batch)
+
+            retry = self._flush_batch(batch)
+
+            with self._cond:
+                # Retries go back to the front, still counted against max_pending
+                self._items[:0] = retry
+                self._in_flight = 0
+                self._cond.notify_all()
+            if retry:
+                time.sleep(min(self.max_delay, 1.0))
+
+    def _flush_batch(self, batch: list) -> list:
+        """Hand one batch to flush_fn; returns the entries to retry"""
+        try:
+            self.flush_fn([item for _, _, item, _ in batch])
+            self.stats['flushes'] += 1
+            self.stats['flushed'] += len(batch)
+            return []
+        except Exception as e:
+            self.stats['failed_flushes'] += 1
+            print(f"❌ Buffered flush of {len(batch)} submissions failed: {str(e)}")
+            if self._closed or batch[0][1] + 1 >= self.flush_retries:
+                self.stats['dropped'] += len(batch)
+                self._backup_log(f"{len(batch)} submissions dropped after {batch[0][1] + 1} attempts", batch)
+                self._release(batch)
+                return []
+            return [(queued_at, attempts + 1, item, key) for queued_at, attempts, item, key in batch]
+
+    def _release(self, entries: list) -> None:
+        """Release the dedupe keys of dropped entries so their resends are logged"""
+        if self.release_fn is None:
+            return
+        for _, _, _, key in entries:
+            if key:
+                try:
+                    self.release_fn(key)
+                except Exception as e:
+                    print(f"⚠️ Could not release dedupe key of a dropped submission: {str(e)}")
+
+    @staticmethod
+    def _backup_log(reason: str, entries: list) -> None:
+        print("\n" + "=" * 60)
+        print(f"📊 BACKUP LOG ({reason})")
+        print("=" * 60)
+        for _, _, item, _ in entries:
+            print(json.dumps(item))
+        print("=" * 60)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Flush everything queued so far now; returns False if not drained within timeout"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._draining += 1
+            self._cond.notify_all()
+            try:
+                while self._items or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._draining -= 1
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Flush-on-shutdown: drain the queue and stop the background thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            if self._items:
+                self._backup_log(f"{len(self._items)} submissions not flushed at shutdown", self._items)
+                self._release(self._items)
+                self._items = []
+
+
+# ============================================================================
+# DURABLE SPOOL
+# ============================================================================
+# The logging endpoint is called with run_wait_result, so a slow or failing
+# Sheets write used to hold the job (and lose the per-question rows on
+# failure). With SPOOL_ENABLED, the Sheets sink only appends the submission
+# to a SQLite spool on the worker's disk (WAL mode, one small fsync'd
+# insert) and returns. A background drainer delivers spooled submissions to
+# Sheets in batches, deleting them only after a successful write (the
+# checkpoint) and backing off on failure. Nothing is ever dropped:
+# undelivered rows stay in the spool and are picked up again by the next job
+# on this worker.
+#
+# Every job on a worker shares the spool file and runs its own drainer, so
+# a batch is leased before delivery: claiming sets claimed_by and
+# lease_until in one write transaction, and other drainers skip rows whose
+# lease is still active. A drainer that dies mid-delivery leaves its lease
+# to expire after SPOOL_LEASE seconds, and the rows are delivered again.
+
+SPOOL_ENABLED = True
+SPOOL_PATH = "/tmp/assessment_log_spool.sqlite"
+SPOOL_SYNCHRONOUS = "NORMAL"    # WAL + NORMAL survives process crashes; FULL also survives power loss
+SPOOL_BATCH_SIZE = 50           # Submissions delivered per Sheets request
+SPOOL_POLL_INTERVAL = 1.0       # Seconds the drainer sleeps when the spool is empty
+SPOOL_RETRY_BASE = 2.0          # Backoff after a failed delivery: base * 2^attempts seconds
+SPOOL_RETRY_MAX = 300.0         # Backoff cap
+SPOOL_LEASE = 120.0             # Seconds a claimed batch is reserved for its drainer
+SPOOL_SHUTDOWN_TIMEOUT = 10.0   # Seconds spent draining at process exit
+
+
+class Spool:
+    """Append-only SQLite queue of submissions awaiting delivery, leased out in batches"""
+
+    def __init__(self, path: str, lease: float = SPOOL_LEASE):
+        self._lock = threading.Lock()
+        self.lease = lease
+        self.owner = uuid.uuid4().hex   # claimed_by for this process's claims
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={SPOOL_SYNCHRONOUS}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spool ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "queued_at REAL NOT NULL, "
+            "payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL DEFAULT 0, "
+            "last_error TEXT, "
+            "claimed_by TEXT, "
+            "lease_until REAL NOT NULL DEFAULT 0)"
+        )
+        # Spool files written before leases existed
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(spool)")}
+        if 'claimed_by' not in columns:
+            self._db.execute("ALTER TABLE spool ADD COLUMN claimed_by TEXT")
+        if 'lease_until' not in columns:
+            self._db.execute("ALTER TABLE spool ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+
+    def append(self, payload: dict) -> int:
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO spool (queued_at, payload) VALUES (?, ?)",
+                (time.time(), json.dumps(payload))
+            )
+            return cursor.lastrowid
+
+    def claim(self, limit: int) -> list:
+        """Lease the oldest deliverable entries not leased elsewhere; returns (id, attempts, payload)"""
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two drainers can't
+            # both select the same rows before either marks them
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "UPDATE spool SET claimed_by = ?, lease_until = ? "
+                    "WHERE id IN ("
+                    "SELECT id FROM spool WHERE next_attempt_at <= ? AND lease_until <= ? ORDER BY id LIMIT ?"
+                    ") RETURNING id, attempts, payload",
+                    (self.owner, now + self.lease, now, now, limit)
+                ).fetchall()
+                self._db.execute("COMMIT")
+            except sqlite3.Error:
+                self._db.execute("ROLLBACK")
+                raise
+        return sorted(((row_id, attempts, json.loads(payload)) for row_id, attempts, payload in rows),
+                      key=lambda entry: entry[0])
+
+    def ack(self, ids: list) -> None:
+        """Checkpoint: delivered entries are removed"""
+        with self._lock:
+            self._db.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+    def retry_later(self, entries: list, error: str) -> None:
+        """Back off failed entries and give up their lease"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "UPDATE spool SET attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "claimed_by = NULL, lease_until = 0 WHERE id = ? AND claimed_by = ?",
+                [
+                    (attempts + 1, now + min(SPOOL_RETRY_MAX, SPOOL_RETRY_BASE * 2 ** attempts), error,
+                     row_id, self.owner)
+                    for row_id, attempts, _ in entries
+                ]
+            )
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+
+class SpoolDrainer:
+    """Background thread that delivers spooled submissions with retry and checkpointing"""
+
+    def __init__(self, spool: Spool, deliver_fn, batch_size: int):
+        self.spool = spool
+        self.deliver_fn = deliver_fn
+        self.batch_size = batch_size
+        self.stats = {'delivered': 0, 'deliveries': 0, 'failed_deliveries': 0}
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sheets-spool-drainer', daemon=True)
+        self._thread.start()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def drain_once(self) -> int:
+        """Deliver one batch; returns how many entries were delivered"""
+        entries = self.spool.claim(self.batch_size)
+        if not entries:
+            return 0
+        try:
+            self.deliver_fn([payload for _, _, payload in entries])
+        except Exception as e:
+            self.stats['failed_deliveries'] += 1
+            print(f"❌ Spool delivery of {len(entries)} submissions failed (will retry): {str(e)}")
+            self.spool.retry_later(entries, str(e))
+            return 0
+        self.spool.ack([row_id for row_id, _, _ in entries])
+        self.stats['deliveries'] += 1
+        self.stats['delivered'] += len(entries)
+        return len(entries)
+
+    def _run(self) -> None:
+        # The first delivery builds the Sheets service (importing the Google
+        # client), so hold it for one poll interval: the submission that
+        # started the drainer returns first instead of sharing the GIL with
+        # that import. Notifications in the meantime leave _wake set.
+        self._stopping.wait(SPOOL_POLL_INTERVAL)
+        while not self._stopping.is_set():
+            if self.drain_once() == 0:
+                self._wake.wait(SPOOL_POLL_INTERVAL)
+                self._wake.clear()
+
+    def stop(self, timeout: float) -> None:
+        """Shutdown hook: deliver what we can within timeout, leave the rest spooled"""
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            while time.monotonic() < deadline and self.drain_once() > 0:
+                pass
+        remaining = self.spool.depth()
+        if remaining:
+            print(f"Spool: {remaining} submissions left for the next job on this worker")
+
+
+class SheetsSink(Sink):
+    """Summary + Responses tabs: spooled, buffered or written directly"""
+
+    name = 'sheets'
+
+    def __init__(self, credentials=None, api_endpoint: str = None):
+        self.credentials = credentials
+        self.api_endpoint = api_endpoint   # e.g. a local stand-in; None for Google
+        self._service = None
+        self._sheet_ids = None
+        self._buffer = None
+        self._spool = None
+        self._drainer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def get_service(self):
+        """
+        Return the cached Sheets API service, building it on first use
+
+        Uses the discovery document bundled with google-api-python-client
+        (static_discovery) so no discovery fetch happens at runtime. The Google
+        client libraries are imported here rather than at module load: they
+        take longer to import than the rest of the script, and with the spool
+        enabled only the background drainer needs them.
+        """
+        with self._lock:
+            if self._service is None:
+                from googleapiclient.discovery import build
+                if self.credentials is None:
+                    import wmill
+                    from google.oauth2 import service_account
+                    self.credentials = service_account.Credentials.from_service_account_info(
+                        wmill.get_resource(GOOGLE_RESOURCE_PATH),
+                        scopes=SHEETS_SCOPES
+                    )
+                self._service = build(
+                    'sheets', 'v4',
+                    credentials=self.credentials,
+                    static_discovery=True,
+                    cache_discovery=False,
+                    client_options={'api_endpoint': self.api_endpoint} if self.api_endpoint else None
+                )
+            return self._service
+
+    def reset_service(self) -> None:
+        """Drop the cached service and tab IDs (credentials are kept)"""
+        with self._lock:
+            self._service = None
+            self._sheet_ids = None
+
+    def _get_sheet_ids(self, service) -> dict:
+        """Map tab title -> numeric sheetId (needed by appendCells), fetched once per worker"""
+        if self._sheet_ids is None:
+            spreadsheet = service.spreadsheets().get(
+                spreadsheetId=SPREADSHEET_ID,
+                fields='sheets.properties(sheetId,title)'
+            ).execute()
+            self._sheet_ids = {
+                sheet['properties']['title']: sheet['properties']['sheetId']
+                for sheet in spreadsheet.get('sheets', [])
+            }
+        return self._sheet_ids
+
+    def write_rows(self, summary_rows: list, response_rows: list) -> dict:
+        """Append Summary and Responses rows in a single batchUpdate round trip"""
+        service = self.get_service()
+        # The service's HTTP transport is not thread-safe and the buffer and
+        # spool flush from background threads
+        with self._write_lock:
+            sheet_ids = self._get_sheet_ids(service)
+            batch_requests = [_append_cells(sheet_ids[SUMMARY_SHEET], summary_rows)]
+            if response_rows:
+                batch_requests.append(_append_cells(sheet_ids[RESPONSES_SHEET], response_rows))
+            return service.spreadsheets().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID,
+                body={'requests': batch_requests}
+            ).execute()
+
+    def _flush_rows(self, items: list) -> None:
+        """Write many queued (summary_row, response_rows) in one batchUpdate"""
+        self.write_rows(
+            [summary_row for summary_row, _ in items],
+            [row for _, response_rows in items for row in response_rows]
+        )
+
+    def _deliver(self, submissions: list) -> None:
+        """Write spooled submissions to Sheets in one batchUpdate"""
+        self._flush_rows([build_rows(submission) for submission in submissions])
+
+    def get_buffer(self) -> WriteBehindBuffer:
+        """Return the sink's write-behind buffer, starting it (and its shutdown hook) on first use"""
+        with self._lock:
+            if self._buffer is None:
+                self._buffer = WriteBehindBuffer(
+                    self._flush_rows,
+                    max_batch=BUFFER_MAX_BATCH,
+                    max_delay=BUFFER_MAX_DELAY,
+                    max_pending=BUFFER_MAX_PENDING,
+                    flush_retries=BUFFER_FLUSH_RETRIES,
+                    release_fn=lambda key: get_dedupe_index().release(key)
+                )
+                atexit.register(self._buffer.close)
+            return self._buffer
+
+    def get_spool(self) -> Spool:
+        """Return the sink's spool, starting the drainer (and its shutdown hook) on first use"""
+        with self._lock:
+            if self._spool is None:
+                self._spool = Spool(SPOOL_PATH)
+                self._drainer = SpoolDrainer(self._spool, self._deliver, SPOOL_BATCH_SIZE)
+                atexit.register(self._drainer.stop, SPOOL_SHUTDOWN_TIMEOUT)
+            return self._spool
+
+    def write(self, submission: dict, dedupe_key: str = None) -> dict:
+        if SPOOL_ENABLED:
+            try:
+                spool_id = self.get_spool().append(submission)
+                self._drainer.notify()
+                return {'spooled': True, 'spoolId': spool_id}
+            except sqlite3.Error as spool_error:
+                print(f"⚠️ Spool unavailable, writing to Google Sheets directly: {str(spool_error)}")
+
+        summary_row, response_rows = build_rows(submission)
+        if BUFFER_ENABLED:
+            buffer = self.get_buffer()
+            if buffer.submit((summary_row, response_rows), timeout=BUFFER_SUBMIT_TIMEOUT, dedupe_key=dedupe_key):
+                return {'buffered': True, 'pending': buffer.pending}
+            print("⚠️ Write-behind buffer full, writing directly")
+
+        try:
+            self.write_rows([summary_row], response_rows)
+        except Exception:
+            # Rebuild the service on the next write in case it is in a bad state
+            self.reset_service()
+            raise
+        return {'rowsAppended': 1 + len(response_rows)}
+
+
+SINK_FACTORIES = {
+    'stdout': StdoutSink,
+    'file': lambda: FileSink(LOG_FILE_PATH),
+    'postgres': PostgresSink,
+    'sheets': SheetsSink
+}
+
+
+# ============================================================================
+# DEDUPE INDEX
+# ============================================================================
+# app.js sends a submissionKey created once per assessment attempt, so a
+# resend of the same completed assessment (a double submit, a retried
+# request, a reload that restores progress and submits again) carries the
+# same key. Without one, the key is a hash of the submission minus its
+# timestamp; two respondents can give identical answers, so derived keys
+# are only remembered for DEDUPE_DERIVED_WINDOW - long enough for retries.
+#
+# Keys are claimed per sink before it is written, and a sink's key is
+# released again if its write fails (once a timed-out write has failed
+# too) or the Sheets buffer later drops the submission. A resend is then
+# written only to the sinks that did not store it - a stdout line that
+# made it doesn't stop a failed Postgres or Sheets write from being
+# retried - and is acknowledged without writing once every sink has it.
+# Claims go through a SQLite file on the worker's disk (an atomic upsert, so
+# concurrent jobs on one worker agree and a restarted process still knows
+# recent keys); a bounded in-memory map answers repeat duplicates without
+# touching the file.
+
+
+def sink_key(key: str, sink_name: str) -> str:
+    """Dedupe key of one sink's copy of a submission"""
+    return f'{key}|{sink_name}'
+
+
+def submission_key(submission: dict, key: str = '') -> tuple:
+    """(key, seconds to remember it): the client's key, else a content hash"""
+    if key:
+        return f'client:{key}', DEDUPE_WINDOW
+    content = {k: v for k, v in submission.items() if k != 'timestamp'}
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+    return f'derived:{digest}', DEDUPE_DERIVED_WINDOW
+
+
+class DedupeIndex:
+    """Recently claimed submission keys: a bounded in-memory map over a SQLite table"""
+
+    PURGE_EVERY = 1000   # Claims between deletes of expired rows
+
+    def __init__(self, path: str = None, max_keys: int = DEDUPE_MAX_KEYS):
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()   # key -> expires_at (epoch seconds)
+        self._max_keys = max_keys
+        self._claims = 0
+        self._db = None
+        self.stats = {'checked': 0, 'duplicates': 0, 'writes_saved': 0, 'released': 0}
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS dedupe (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️ Dedupe file unavailable, remembering keys in memory only: {str(e)}")
+                self._db = None
+
+    def _remember(self, key: str, expires_at: float) -> None:
+        # Caller holds self._lock
+        self._recent[key] = expires_at
+        self._recent.move_to_end(key)
+        while len(self._recent) > self._max_keys:
+            self._recent.popitem(last=False)
+
+    def claim(self, key: str, window: float) -> bool:
+        """Claim key for `window` seconds; False if it is already claimed"""
+        now = time.time()
+        with self._lock:
+            self.stats['checked'] += 1
+            expires_at = self._recent.get(key)
+            if expires_at is not None and expires_at > now:
+                self.stats['duplicates'] += 1
+                return False
+            claimed = True
+            if self._db is not None:
+                try:
+                    # Inserts, or takes over an expired row; changes nothing if the key is live
+                    cursor = self._db.execute(
+                        "INSERT INTO dedupe (key, expires_at) VALUES (?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                        "WHERE dedupe.expires_at <= ?",
+                        (key, now + window, now)
+                    )
+                    claimed = cursor.rowcount == 1
+                    if not claimed:
+                        # Claimed by another process (or before a restart); cache its expiry
+                        row = self._db.execute("SELECT expires_at FROM dedupe WHERE key = ?", (key,)).fetchone()
+                        expires_at = row[0] if row else now + window
+                    self._claims += 1
+                    if self._claims % self.PURGE_EVERY == 0:
+                        self._db.execute("DELETE FROM dedupe WHERE expires_at <= ?", (now,))
+                except sqlite3.Error as e:
+                    print(f"⚠️ Dedupe file error, checking memory only: {str(e)}")
+            if not claimed:
+                self._remember(key, expires_at)
+                self.stats['duplicates'] += 1
+                return False
+            self._remember(key, now + window)
+            return True
+
+    def release(self, key: str) -> None:
+        """Forget a claim whose submission was not stored"""
+        with self._lock:
+            self._recent.pop(key, None)
+            self.stats['released'] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM dedupe WHERE key = ?", (key,))
+                except sqlite3.Error as e:
+                    print(f"⚠️ Dedupe file error on release: {str(e)}")
+
+    def count_saved(self, writes: int) -> None:
+        """Record the writes a duplicate did not make"""
+        with self._lock:
+            self.stats['writes_saved'] += writes
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, 'in_memory': len(self._recent)}
+
+
+_dedupe = None
+_dedupe_lock = threading.Lock()
+
+
+def get_dedupe_index() -> DedupeIndex:
+    """Return the worker's dedupe index, opening its file on first use"""
+    global _dedupe
+    with _dedupe_lock:
+        if _dedupe is None:
+            _dedupe = DedupeIndex(DEDUPE_PATH)
+        return _dedupe
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+_sinks = {}
+_sink_stats = {}
+_stats_lock = threading.Lock()
+_executors = {}
+_histograms = {}   # sink name (or 'total') -> LatencyHistogram
+
+
+class LatencyHistogram:
+    """Lifetime latency buckets plus the most recent samples for percentiles"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.sum_ms = 0.0
+        self.recent = deque(maxlen=METRICS_WINDOW_SAMPLES)
+
+    def observe(self, ms: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.recent.append(ms)
+
+    def percentiles(self) -> dict:
+        samples = sorted(self.recent)
+        if not samples:
+            return {}
+        return {f'p{p}_ms': round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))], 1) for p in (50, 95, 99)}
+
+
+def _observe(name: str, ms: float) -> None:
+    # Caller holds _stats_lock
+    if name not in _histograms:
+        _histograms[name] = LatencyHistogram()
+    _histograms[name].observe(ms)
+
+
+def get_sink(name: str) -> Sink:
+    """Return the worker's instance of a sink, creating it on first use"""
+    with _stats_lock:
+        if name not in _sinks:
+            _sinks[name] = SINK_FACTORIES[name]()
+        return _sinks[name]
+
+
+def _get_executor(name: str) -> ThreadPoolExecutor:
+    with _stats_lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=SINK_WORKERS, thread_name_prefix=f'log-{name}')
+        return _executors[name]
+
+
+def register_sink(sink: Sink, timeout: float = None) -> None:
+    """Add or replace a sink instance (e.g. one pointed at a local stand-in)"""
+    with _stats_lock:
+        _sinks[sink.name] = sink
+        SINK_FACTORIES.setdefault(sink.name, lambda: sink)
+        if timeout is not None:
+            SINK_TIMEOUTS[sink.name] = timeout
+
+
+def _stats_for(name: str) -> dict:
+    # Caller holds _stats_lock
+    if name not in _sink_stats:
+        _sink_stats[name] = {
+            'writes': 0, 'errors': 0, 'timeouts': 0,
+            'total_ms': 0.0, 'max_ms': 0.0, 'last_error': None
+        }
+    return _sink_stats[name]
+
+
+def _record(name: str, seconds: float, error: str = None) -> None:
+    with _stats_lock:
+        stats = _stats_for(name)
+        stats['writes'] += 1
+        stats['total_ms'] += seconds * 1000
+        stats['max_ms'] = max(stats['max_ms'], seconds * 1000)
+        _observe(name, seconds * 1000)
+        if error:
+            stats['errors'] += 1
+            stats['last_error'] = error
+
+
+def _timed_write(sink: Sink, submission: dict, dedupe_key: str = None) -> tuple:
+    """Run one sink write, recording its latency and outcome in the counters"""
+    started = time.monotonic()
+    try:
+        details = sink.write(submission, dedupe_key)
+    except Exception as e:
+        _record(sink.name, time.monotonic() - started, f"{type(e).__name__}: {str(e)}")
+        raise
+    elapsed = time.monotonic() - started
+    _record(sink.name, elapsed)
+    return elapsed, details or {}
+
+
+def sink_stats() -> dict:
+    """Cumulative per-sink counters for this worker (latency in ms)"""
+    with _stats_lock:
+        return {
+            name: {
+                **stats,
+                'total_ms': round(stats['total_ms'], 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'avg_ms': round(stats['total_ms'] / stats['writes'], 1) if stats['writes'] else 0.0,
+                **(_histograms[name].percentiles() if name in _histograms else {})
+            }
+            for name, stats in _sink_stats.items()
+        }
+
+
+def _prom_labels(**labels) -> str:
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+def metrics_text() -> str:
+    """Sink latency histograms and counters in the Prometheus text format"""
+    lines = [
+        '# HELP assessment_log_latency_ms Sink write latency (sink="total": whole submission)',
+        '# TYPE assessment_log_latency_ms histogram'
+    ]
+    with _stats_lock:
+        for name, h in _histograms.items():
+            cumulative = 0
+            for le, count in zip([*map(str, LATENCY_BUCKETS_MS), '+Inf'], h.buckets):
+                cumulative += count
+                lines.append(f'assessment_log_latency_ms_bucket{_prom_labels(sink=name, le=le)} {cumulative}')
+            lines.append(f'assessment_log_latency_ms_sum{_prom_labels(sink=name)} {round(h.sum_ms, 1)}')
+            lines.append(f'assessment_log_latency_ms_count{_prom_labels(sink=name)} {h.count}')
+        for counter, help_text in (('writes', 'Sink writes attempted'),
+                                   ('errors', 'Sink writes that raised'),
+                                   ('timeouts', 'Submissions acknowledged without the sink')):
+            lines.append(f'# HELP assessment_log_{counter}_total {help_text}')
+            lines.append(f'# TYPE assessment_log_{counter}_total counter')
+            for name, stats in _sink_stats.items():
+                lines.append(f'assessment_log_{counter}_total{_prom_labels(sink=name)} {stats[counter]}')
+    return '\n'.join(lines) + '\n'
+
+
+def _release_if_failed(dedupe_key: str, future) -> None:
+    """
+    Release a timed-out sink's dedupe key once its write fails
+
+    The write keeps running and may still store the submission; a late
+    success keeps the key.
+    """
+    def settled(f):
+        if f.exception() is not None:
+            get_dedupe_index().release(dedupe_key)
+
+    future.add_done_callback(settled)
+
+
+def dispatch(submission: dict, sinks: list = None, dedupe_keys: dict = None) -> dict:
+    """
+    Write one submission to every sink concurrently
+
+    dedupe_keys maps sink name -> the key claimed for it; the key of each
+    sink that fails is released (a timed-out sink's once its write has
+    failed), so a resend is written to that sink again.
+
+    Returns:
+        Per-sink result: {'success', 'latency_ms'} plus the sink's details
+        (e.g. 'id', 'spooled') or 'error' or 'timed_out'
+    """
+    names = sinks or ENABLED_SINKS
+    started = time.monotonic()
+    dedupe_keys = dedupe_keys or {}
+    futures = {
+        name: _get_executor(name).submit(_timed_write, get_sink(name), submission, dedupe_keys.get(name))
+        for name in names
+    }
+
+    results = {}
+    for name, future in futures.items():
+        remaining = SINK_TIMEOUTS.get(name, 5.0) - (time.monotonic() - started)
+        try:
+            elapsed, details = future.result(timeout=max(0.0, remaining))
+            results[name] = {'success': True, 'latency_ms': round(elapsed * 1000, 1), **details}
+        except FutureTimeoutError:
+            with _stats_lock:
+                _stats_for(name)['timeouts'] += 1
+            results[name] = {
+                'success': False,
+                'timed_out': True,
+                'latency_ms': round((time.monotonic() - started) * 1000, 1)
+            }
+        except Exception as e:
+            results[name] = {
+                'success': False,
+                'error': str(e),
+                'latency_ms': round((time.monotonic() - started) * 1000, 1)
+            }
+
+    for name, result in results.items():
+        key = dedupe_keys.get(name)
+        if key and not result['success']:
+            if result.get('timed_out'):
+                _release_if_failed(key, futures[name])
+            else:
+                get_dedupe_index().release(key)
+    return results
+
+
+def main(
+    timestamp: str,
+    team: str,
+    jobTitle: str,
+    jobLevel: str,
+    overallScore: float,
+    overallMaturity: str,
+    hasNotStarted: bool,
+    categoryScores: dict,
+    categoryMaturities: dict,
+    responses: dict,
+    subDepartment: str = '',
+    include_metrics: bool = False,
+    submissionKey: str = ''
+):
+    """
+    Log an anonymous assessment response to every enabled sink
+
+    Args:
+        timestamp: ISO timestamp of when assessment was completed
+        team: Team/department name
+        jobTitle: Job title (not a unique identifier)
+        jobLevel: Job level (S1-S4, M1-M4, E1-E4, etc.)
+        overallScore: Overall assessment score (1.0-4.0)
+        overallMaturity: Overall maturity level
+        hasNotStarted: Whether any category scored "Not Started"
+        categoryScores: Dictionary of category scores
+        categoryMaturities: Dictionary of category maturity levels
+        responses: Dictionary of individual question responses
+        subDepartment: Focus area within the team (empty if not asked)
+        include_metrics: Also return metrics_text() as 'metrics'
+        submissionKey: Idempotency key from app.js; a resend with the same
+            key is only written to the sinks that did not store it, and
+            acknowledged without writing once all have (derived from the
+            content if empty)
+
+    Returns:
+        Success if at least one sink stored the response, with per-sink
+        results and cumulative per-sink latency/error counters and
+        percentiles
+    """
+
+    submission = {
+        'timestamp': timestamp,
+        'team': team,
+        'subDepartment': subDepartment,
+        'jobTitle': jobTitle,
+        'jobLevel': jobLevel,
+        'overallScore': overallScore,
+        'overallMaturity': overallMaturity,
+        'hasNotStarted': hasNotStarted,
+        'categoryScores': categoryScores,
+        'categoryMaturities': categoryMaturities,
+        'responses': responses
+    }
+
+    try:
+        started = time.monotonic()
+        names = list(ENABLED_SINKS)
+        dedupe_keys = None
+        if DEDUPE_ENABLED:
+            index = get_dedupe_index()
+            key, window = submission_key(submission, submissionKey)
+            dedupe_keys = {name: sink_key(key, name) for name in names}
+            names = [name for name in names if index.claim(dedupe_keys[name], window)]
+            if len(names) < len(ENABLED_SINKS):
+                index.count_saved(len(ENABLED_SINKS) - len(names))
+            if not names:
+                print(f"↩️ Duplicate submission ignored ({key.split(':')[0]} key)")
+                return {
+                    'success': True,
+                    'duplicate': True,
+                    'message': 'Response already logged',
+                    'timestamp': timestamp,
+                    'team': team,
+                    'overallMaturity': overallMaturity,
+                    'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                    'dedupe': index.snapshot()
+                }
+            if len(names) < len(ENABLED_SINKS):
+                print(f"↩️ Resent submission: writing only to {', '.join(names)}")
+
+        written = dispatch(submission, names, dedupe_keys)
+        # Sinks skipped for a resend already hold the submission
+        results = {
+            name: written.get(name, {'success': True, 'duplicate': True, 'latency_ms': 0.0})
+            for name in ENABLED_SINKS
+        }
+        stored = [name for name, result in results.items() if result['success']]
+
+        for name, result in results.items():
+            if not result['success']:
+                reason = 'timed out' if result.get('timed_out') else result.get('error')
+                print(f"⚠️ Sink {name} failed: {reason}")
+
+        latency_ms = (time.monotonic() - started) * 1000
+        with _stats_lock:
+            _observe('total', latency_ms)
+
+        result = {
+            'success': bool(stored),
+            'message': f"Response logged to {', '.join(stored)}" if stored else 'Failed to log response',
+            'timestamp': timestamp,
+            'team': team,
+            'overallMaturity': overallMaturity,
+            'latency_ms': round(latency_ms, 1),
+            'sinks': results,
+            'sinkStats': sink_stats(),
+            **({'dedupe': get_dedupe_index().snapshot()} if DEDUPE_ENABLED else {})
+        }
+        if include_metrics:
+            result['metrics'] = metrics_text()
+        return result
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Error logging response: {error_msg}")
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'message': 'Failed to log response'
+        }
@@ -0,0 +1,352 @@
+"""
+Windmill Script: Peer Percentiles
+=================================
+
+Answers "how do I compare to my peers?" for the results screen: given a
+cohort (team, job level) and category scores, returns the percentile of
+each score among everyone in that cohort who has taken the assessment.
+
+Each cohort is held in memory as fixed-width score histograms (0.01 bins,
+matching the DECIMAL(3,2) score columns) stored as Fenwick trees, so a
+lookup or an update is O(log bins) regardless of cohort size. New rows in
+assessment_responses are picked up incrementally by id (re-checking a
+trailing window of ids for rows that committed late), and least recently
+used cohorts are evicted to stay within PERCENTILE_MEMORY_BUDGET.
+
+Small cohorts fall back to wider peer groups (same job level across teams,
+then everyone) so a percentile is never based on a handful of people.
+
+Setup:
+1. Create a new script at path: u/VinceDeFreitas/peer_percentiles
+2. Copy this code into the script editor
+3. Save and deploy (reads the same assessment_db resource as the logger)
+"""
+
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# Windmill PostgreSQL resource (host, port, user, dbname, password, sslmode)
+DB_RESOURCE_PATH = "u/VinceDeFreitas/assessment_db"
+
+CATEGORY_COLUMNS = {
+    'Delegation': 'delegation',
+    'Communication': 'communication',
+    'Discernment': 'discernment',
+    'Keeping It Twilio': 'twilio'
+}
+# Histogram series per cohort: the four categories plus the overall score
+SERIES = list(CATEGORY_COLUMNS) + ['Overall']
+SCORE_COLUMNS = [f'{col}_score' for col in CATEGORY_COLUMNS.values()] + ['overall_score']
+
+# Scores run 0.00-4.00 in steps of 0.01
+SCORE_BINS = 401
+
+# Cohorts smaller than this fall back to a wider peer group
+MIN_COHORT_SIZE = 20
+
+# Upper bound on resident histogram memory per worker (bytes)
+PERCENTILE_MEMORY_BUDGET = 32 * 1024 * 1024
+
+# How often to fold newly logged rows into resident cohorts, and how often to
+# reload everything (picks up re-scores and deletions)
+PERCENTILE_POLL_SECONDS = 5.0
+PERCENTILE_RELOAD_SECONDS = 3600.0
+
+# Ids are assigned at insert but concurrent transactions commit out of order,
+# so each poll re-reads this many ids below _last_id and folds in any it hasn't
+# seen. A row committing later than that is picked up by the next reload.
+PERCENTILE_RESCAN_IDS = 1000
+
+ALL = '*'
+
+
+def score_bin(score: float) -> int:
+    """Histogram bin for a score (0.01 resolution, clamped to 0.00-4.00)"""
+    return min(SCORE_BINS - 1, max(0, int(round(float(score) * 100))))
+
+
+class CohortHistogram:
+    """
+    Score histograms for one cohort, one Fenwick tree per series
+
+    Trees are 1-indexed int32 arrays, so each cohort costs
+    len(SERIES) * (SCORE_BINS + 1) * 4 bytes however many respondents it has.
+    """
+
+    __slots__ = ('trees', 'size')
+
+    BYTES = len(SERIES) * (SCORE_BINS + 1) * 4
+
+    def __init__(self):
+        self.trees = [array('i', bytes(4 * (SCORE_BINS + 1))) for _ in SERIES]
+        self.size = 0
+
+    @classmethod
+    def from_rows(cls, rows) -> 'CohortHistogram':
+        """Build from score rows in SCORE_COLUMNS order in O(rows + bins)"""
+        histogram = cls()
+        for row in rows:
+            histogram.size += 1
+            for tree, score in zip(histogram.trees, row):
+                if score is not None:
+                    tree[score_bin(score) + 1] += 1
+        # Turn raw bin counts into Fenwick partial sums in place
+        for tree in histogram.trees:
+            for i in range(1, SCORE_BINS + 1):
+                parent = i + (i & -i)
+                if parent <= SCORE_BINS:
+                    tree[parent] += tree[i]
+        return histogram
+
+    def add(self, row) -> None:
+        """Add one respondent's scores (SCORE_COLUMNS order)"""
+        self.size += 1
+        for tree, score in zip(self.trees, row):
+            if score is None:
+                continue
+            i = score_bin(score) + 1
+            while i <= SCORE_BINS:
+                tree[i] += 1
+                i += i & -i
+
+    @staticmethod
+    def _prefix(tree, bins: int) -> int:
+        """Respondents in the first `bins` bins"""
+        total = 0
+        while bins > 0:
+            total += tree[bins]
+            bins -= bins & -bins
+        return total
+
+    def rank(self, series: int, score: float) -> tuple:
+        """
+        Returns:
+            (respondents below score, respondents at score, respondents with a score)
+        """
+        tree = self.trees[series]
+        b = score_bin(score)
+        below = self._prefix(tree, b)
+        at_or_below = self._prefix(tree, b + 1)
+        return below, at_or_below - below, self._prefix(tree, SCORE_BINS)
+
+
+class PeerIndex:
+    """
+    LRU cache of cohort histograms with incremental updates
+
+    Args:
+        load_cohort: fn(team, job_level) -> rows of scores in SCORE_COLUMNS
+            order ('*' matches every team / level)
+        memory_budget: Max bytes of resident histograms
+    """
+
+    def __init__(self, load_cohort, memory_budget: int = PERCENTILE_MEMORY_BUDGET):
+        self.load_cohort = load_cohort
+        self.max_cohorts = max(3, memory_budget // CohortHistogram.BYTES)
+        self._cohorts = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'lookups': 0, 'loads': 0, 'evictions': 0, 'rows_added': 0}
+
+    def _get(self, key: tuple) -> CohortHistogram:
+        # Caller holds _lock
+        histogram = self._cohorts.get(key)
+        if histogram is not None:
+            self._cohorts.move_to_end(key)
+            return histogram
+        histogram = CohortHistogram.from_rows(self.load_cohort(*key))
+        self.stats['loads'] += 1
+        self._cohorts[key] = histogram
+        while len(self._cohorts) > self.max_cohorts:
+            self._cohorts.popitem(last=False)
+            self.stats['evictions'] += 1
+        return histogram
+
+    def add(self, team: str, job_level: str, row) -> None:
+        """Fold one new respondent into every resident cohort it belongs to"""
+        with self._lock:
+            for key in ((team, job_level), (ALL, job_level), (ALL, ALL)):
+                histogram = self._cohorts.get(key)
+                if histogram is not None:
+                    histogram.add(row)
+            self.stats['rows_added'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cohorts.clear()
+
+    def percentiles(self, team: str, job_level: str, scores: dict) -> dict:
+        """
+        Percentile of each score within the narrowest peer group with
+        at least MIN_COHORT_SIZE respondents
+
+        Args:
+            scores: {series name: score}, series from SERIES
+
+        Returns:
+            {'cohort': {'team', 'jobLevel', 'size'}, 'percentiles': {series: 0-100}}
+        """
+        with self._lock:
+            self.stats['lookups'] += 1
+            for key in ((team, job_level), (ALL, job_level), (ALL, ALL)):
+                histogram = self._get(key)
+                if histogram.size >= MIN_COHORT_SIZE:
+                    break
+
+            percentiles = {}
+            for name, score in scores.items():
+                below, equal, total = histogram.rank(SERIES.index(name), score)
+                # Mid-rank: half of the tied respondents count as below
+                percentiles[name] = round(100.0 * (below + equal / 2) / total, 1) if total else None
+
+        return {
+            'cohort': {'team': key[0], 'jobLevel': key[1], 'size': histogram.size},
+            'percentiles': percentiles
+        }
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return len(self._cohorts) * CohortHistogram.BYTES
+
+
+# ============================================================================
+# DATABASE-BACKED INDEX (warm-worker state)
+# ============================================================================
+
+_conn = None
+_db_resource = None
+_index = None
+_last_id = 0
+# Ids above _last_id - PERCENTILE_RESCAN_IDS already folded into the index
+_seen_ids = set()
+_last_poll = 0.0
+_loaded_at = 0.0
+# Guards the state above and is held around lookups too: cohorts load
+# lazily during a lookup and must include exactly the rows the polls have
+# folded in (everything up to the rescan window, plus _seen_ids within it),
+# so a poll can't fold in rows mid-load. Lookups are already serialized by
+# the index's own lock, so this costs no concurrency.
+_state_lock = threading.RLock()
+
+
+def _connection():
+    global _conn
+    if _conn is None or _conn.closed:
+        import psycopg2
+        db = _db_resource
+        _conn = psycopg2.connect(
+            host=db.get('host'),
+            port=db.get('port', 5432),
+            user=db.get('user'),
+            password=db.get('password'),
+            dbname=db.get('dbname'),
+            sslmode=db.get('sslmode', 'prefer')
+        )
+        _conn.autocommit = True
+    return _conn
+
+
+def _load_cohort(team: str, job_level: str) -> list:
+    # Rows not yet seen by a poll reach the cohort through the next one
+    with _state_lock:
+        filters = ["(id <= %s OR id = ANY(%s))"]
+        params = [_last_id - PERCENTILE_RESCAN_IDS, sorted(_seen_ids)]
+        if team != ALL:
+            filters.append("team = %s")
+            params.append(team)
+        if job_level != ALL:
+            filters.append("job_level = %s")
+            params.append(job_level)
+        with _connection().cursor() as cur:
+            cur.execute(
+                f"SELECT {', '.join(SCORE_COLUMNS)} FROM assessment_responses WHERE {' AND '.join(filters)}",
+                params
+            )
+            return cur.fetchall()
+
+
+def get_index(db_resource: dict = None) -> PeerIndex:
+    """Return the worker's index, folding in rows logged since the last poll"""
+    global _db_resource, _index, _last_id, _seen_ids, _last_poll, _loaded_at
+
+    with _state_lock:
+        if _db_resource is None:
+            if db_resource is None:
+                import wmill
+                db_resource = wmill.get_resource(DB_RESOURCE_PATH)
+            _db_resource = db_resource
+
+        now = time.monotonic()
+        if _index is None or now - _loaded_at > PERCENTILE_RELOAD_SECONDS:
+            with _connection().cursor() as cur:
+                cur.execute("SELECT COALESCE(max(id), 0) FROM assessment_responses")
+                _last_id = cur.fetchone()[0]
+                cur.execute(
+                    "SELECT id FROM assessment_responses WHERE id > %s AND id <= %s",
+                    (_last_id - PERCENTILE_RESCAN_IDS, _last_id)
+                )
+                _seen_ids = {row[0] for row in cur}
+            _index = PeerIndex(_load_cohort)
+            _loaded_at = _last_poll = now
+
+        elif now - _last_poll > PERCENTILE_POLL_SECONDS:
+            with _connection().cursor() as cur:
+                cur.execute(
+                    f"SELECT id, team, job_level, {', '.join(SCORE_COLUMNS)} "
+                    "FROM assessment_responses WHERE id > %s ORDER BY id",
+                    (_last_id - PERCENTILE_RESCAN_IDS,)
+                )
+                for row in cur:
+                    if row[0] in _seen_ids:
+                        continue
+                    _index.add(row[1], row[2], row[3:])
+                    _seen_ids.add(row[0])
+                    _last_id = max(_last_id, row[0])
+            floor = _last_id - PERCENTILE_RESCAN_IDS
+            _seen_ids = {row_id for row_id in _seen_ids if row_id > floor}
+            _last_poll = now
+
+        return _index
+
+
+def main(team: str, jobLevel: str, categoryScores: dict, overallScore: float = None,
+         db_resource: dict = None):
+    """
+    Percentiles of a respondent's scores among their peers
+
+    Args:
+        team: Team name as logged
+        jobLevel: Job level as logged
+        categoryScores: {category: score} for any of the four categories
+        overallScore: Optional overall score
+
+    Returns:
+        Percentile (0-100) per category (and 'Overall'), plus the peer group used
+    """
+    scores = {name: score for name, score in (categoryScores or {}).items() if name in SERIES}
+    if overallScore is not None:
+        scores['Overall'] = overallScore
+
+    try:
+        started = time.monotonic()
+        with _state_lock:
+            result = get_index(db_resource).percentiles(team, jobLevel, scores)
+        return {
+            'success': True,
+            **result,
+            'fallback': result['cohort']['team'] != team or result['cohort']['jobLevel'] != jobLevel,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 2)
+        }
+
+    except Exception as e:
+        global _conn
+        error_msg = str(e)
+        print(f"❌ Error computing percentiles: {error_msg}")
+        _conn = None
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'message': 'Failed to compute peer percentiles'
+        }
@@ -0,0 +1,406 @@
+"""
+Windmill Script: Re-score Stored Assessment Responses
+=====================================================
+
+Re-applies the scoring rules from app.js (calculateScores / getMaturityLevel)
+to every row of the assessment_responses table, vectorized with NumPy so
+the whole history can be re-scored in seconds after a methodology change.
+
+Scoring rules (must match app.js exactly):
+- Multi-select answers score as their maximum value (peak capability)
+- Category score = mean of its answered questions (0 if none answered)
+- Overall score = mean of the four category scores
+- Maturity: < 1.5 Not Started, < 2.5 Compliant, < 3.5 Competent, else Creative
+- Any category below 1.5 caps the overall maturity at Not Started
+
+Setup:
+1. Create a new script at path: u/VinceDeFreitas/rescore_assessment_responses
+2. Copy this code into the script editor
+3. Run with apply=False to see how many rows would change, then apply=True
+
+apply=True rewrites the scores of every row, which the columnar export
+(windmill-export-columnar.py) can't see: it only appends new ids. After
+saving, this script queues a rebuild=True run of EXPORT_SCRIPT_PATH so the
+export picks up the new scores (pass export_dir if the export's schedule
+uses a non-default directory, rebuild_export=False to skip it).
+
+Check parity with app.js after changing either side:
+    python bench/scoring_parity.py
+"""
+
+import time
+
+import numpy as np
+
+# Windmill PostgreSQL resource (host, port, user, dbname, password, sslmode)
+DB_RESOURCE_PATH = "u/VinceDeFreitas/assessment_db"
+
+# Rows fetched and updated per round trip
+RESCORE_BATCH_SIZE = 5000
+
+# Columnar export rebuilt after apply=True (see windmill-export-columnar.py)
+EXPORT_SCRIPT_PATH = "u/VinceDeFreitas/export_assessment_history"
+
+# Category order matches dummyCategories in app.js; the overall score sums
+# category averages in this order
+CATEGORIES = ['Delegation', 'Communication', 'Discernment', 'Keeping It Twilio']
+
+# (question id, category) in dummyQuestions order
+QUESTIONS = [
+    ('q1', 'Delegation'),
+    ('q2', 'Delegation'),
+    ('q4', 'Communication'),
+    ('q5', 'Communication'),
+    ('q6', 'Communication'),
+    ('q7', 'Communication'),
+    ('q8', 'Discernment'),
+    ('q9', 'Discernment'),
+    ('q10', 'Keeping It Twilio'),
+    ('q11', 'Keeping It Twilio'),
+    ('q12', 'Keeping It Twilio')
+]
+
+MATURITY_LEVELS = np.array(['Not Started', 'Compliant', 'Competent', 'Creative'], dtype=object)
+MATURITY_THRESHOLDS = np.array([1.5, 2.5, 3.5])
+NOT_STARTED_THRESHOLD = 1.5
+
+CATEGORY_COLUMNS = {
+    'Delegation': 'delegation',
+    'Communication': 'communication',
+    'Discernment': 'discernment',
+    'Keeping It Twilio': 'twilio'
+}
+
+# responses_packed layout from windmill-logging-pipeline.py: version byte, then
+# one byte per question in QUESTIONS order with the selected options in the
+# low bits
+PACKED_VERSION = 1
+PACKED_OPTION_BITS = 0x0F
+
+# Highest selected value per option bitmask
+_PEAK_BY_MASK = np.array([m.bit_length() for m in range(16)], dtype=np.float64)
+
+_QUESTION_INDEX = {question_id: i for i, (question_id, _) in enumerate(QUESTIONS)}
+
+# (questions x categories) 0/1 membership matrix
+_MEMBERSHIP = np.zeros((len(QUESTIONS), len(CATEGORIES)))
+for _i, (_, _category) in enumerate(QUESTIONS):
+    _MEMBERSHIP[_i, CATEGORIES.index(_category)] = 1.0
+
+
+# ============================================================================
+# SCORING ENGINE
+# ============================================================================
+
+def answer_value(value) -> float:
+    """
+    Score one stored answer the way calculateScores does
+
+    Args:
+        value: A single option value, a list of selected values, or None
+
+    Returns:
+        Maximum selected value, or 0.0 if unanswered
+    """
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, list) and value:
+        return float(max(value))
+    return 0.0
+
+
+def answers_matrix(responses_list: list) -> np.ndarray:
+    """
+    Build the (assessments x questions) matrix of scored answers
+
+    Args:
+        responses_list: Stored `responses` dicts ({question_id: {'value': ...}})
+
+    Returns:
+        float64 array; 0.0 marks an unanswered question
+    """
+    matrix = np.zeros((len(responses_list), len(QUESTIONS)))
+    for row, responses in enumerate(responses_list):
+        for question_id, data in (responses or {}).items():
+            column = _QUESTION_INDEX.get(question_id)
+            if column is not None:
+                value = data.get('value') if isinstance(data, dict) else data
+                matrix[row, column] = answer_value(value)
+    return matrix
+
+
+def maturity_index(scores: np.ndarray) -> np.ndarray:
+    """Vectorized getMaturityLevel, as indexes into MATURITY_LEVELS"""
+    return np.searchsorted(MATURITY_THRESHOLDS, scores, side='right')
+
+
+def score_matrix(answers: np.ndarray) -> dict:
+    """
+    Score many assessments at once
+
+    Args:
+        answers: (assessments x questions) matrix from answers_matrix()
+
+    Returns:
+        Dict of arrays: category_scores (n x 4), overall (n), has_not_started
+        (n), category_maturity and overall_maturity (indexes into MATURITY_LEVELS)
+    """
+    answered = (answers > 0).astype(np.float64)
+    sums = answers @ _MEMBERSHIP
+    counts = answered @ _MEMBERSHIP
+    category_scores = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    # Sum left to right like Array.reduce so results match app.js bit for bit
+    overall = np.zeros(len(answers))
+    for column in range(len(CATEGORIES)):
+        overall += category_scores[:, column]
+    overall /= len(CATEGORIES)
+
+    has_not_started = (category_scores < NOT_STARTED_THRESHOLD).any(axis=1)
+    overall_maturity = np.where(has_not_started, 0, maturity_index(overall))
+
+    return {
+        'category_scores': category_scores,
+        'overall': overall,
+        'has_not_started': has_not_started,
+        'category_maturity': maturity_index(category_scores),
+        'overall_maturity': overall_maturity
+    }
+
+
+def packed_answers_matrix(packed_list: list, responses_list: list = None) -> np.ndarray:
+    """
+    Build the answers matrix from responses_packed values
+
+    Rows packed with PACKED_VERSION are decoded in one vectorized pass; any
+    other row (NULL or another version) falls back to its JSONB responses.
+
+    Args:
+        packed_list: responses_packed values (bytes/memoryview or None)
+        responses_list: Matching JSONB responses, needed only for fallback rows
+    """
+    # psycopg2 returns bytea as memoryview
+    packed_list = [None if p is None else bytes(p) for p in packed_list]
+    matrix = np.zeros((len(packed_list), len(QUESTIONS)))
+    packed_rows = [i for i, p in enumerate(packed_list) if p is not None and p[0] == PACKED_VERSION]
+    if packed_rows:
+        raw = np.frombuffer(b''.join(packed_list[i] for i in packed_rows), dtype=np.uint8)
+        masks = raw.reshape(len(packed_rows), 1 + len(QUESTIONS))[:, 1:] & PACKED_OPTION_BITS
+        matrix[packed_rows] = _PEAK_BY_MASK[masks]
+    other_rows = [i for i, p in enumerate(packed_list) if p is None or p[0] != PACKED_VERSION]
+    if other_rows:
+        matrix[other_rows] = answers_matrix([responses_list[i] for i in other_rows])
+    return matrix
+
+
+def score_responses(responses_list: list, answers: np.ndarray = None) -> list:
+    """
+    Score stored responses into the same shape calculateScores returns
+
+    Args:
+        responses_list: Stored `responses` dicts
+        answers: Prebuilt answers matrix (e.g. from packed_answers_matrix);
+            responses_list is not read if given
+
+    Returns:
+        One dict per assessment: overall, overallMaturity, hasNotStarted,
+        categories, categoryMaturities
+    """
+    if answers is None:
+        answers = answers_matrix(responses_list)
+    scored = score_matrix(answers)
+    category_labels = MATURITY_LEVELS[scored['category_maturity']]
+    overall_labels = MATURITY_LEVELS[scored['overall_maturity']]
+
+    results = []
+    for row in range(len(answers)):
+        results.append({
+            'overall': float(scored['overall'][row]),
+            'overallMaturity': overall_labels[row],
+            'hasNotStarted': bool(scored['has_not_started'][row]),
+            'categories': {
+                category: float(scored['category_scores'][row, column])
+                for column, category in enumerate(CATEGORIES)
+            },
+            'categoryMaturities': {
+                category: category_labels[row, column]
+                for column, category in enumerate(CATEGORIES)
+            }
+        })
+    return results
+
+
+# ============================================================================
+# DATABASE
+# ============================================================================
+
+UPDATE_SQL = f"""
+UPDATE assessment_responses AS t SET
+    overall_score = v.overall_score,
+    overall_maturity = v.overall_maturity,
+    has_not_started = v.has_not_started,
+    {', '.join(f'{col}_score = v.{col}_score' for col in CATEGORY_COLUMNS.values())},
+    {', '.join(f'{col}_maturity = v.{col}_maturity' for col in CATEGORY_COLUMNS.values())},
+    category_scores = v.category_scores,
+    category_maturities = v.category_maturities
+FROM (VALUES %s) AS v (
+    id, overall_score, overall_maturity, has_not_started,
+    {', '.join(f'{col}_score' for col in CATEGORY_COLUMNS.values())},
+    {', '.join(f'{col}_maturity' for col in CATEGORY_COLUMNS.values())},
+    category_scores, category_maturities
+)
+WHERE t.id = v.id
+"""
+
+UPDATE_TEMPLATE = (
+    "(%s, %s::numeric, %s, %s, "
+    + ", ".join(["%s::numeric"] * len(CATEGORY_COLUMNS)) + ", "
+    + ", ".join(["%s"] * len(CATEGORY_COLUMNS)) + ", "
+    + "%s::jsonb, %s::jsonb)"
+)
+
+
+def _update_row(row_id: int, result: dict) -> tuple:
+    from psycopg2.extras import Json
+
+    rounded = {category: round(score, 2) for category, score in result['categories'].items()}
+    return (
+        row_id,
+        round(result['overall'], 2),
+        result['overallMaturity'],
+        result['hasNotStarted'],
+        *[rounded[category] for category in CATEGORIES],
+        *[result['categoryMaturities'][category] for category in CATEGORIES],
+        Json(result['categories']),
+        Json(result['categoryMaturities'])
+    )
+
+
+def _changed(stored: tuple, result: dict) -> bool:
+    overall_maturity, has_not_started, category_maturities = stored
+    return (
+        overall_maturity != result['overallMaturity']
+        or has_not_started != result['hasNotStarted']
+        or (category_maturities or {}) != result['categoryMaturities']
+    )
+
+
+def start_export_rebuild(export_dir: str = None):
+    """Queue a rebuild=True run of the columnar export; returns its job id (None if it couldn't be queued)"""
+    args = {'rebuild': True, **({'export_dir': export_dir} if export_dir else {})}
+    try:
+        import wmill
+        return wmill.run_script_async(path=EXPORT_SCRIPT_PATH, args=args)
+    except Exception as e:
+        print(f"⚠️ Could not queue {EXPORT_SCRIPT_PATH} (run it with rebuild=True): {str(e)}")
+        return None
+
+
+def main(apply: bool = False, batch_size: int = RESCORE_BATCH_SIZE, db_resource: dict = None,
+         rebuild_export: bool = True, export_dir: str = None):
+    """
+    Re-score every stored assessment with the current rules
+
+    Args:
+        apply: Write the new scores back (False only reports what would change)
+        batch_size: Rows per fetch/update round trip
+        db_resource: PostgreSQL connection settings (defaults to the Windmill resource)
+        rebuild_export: After apply, queue a rebuild of the columnar export
+        export_dir: The export's directory, if not its default
+
+    Returns:
+        Counts of rows scored and rows whose maturity changed
+    """
+    import psycopg2
+    from psycopg2.extras import execute_values
+
+    if db_resource is None:
+        import wmill
+        db_resource = wmill.get_resource(DB_RESOURCE_PATH)
+
+    started = time.monotonic()
+    scored = 0
+    changed = 0
+    updated = 0
+    scoring_seconds = 0.0
+
+    try:
+        conn = psycopg2.connect(
+            host=db_resource.get('host'),
+            port=db_resource.get('port', 5432),
+            user=db_resource.get('user'),
+            password=db_resource.get('password'),
+            dbname=db_resource.get('dbname'),
+            sslmode=db_resource.get('sslmode', 'prefer')
+        )
+        try:
+            # Named cursor streams the table instead of loading it all at once
+            with conn.cursor(name='rescore') as read_cur, conn.cursor() as write_cur:
+                read_cur.itersize = batch_size
+                # JSONB is only fetched for rows without a usable packed copy
+                read_cur.execute(
+                    "SELECT id, responses_packed, overall_maturity, has_not_started, category_maturities, "
+                    "CASE WHEN responses_packed IS NULL OR get_byte(responses_packed, 0) <> %s "
+                    "THEN responses END "
+                    "FROM assessment_responses ORDER BY id",
+                    (PACKED_VERSION,)
+                )
+                while True:
+                    rows = read_cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+
+                    score_start = time.monotonic()
+                    answers = packed_answers_matrix([row[1] for row in rows], [row[5] for row in rows])
+                    results = score_responses(None, answers)
+                    scoring_seconds += time.monotonic() - score_start
+
+                    updates = []
+                    for row, result in zip(rows, results):
+                        if _changed(row[2:5], result):
+                            changed += 1
+                        updates.append(_update_row(row[0], result))
+                    scored += len(rows)
+
+                    if apply:
+                        execute_values(write_cur, UPDATE_SQL, updates, template=UPDATE_TEMPLATE, page_size=1000)
+                        updated += len(updates)
+
+            if apply:
+                conn.commit()
+            else:
+                conn.rollback()
+        finally:
+            conn.close()
+
+        print(f"📊 Re-scored {scored} assessments ({changed} with a different maturity)")
+        export_job = None
+        if apply:
+            print(f"✅ Updated {updated} rows")
+            if rebuild_export and updated:
+                export_job = start_export_rebuild(export_dir)
+                if export_job:
+                    print(f"🔄 Columnar export rebuild queued (job {export_job})")
+
+        return {
+            'success': True,
+            'message': f"Re-scored {scored} assessments" + (' and saved the results' if apply else ' (dry run)'),
+            'scored': scored,
+            'changed': changed,
+            'updated': updated,
+            'exportJob': export_job,
+            'scoring_ms': round(scoring_seconds * 1000, 1),
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1)
+        }
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Error re-scoring responses: {error_msg}")
+
+        return {
+            'success': False,
+            'error': error_msg,
+            'message': 'Failed to re-score responses'
+        }